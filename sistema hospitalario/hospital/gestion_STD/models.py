@@ -110,6 +110,8 @@ class GestionAdministrativaCita(models.Model):
     doctor = models.ForeignKey('GestionAdministrativaEmpleado', models.DO_NOTHING)
     # CRÍTICO: El campo paciente debe ser una FK, pero si es un CharField, se mantiene:
     paciente = models.CharField(max_length=100) 
+    # Paciente real vinculado al texto libre (lo completa vincular_pacientes)
+    paciente_registrado = models.ForeignKey('gestion_pacientes.Paciente', models.DO_NOTHING, blank=True, null=True)
     numero_atencion = models.CharField(max_length=20, blank=True, null=True)
     prioridad = models.IntegerField()
     hora_fin = models.DateTimeField(blank=True, null=True)
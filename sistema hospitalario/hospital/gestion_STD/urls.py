@@ -17,6 +17,9 @@ urlpatterns = [
     # 5. Reporte de Desempeño Médico (Ruta: /std/reportes/desempeno/) - GERENCIAL
     path('reportes/desempeno/', views.reporte_desempeno_view, name='reporte_desempeno'),
 
+    # Reporte de Ocupación de Camas (Ruta: /std/reportes/ocupacion/) - GERENCIAL
+    path('reportes/ocupacion/', views.reporte_ocupacion_view, name='reporte_ocupacion'),
+
     # 6. Gestión de Citas (Ruta: /std/gestion/cita/ID/) - OPERACIONAL
     path('gestion/cita/<int:cita_id>/', views.gestion_cita_doctor_view, name='gestion_cita_doctor'),
 
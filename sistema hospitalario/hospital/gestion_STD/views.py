@@ -17,6 +17,9 @@ from .models import (
 
 # Importaciones locales usadas al final del archivo para los reportes
 from gestion_administrativa.models import Empleado, Cita 
+from gestion_administrativa.historial import atendidas_por_doctor
+from gestion_administrativa.ocupacion import resumen
+from gestion_administrativa.utils import DEPARTAMENTOS
 
 # --- Funciones de Soporte y Lógica de Roles (Sin cambios) ---
 
@@ -100,12 +103,15 @@ def reportes_doctor_view(request):
             pass
 
     if paciente_busqueda:
+        # 'paciente' es texto libre; el paciente real (si ya se vinculó) está en paciente_registrado
         citas_pendientes = citas_pendientes.filter(
-            Q(paciente__nombre__icontains=paciente_busqueda) | 
-            Q(paciente__apellido__icontains=paciente_busqueda)
+            Q(paciente__icontains=paciente_busqueda) |
+            Q(paciente_registrado__nombre__icontains=paciente_busqueda) |
+            Q(paciente_registrado__apellido_paterno__icontains=paciente_busqueda) |
+            Q(paciente_registrado__apellido_materno__icontains=paciente_busqueda)
         )
 
-    citas_pendientes = citas_pendientes.order_by('fecha', 'hora')
+    citas_pendientes = citas_pendientes.select_related('paciente_registrado').order_by('fecha', 'hora')
 
     context = {
         'titulo': f'Reporte Operacional de Citas para Dr/a. {empleado.nombre} {empleado.apellido}',
@@ -193,12 +199,10 @@ def dashboard_std_view(request):
     )
 
     datos_desempeno_dashboard = []
+    atendidas = atendidas_por_doctor()  # incluye las citas archivadas
 
     for doctor in doctores:
-        total_atendidas = GestionAdministrativaCita.objects.filter(
-            doctor=doctor,
-            estado='atendida'
-        ).count()
+        total_atendidas = atendidas.get(doctor.id, (0, None))[0]
 
         datos_desempeno_dashboard.append({
             'doctor': f"{doctor.nombre}",
@@ -242,6 +246,42 @@ def reporte_financiero_view(request):
     return render(request, 'std_dashboard/reporte_financiero.html', context)
 
 
+# --------------------------------------------------------------------------------
+# Reporte de ocupación de camas y duración de estancias (Alto Mando)
+# --------------------------------------------------------------------------------
+ETIQUETAS_ESTANCIA = {
+    'hasta_1_dia': '≤ 1 día', 'hasta_3_dias': '1-3 días', 'hasta_7_dias': '3-7 días',
+    'hasta_14_dias': '7-14 días', 'hasta_30_dias': '14-30 días', 'mas_de_30_dias': '> 30 días',
+}
+
+
+@login_required
+@user_passes_test(es_alto_mando, login_url='/accounts/login/')
+def reporte_ocupacion_view(request):
+    """
+    Ocupación por departamento y día, y duración de las estancias. Lee solo el
+    consolidado nocturno (comando consolidar_ocupacion), así que varios años
+    cuestan lo mismo que un mes. Por defecto, los últimos 12 meses.
+    """
+    hoy = date.today()
+    try:
+        hasta = date.fromisoformat(request.GET.get('hasta') or hoy.isoformat())
+        desde = date.fromisoformat(request.GET.get('desde') or hasta.replace(year=hasta.year - 1).isoformat())
+    except ValueError:
+        hasta, desde = hoy, hoy.replace(year=hoy.year - 1)
+    departamento = request.GET.get('departamento') or None
+
+    datos = resumen(desde, hasta, departamento)
+    context = {
+        'titulo': 'Reporte de Ocupación y Estancias',
+        'departamentos_elegibles': DEPARTAMENTOS,
+        'departamento': departamento,
+        'distribucion': [(ETIQUETAS_ESTANCIA[campo], n) for campo, n in datos['distribucion']],
+        **datos,
+    }
+    return render(request, 'std_dashboard/reporte_ocupacion.html', context)
+
+
 # --------------------------------------------------------------------------------
 # VISTA PRINCIPAL CORREGIDA: reporte_desempeno_view
 # --------------------------------------------------------------------------------
@@ -259,15 +299,12 @@ def reporte_desempeno_view(request):
     doctores = Empleado.objects.filter(Q(cargo__icontains='doctor') | Q(cargo__icontains='médico'))
 
     datos_desempeno = []
+    # 2. Citas atendidas y promedio por doctor, incluidas las archivadas (CRÍTICO: el valor 'atendida' debe coincidir con la BD)
+    atendidas = atendidas_por_doctor()
 
     for doctor in doctores:
-        # 2. Obtener citas atendidas (CRÍTICO: el valor 'atendida' debe coincidir con la BD)
-        citas_atendidas = Cita.objects.filter(doctor=doctor, estado='atendida')
-        total_atendidas = citas_atendidas.count()
-
-        # 3. Calcular el promedio de calificación
-        # Si no hay calificaciones, .aggregate() devuelve {'prom': None}
-        promedio_calificacion_agregado = citas_atendidas.aggregate(prom=Avg('calificacion'))['prom']
+        # 3. Total y promedio de calificación (None si no hay calificaciones)
+        total_atendidas, promedio_calificacion_agregado = atendidas.get(doctor.id, (0, None))
         
         # 4. Asignar 0 si es None, o redondear si hay un valor
         if promedio_calificacion_agregado is not None:
@@ -302,12 +339,10 @@ def reporte_calificacion_view(request):
     doctores = Empleado.objects.filter(Q(cargo__icontains='doctor') | Q(cargo__icontains='médico'))
 
     datos_desempeno = []
+    atendidas = atendidas_por_doctor()
 
     for doctor in doctores:
-        citas_atendidas = Cita.objects.filter(doctor=doctor, estado='atendida')
-        total_atendidas = citas_atendidas.count()
-
-        promedio_calificacion_agregado = citas_atendidas.aggregate(prom=Avg('calificacion'))['prom']
+        total_atendidas, promedio_calificacion_agregado = atendidas.get(doctor.id, (0, None))
         
         if promedio_calificacion_agregado is not None:
             promedio_calificacion_final = round(promedio_calificacion_agregado, 2)
@@ -0,0 +1,251 @@
+# gestion_administrativa/agenda.py
+
+# --------------------------
+# Índice de horarios libres para citas (bitmap de 15 minutos por doctor y día)
+# --------------------------
+# Cada (doctor, fecha) se guarda en caché como:
+#   turno:    int de 96 bits, bit i = el doctor trabaja en el bloque i (00:00 + 15 min * i)
+#   ocupados: {bloque: citas} de las citas no canceladas
+#   cambio:   ultimo_cambio() de su (departamento, grupo) al calcularlo
+# Libres = turno sin los bloques ocupados. Las citas ajustan 'ocupados' en
+# sitio al crearse, editarse o borrarse (con cache_turnos.parchar: dos
+# parches a la vez descartan la entrada en vez de perder uno); un cambio de
+# turnos, planes o empleados del grupo (marcar_cambio) deja las entradas
+# viejas sin validez.
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache_turnos import parchar, ultimo_cambio
+from .turnos import a_hora, cargar_planes, turno_rotado_del_dia
+
+MINUTOS_BLOQUE = 15
+BLOQUES_DIA = 24 * 60 // MINUTOS_BLOQUE
+DIA_COMPLETO = (1 << BLOQUES_DIA) - 1
+TIEMPO_AGENDA = 60 * 60  # 1 hora
+DIAS_POR_CONSULTA = 7  # días que se cargan juntos al buscar
+HORIZONTE_BUSQUEDA = 60  # días hacia adelante como máximo
+
+
+def _clave(doctor_id, fecha):
+    crudo = f"{doctor_id}|{fecha.isoformat()}"
+    return "agenda:" + hashlib.md5(crudo.encode("utf-8")).hexdigest()
+
+
+def bloque(hora):
+    """Índice del bloque de 15 minutos que contiene la hora."""
+    return (hora.hour * 60 + hora.minute) // MINUTOS_BLOQUE
+
+
+def hora_de_bloque(i):
+    minutos = i * MINUTOS_BLOQUE
+    return time(minutos // 60, minutos % 60)
+
+
+def _bits(desde, hasta):
+    """Bloques [desde, hasta) como bitmap."""
+    return ((1 << hasta) - 1) & ~((1 << desde) - 1)
+
+
+def bits_turno(hora_inicio, hora_fin):
+    """
+    (bits del día, bits del día siguiente) de un turno. Si hora_fin <= hora_inicio
+    el turno cruza la medianoche (ej: 23:00-07:00), como en intervalo_turno.
+    """
+    i, f = bloque(hora_inicio), bloque(hora_fin)
+    if hora_fin > hora_inicio:
+        return _bits(i, f), 0
+    return _bits(i, BLOQUES_DIA), _bits(0, f)
+
+
+def reserva_de_cita(cita):
+    """(doctor_id, fecha, bloque) que ocupa una cita, o None si no ocupa lugar."""
+    if cita.estado == "cancelada" or not cita.doctor_id or not cita.fecha or not cita.hora:
+        return None
+    return (cita.doctor_id, cita.fecha, bloque(cita.hora))
+
+
+def libres(entrada):
+    ocupados = 0
+    for i in entrada["ocupados"]:
+        ocupados |= 1 << i
+    return entrada["turno"] & ~ocupados
+
+
+# --------------------------
+# Construcción (en lote)
+# --------------------------
+def _calcular(doctores, fechas):
+    """
+    Entradas {(doctor_id, fecha): entrada} para todos los doctores y fechas dadas:
+    una consulta de turnos manuales, una de planes y una de citas.
+    """
+    from .models import Cita, TurnoEmpleado  # importación local para evitar ciclo
+
+    ids = [d.id for d in doctores]
+    desde, hasta = min(fechas) - timedelta(days=1), max(fechas)
+    planes = cargar_planes(ids, desde, hasta)
+    manuales = {
+        (emp_id, fecha): (hi, hf)
+        for emp_id, fecha, hi, hf in TurnoEmpleado.objects.filter(
+            empleado_id__in=ids, fecha__range=(desde, hasta)
+        ).values_list('empleado_id', 'fecha', 'hora_inicio', 'hora_fin')
+    }
+    ocupados = {}
+    for doctor_id, fecha, hora in Cita.objects.filter(
+        doctor_id__in=ids, fecha__range=(min(fechas), hasta)
+    ).exclude(estado="cancelada").values_list('doctor_id', 'fecha', 'hora'):
+        dia = ocupados.setdefault((doctor_id, fecha), {})
+        dia[bloque(hora)] = dia.get(bloque(hora), 0) + 1
+
+    def turno(doctor, fecha):
+        if (doctor.id, fecha) in manuales:
+            hi, hf = manuales[(doctor.id, fecha)]
+            if hi is None or hf is None:
+                return 0, 0  # descanso
+            return bits_turno(hi, hf)
+        rotado = turno_rotado_del_dia(doctor, fecha, planes)
+        if rotado is None:
+            return 0, 0
+        return bits_turno(a_hora(rotado['hora_inicio']), a_hora(rotado['hora_fin']))
+
+    entradas = {}
+    cambios = {}
+    for doctor in doctores:
+        clave_grupo = (doctor.departamento, doctor.grupo_cargo)
+        if clave_grupo not in cambios:
+            cambios[clave_grupo] = ultimo_cambio(*clave_grupo)
+        for fecha in fechas:
+            hoy, _ = turno(doctor, fecha)
+            _, de_ayer = turno(doctor, fecha - timedelta(days=1))
+            entradas[(doctor.id, fecha)] = {
+                "turno": hoy | de_ayer,
+                "ocupados": ocupados.get((doctor.id, fecha), {}),
+                "cambio": cambios[clave_grupo],
+            }
+    return entradas
+
+
+def agenda(doctores, fechas):
+    """Entradas vigentes {(doctor_id, fecha): entrada}; calcula solo las que faltan o quedaron viejas."""
+    doctores = list(doctores)
+    claves = {_clave(d.id, f): (d, f) for d in doctores for f in fechas}
+    encontradas = cache.get_many(list(claves))
+
+    cambios = {}
+    entradas, faltan = {}, set()
+    for clave, (doctor, fecha) in claves.items():
+        grupo = (doctor.departamento, doctor.grupo_cargo)
+        if grupo not in cambios:
+            cambios[grupo] = ultimo_cambio(*grupo)
+        entrada = encontradas.get(clave)
+        if entrada is None or entrada["cambio"] != cambios[grupo]:
+            faltan.add(doctor)
+        else:
+            entradas[(doctor.id, fecha)] = entrada
+
+    if faltan:
+        nuevas = {
+            k: v for k, v in _calcular(list(faltan), fechas).items() if k not in entradas
+        }
+        cache.set_many({_clave(*k): v for k, v in nuevas.items()}, TIEMPO_AGENDA)
+        entradas.update(nuevas)
+    return entradas
+
+
+# --------------------------
+# Actualización incremental (señales de Cita)
+# --------------------------
+def mover_reserva(antes, despues):
+    """Libera el bloque anterior de una cita y ocupa el nuevo en las entradas en caché."""
+    if antes == despues:
+        return
+    for reserva, delta in ((antes, -1), (despues, 1)):
+        if reserva is None:
+            continue
+        doctor_id, fecha, i = reserva
+
+        def cambio(entrada, i=i, delta=delta):
+            n = entrada["ocupados"].get(i, 0) + delta
+            if n > 0:
+                entrada["ocupados"][i] = n
+            else:
+                entrada["ocupados"].pop(i, None)
+
+        # Sin entrada (o descartada por un parche concurrente) se calculará completa cuando alguien la pida
+        parchar(_clave(doctor_id, fecha), cambio, TIEMPO_AGENDA)
+
+
+# --------------------------
+# Búsqueda
+# --------------------------
+def proximos_libres(doctores, n=10, desde=None):
+    """
+    Los n próximos bloques libres (a partir de `desde`, por defecto ahora)
+    entre todos los doctores, ordenados por fecha y hora.
+    Retorna [(fecha, hora, doctor)].
+    """
+    doctores = list(doctores)
+    desde = timezone.localtime(desde or timezone.now())
+    if not doctores or n <= 0:
+        return []
+
+    # Hoy solo cuentan los bloques que empiezan a partir de `desde`
+    primer_bloque = bloque(desde.time()) + (desde.time() > hora_de_bloque(bloque(desde.time())))
+    resultado = []
+    inicio = desde.date()
+    while len(resultado) < n and (inicio - desde.date()).days < HORIZONTE_BUSQUEDA:
+        fechas = [inicio + timedelta(days=i) for i in range(DIAS_POR_CONSULTA)]
+        entradas = agenda(doctores, fechas)
+        for fecha in fechas:
+            mascara = _bits(primer_bloque, BLOQUES_DIA) if fecha == desde.date() else DIA_COMPLETO
+            del_dia = []
+            for doctor in doctores:
+                b = libres(entradas[(doctor.id, fecha)]) & mascara
+                while b:
+                    menor = b & -b
+                    del_dia.append((menor.bit_length() - 1, doctor))
+                    b ^= menor
+            del_dia.sort(key=lambda par: (par[0], par[1].id))
+            for i, doctor in del_dia[:n - len(resultado)]:
+                resultado.append((fecha, hora_de_bloque(i), doctor))
+            if len(resultado) >= n:
+                break
+        inicio += timedelta(days=DIAS_POR_CONSULTA)
+    return resultado
+
+
+def esta_libre(doctor, fecha, hora):
+    """True si el bloque de la hora está dentro del turno del doctor y sin citas."""
+    entrada = agenda([doctor], [fecha])[(doctor.id, fecha)]
+    return bool(libres(entrada) >> bloque(hora) & 1)
+
+
+# --------------------------
+# Validación al agendar
+# --------------------------
+def horario_ocupado(doctor, fecha, hora, propia=None):
+    """
+    True si el bloque de la hora ya tiene una cita del doctor. `propia` es la
+    reserva actual de la cita que se está editando (no choca consigo misma).
+    Chequeo rápido contra la caché; el índice único de Cita es la garantía final.
+    """
+    i = bloque(hora)
+    citas = agenda([doctor], [fecha])[(doctor.id, fecha)]["ocupados"].get(i, 0)
+    if propia == (doctor.id, fecha, i):
+        citas -= 1
+    return citas > 0
+
+
+def olvidar(doctor_id, fecha):
+    """Descarta la entrada en caché: la próxima consulta la recalcula desde la base."""
+    cache.delete(_clave(doctor_id, fecha))
+
+
+def horario_sugerido(doctor, fecha, hora):
+    """Primer bloque libre del doctor a partir de fecha y hora: (fecha, hora) o None."""
+    desde = timezone.make_aware(datetime.combine(fecha, hora))
+    libres_doctor = proximos_libres([doctor], n=1, desde=max(desde, timezone.now()))
+    return libres_doctor[0][:2] if libres_doctor else None
@@ -0,0 +1,124 @@
+# gestion_administrativa/asignacion_camas.py
+
+# --------------------------
+# Asignación de camas segura ante concurrencia y lista de espera FIFO
+# --------------------------
+# Cada operación corre en una transacción que bloquea la fila de la cama
+# (SELECT ... FOR UPDATE) y vuelve a comprobar su estado ya bloqueada: si
+# dos admisiones piden la misma cama, la segunda espera a la primera y la
+# encuentra ocupada (of=('self',): la habitación que trae select_related no
+# se bloquea). La fila del paciente también se bloquea, así un mismo
+# paciente no recibe dos camas a la vez. Orden de bloqueo siempre: cama,
+# lista de espera, paciente (sin ciclos, sin interbloqueos).
+# Cuando una cama termina su limpieza se ofrece primero a la entrada más
+# antigua de ListaEspera de su departamento (índice departamento +
+# fecha_registro); si nadie espera, queda disponible.
+from django.db import transaction
+from django.utils import timezone
+
+LOTE_ESPERA = 20  # entradas de la lista de espera bloqueadas por consulta
+
+
+def _bloquear_espera(paciente_id, departamento):
+    """Bloquea las entradas del paciente en la lista de espera del departamento (las que _ocupar borra)."""
+    from .models import ListaEspera  # importación local para evitar ciclo
+
+    list(ListaEspera.objects.select_for_update().filter(
+        paciente_id=paciente_id, departamento=departamento
+    ).values_list('pk', flat=True))
+
+
+def _bloquear_paciente(paciente_id):
+    from gestion_pacientes.models import Paciente
+
+    list(Paciente.objects.select_for_update().filter(pk=paciente_id).values_list('pk', flat=True))
+
+
+def _tiene_cama(paciente_id):
+    from .models import AsignacionCama  # importación local para evitar ciclo
+
+    return AsignacionCama.objects.filter(
+        paciente_id=paciente_id, fecha_salida__isnull=True, cama__estado='ocupada'
+    ).exists()
+
+
+def _ocupar(cama, paciente):
+    """Cama ya bloqueada -> ocupada por el paciente, que sale de la lista de espera del departamento."""
+    from .models import AsignacionCama, ListaEspera  # importación local para evitar ciclo
+
+    cama.estado = 'ocupada'
+    cama.save(update_fields=['estado'])
+    asignacion = AsignacionCama.objects.create(paciente=paciente, cama=cama)
+    ListaEspera.objects.filter(paciente=paciente, departamento=cama.habitacion.departamento).delete()
+    return asignacion
+
+
+def asignar(cama_id, paciente):
+    """
+    Asigna la cama si sigue disponible al momento de bloquearla.
+    Retorna (asignacion, None) o (None, mensaje de error).
+    """
+    from .models import Cama  # importación local para evitar ciclo
+
+    with transaction.atomic():
+        cama = Cama.objects.select_for_update(of=('self',)).select_related('habitacion').filter(id=cama_id).first()
+        if cama is None or cama.estado != 'disponible':
+            return None, "La cama no está disponible."
+        _bloquear_espera(paciente.pk, cama.habitacion.departamento)
+        _bloquear_paciente(paciente.pk)
+        if _tiene_cama(paciente.pk):
+            return None, f"{paciente.nombre} ya tiene una cama asignada."
+        return _ocupar(cama, paciente), None
+
+
+def liberar(asignacion_id):
+    """Da de alta la asignación vigente y manda la cama a limpieza. Retorna (cama, error)."""
+    from .models import AsignacionCama, Cama  # importación local para evitar ciclo
+
+    with transaction.atomic():
+        asignacion = AsignacionCama.objects.select_for_update().filter(id=asignacion_id).first()
+        if asignacion is None:
+            return None, "La asignación no existe."
+        cama = Cama.objects.select_for_update().get(id=asignacion.cama_id)
+        # Una asignación cerrada no puede liberar la cama que hoy ocupa otro paciente
+        if asignacion.fecha_salida is not None or cama.estado != 'ocupada':
+            return None, "La cama no está ocupada."
+        cama.estado = 'limpieza'
+        cama.save(update_fields=['estado'])
+        asignacion.fecha_salida = timezone.now()
+        asignacion.save(update_fields=['fecha_salida'])
+    return cama, None
+
+
+def devolver_a_servicio(cama_id):
+    """
+    Termina la limpieza: la cama pasa a la entrada más antigua de la lista de
+    espera de su departamento o, si no hay nadie, queda disponible.
+    Retorna (cama, asignacion o None, error).
+    """
+    from .models import Cama, ListaEspera  # importación local para evitar ciclo
+
+    with transaction.atomic():
+        cama = Cama.objects.select_for_update(of=('self',)).select_related('habitacion').filter(id=cama_id).first()
+        if cama is None or cama.estado != 'limpieza':
+            return None, None, "La cama no está en proceso de limpieza."
+
+        # FIFO por departamento; skip_locked: la entrada que otra cama está tomando se salta
+        cola = (
+            ListaEspera.objects.select_for_update(skip_locked=True)
+            .filter(departamento=cama.habitacion.departamento)
+            .order_by('fecha_registro', 'id')
+        )
+        # Por lotes hasta ubicar a alguien o vaciar la cola: cada entrada
+        # revisada se ocupa o se borra, así el lote siguiente siempre avanza
+        while lote := list(cola[:LOTE_ESPERA]):
+            for entrada in lote:
+                _bloquear_paciente(entrada.paciente_id)
+                if _tiene_cama(entrada.paciente_id):
+                    entrada.delete()  # ya internado por otra vía: no sigue esperando
+                    continue
+                return cama, _ocupar(cama, entrada.paciente), None
+
+        cama.estado = 'disponible'
+        cama.save(update_fields=['estado'])
+    return cama, None, None
@@ -0,0 +1,247 @@
+# gestion_administrativa/cache_turnos.py
+
+# --------------------------
+# Caché de calendarios por (departamento, grupo, año, mes)
+# y de cobertura por (departamento, año, mes)
+# --------------------------
+import hashlib
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cobertura import calcular_cobertura
+from .turnos import construir_calendario, fechas_del_mes, mes_siguiente
+
+TIEMPO_CACHE_CALENDARIO = 60 * 60 * 24  # 1 día
+TIEMPO_CANDADO = 10  # segundos; si un proceso muere a mitad de un parche, su candado vence solo
+
+
+def _clave(*partes):
+    """Clave segura para cualquier backend (sin espacios ni acentos)."""
+    crudo = "|".join("" if p is None else str(p) for p in partes)
+    return "calendario:" + hashlib.md5(crudo.encode("utf-8")).hexdigest()
+
+
+# --------------------------
+# Parches sobre entradas en caché (varios procesos)
+# --------------------------
+# get -> modificar -> set no es atómico: dos procesos que parchan la misma
+# entrada a la vez pierden uno de los cambios. Un candado por clave
+# (cache.add) ordena los parches. Quien no lo obtiene no espera ni parcha:
+# marca la clave como sucia y la borra (la próxima lectura la recalcula
+# desde la base). Quien tiene el candado, después de guardar, la vuelve a
+# borrar si la encuentra marcada: un parche viejo nunca queda encima.
+def parchar(clave, cambio, tiempo):
+    """
+    Aplica cambio(datos) a la entrada en caché y la guarda. Retorna True si
+    quedó parchada; False si no estaba en caché o se descartó por un parche
+    concurrente.
+    """
+    candado, sucia = clave + ":candado", clave + ":sucia"
+    if not cache.add(candado, 1, TIEMPO_CANDADO):
+        cache.set(sucia, 1, TIEMPO_CANDADO)
+        cache.delete(clave)
+        return False
+    try:
+        datos = cache.get(clave)
+        if datos is None:
+            return False
+        cambio(datos)
+        cache.set(clave, datos, tiempo)
+        if cache.get(sucia) is not None:
+            cache.delete_many([clave, sucia])
+            return False
+        return True
+    finally:
+        cache.delete(candado)
+
+
+def version_calendario(departamento, grupo):
+    """Versión actual de los calendarios de un (departamento, grupo)."""
+    return cache.get_or_set(_clave("version", departamento, grupo), 1, None)
+
+
+def ultimo_cambio(departamento, grupo):
+    """Fecha/hora del último cambio de turnos o empleados del (departamento, grupo)."""
+    return cache.get_or_set(_clave("modificado", departamento, grupo), timezone.now, None)
+
+
+def marcar_cambio(departamento, grupo):
+    cache.set(_clave("modificado", departamento, grupo), timezone.now(), None)
+
+
+# --------------------------
+# Meses con grillas o coberturas en caché
+# --------------------------
+# Cada mes guardado deja una marca propia que se renueva con cada llenado
+# (vence junto con su grilla). El índice {(año, mes)} solo crece, no vence y
+# se actualiza con candado: meses_en_cache lo cruza con las marcas vivas.
+@contextmanager
+def _candado(clave):
+    """Espera el candado de la clave (como máximo TIEMPO_CANDADO)."""
+    candado = clave + ":candado"
+    limite = time.monotonic() + TIEMPO_CANDADO
+    while not cache.add(candado, 1, TIEMPO_CANDADO) and time.monotonic() < limite:
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(candado)
+
+
+def meses_en_cache(tipo, *partes):
+    """Meses {(año, mes)} con grilla ('calendario') o cobertura ('cobertura') en caché."""
+    meses = cache.get(_clave("meses", tipo, *partes)) or set()
+    marcas = {_clave("mes", tipo, *partes, year, month): (year, month) for year, month in meses}
+    return {marcas[clave] for clave in cache.get_many(list(marcas))}
+
+
+def _recordar_mes(tipo, year, month, *partes):
+    cache.set(_clave("mes", tipo, *partes, year, month), 1, TIEMPO_CACHE_CALENDARIO)
+    indice = _clave("meses", tipo, *partes)
+    if (year, month) in (cache.get(indice) or set()):
+        return
+    with _candado(indice):
+        meses = cache.get(indice) or set()
+        meses.add((year, month))
+        cache.set(indice, meses, None)
+
+
+def _clave_calendario(departamento, grupo, year, month):
+    version = version_calendario(departamento, grupo)
+    return _clave("grilla", departamento, grupo, year, month, version)
+
+
+def invalidar_mes(departamento, grupo, year, month):
+    """Borra solo la grilla y la cobertura de un mes."""
+    cache.delete(_clave_calendario(departamento, grupo, year, month))
+    cache.delete(_clave_cobertura(departamento, year, month))
+    marcar_cambio(departamento, grupo)
+
+
+def invalidar_grupo(departamento, grupo):
+    """
+    Sube la versión del (departamento, grupo) y de la cobertura del
+    departamento: todas sus grillas quedan huérfanas y expiran solas
+    (cambios masivos; para un solo empleado ver propagacion.py).
+    """
+    for clave in (_clave("version", departamento, grupo), _clave("version_cobertura", departamento)):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 2, None)
+    marcar_cambio(departamento, grupo)
+
+
+def calendario_grupo(departamento, grupo, year, month):
+    """
+    Retorna (empleados, turnos_empleados) del grupo para el mes.
+    La primera visita calcula la grilla; las siguientes la leen de caché.
+    """
+    from .models import Empleado  # importación local para evitar ciclo
+
+    clave = _clave_calendario(departamento, grupo, year, month)
+    datos = cache.get(clave)
+    if datos is None:
+        empleados = list(Empleado.objects.filter(
+            departamento=departamento,
+            grupo_cargo=grupo,
+            estado='Activo'
+        ).order_by('nombre'))
+        datos = (empleados, construir_calendario(empleados, year, month))
+        cache.set(clave, datos, TIEMPO_CACHE_CALENDARIO)
+        _recordar_mes("calendario", year, month, departamento, grupo)
+    return datos
+
+
+def parchar_empleado_calendario(departamento, grupo, empleado, year, month, quitar=False):
+    """
+    Recalcula (o quita) solo la fila de un empleado en la grilla en caché del
+    mes. Retorna la fila nueva {fecha: celda}, o None si la grilla no estaba
+    en caché o el empleado se quitó. Si un parche concurrente obliga a
+    descartar la grilla, la fila se retorna igual (sale de la base).
+    """
+    clave = _clave_calendario(departamento, grupo, year, month)
+    if cache.get(clave) is None:
+        return None
+    fila = None if quitar else construir_calendario([empleado], year, month)[empleado.id]
+
+    def cambio(datos):
+        empleados, turnos_empleados = datos
+        empleados[:] = [e for e in empleados if e.id != empleado.id]
+        turnos_empleados.pop(empleado.id, None)
+        if fila is not None:
+            empleados.append(empleado)
+            empleados.sort(key=lambda e: e.nombre)
+            turnos_empleados[empleado.id] = fila
+
+    parchar(clave, cambio, TIEMPO_CACHE_CALENDARIO)
+    return fila
+
+
+# --------------------------
+# Cobertura por (departamento, año, mes)
+# --------------------------
+def _clave_cobertura(departamento, year, month):
+    version = cache.get_or_set(_clave("version_cobertura", departamento), 1, None)
+    return _clave("cobertura", departamento, year, month, version)
+
+
+def cobertura_mes(departamento, year, month):
+    """{cargo: [personal por hora del mes]} del departamento, desde caché si ya se calculó."""
+    clave = _clave_cobertura(departamento, year, month)
+    datos = cache.get(clave)
+    if datos is None:
+        fechas = fechas_del_mes(year, month)
+        if departamento:
+            datos = calcular_cobertura(fechas[0], fechas[-1], departamento=departamento).get(departamento, {})
+        else:
+            datos = calcular_cobertura(fechas[0], fechas[-1]).get("Sin departamento", {})
+        cache.set(clave, datos, TIEMPO_CACHE_CALENDARIO)
+        _recordar_mes("cobertura", year, month, departamento)
+    return datos
+
+
+def parchar_cobertura(departamento, cargo, year, month, delta):
+    """Suma delta (personal por hora del mes, puede ser negativo) a la cobertura en caché."""
+    def cambio(datos):
+        serie = datos.get(cargo) or [0] * len(delta)
+        datos[cargo] = [a + b for a, b in zip(serie, delta)]
+
+    return parchar(_clave_cobertura(departamento, year, month), cambio, TIEMPO_CACHE_CALENDARIO)
+
+
+def cobertura_rango(desde, hasta, departamento=None, cargo=None):
+    """
+    Igual que calcular_cobertura, pero armada con las coberturas mensuales en
+    caché de cada departamento (que se actualizan por diferencias).
+    """
+    from .models import Empleado  # importación local para evitar ciclo
+
+    if departamento:
+        departamentos = [departamento]
+    else:
+        departamentos = {
+            dep or None for dep in Empleado.objects.filter(estado='Activo').values_list('departamento', flat=True).distinct()
+        }
+
+    total_horas = ((hasta - desde).days + 1) * 24
+    cobertura = {}
+    year, month = desde.year, desde.month
+    while (year, month) <= (hasta.year, hasta.month):
+        fechas = fechas_del_mes(year, month)
+        inicio, fin = max(desde, fechas[0]), min(hasta, fechas[-1])
+        a = (inicio - fechas[0]).days * 24
+        b = (fin - fechas[0]).days * 24 + 24
+        destino_inicio = (inicio - desde).days * 24
+
+        for dep in departamentos:
+            for emp_cargo, serie in cobertura_mes(dep, year, month).items():
+                if cargo and emp_cargo != cargo:
+                    continue
+                destino = cobertura.setdefault(dep or "Sin departamento", {}).setdefault(emp_cargo, [0] * total_horas)
+                destino[destino_inicio:destino_inicio + (b - a)] = serie[a:b]
+        year, month = mes_siguiente(year, month)
+    return cobertura
@@ -0,0 +1,163 @@
+# gestion_administrativa/censo.py
+
+# --------------------------
+# Censo de camas: contadores por habitación y por departamento
+# --------------------------
+# CensoHabitacion y CensoDepartamento guardan cuántas camas hay en cada
+# estado. Cada cambio de Cama (señales) los ajusta con UPDATE ... = campo ± 1
+# en la misma transacción, así que las pantallas de asignación responden
+# con una fila en lugar de contar camas. reconstruir() los recalcula desde
+# cero con una sola consulta agrupada si alguna vez se desalinean.
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .eventos import publicar, ultimo_evento
+
+ESTADOS_CAMA = ('disponible', 'ocupada', 'limpieza', 'bloqueada')
+CANAL_CAMAS = 'camas'
+
+
+def _sumar(modelo, filtro, deltas, crear=False):
+    cambios = {estado: F(estado) + n for estado, n in deltas.items() if n}
+    if not cambios:
+        return
+    if not modelo.objects.filter(**filtro).update(**cambios) and crear:
+        modelo.objects.get_or_create(**filtro)
+        modelo.objects.filter(**filtro).update(**cambios)
+
+
+def mover_cama(antes, despues):
+    """
+    Una cama pasó de `antes` a `despues`, cada uno (habitacion_id, estado) o
+    None (cama nueva / eliminada). Ajusta habitación y departamento.
+    """
+    from .models import CensoDepartamento, CensoHabitacion, Habitacion  # importación local para evitar ciclo
+
+    if antes == despues:
+        return
+    por_habitacion = defaultdict(Counter)
+    for cama, delta in ((antes, -1), (despues, 1)):
+        if cama is not None:
+            por_habitacion[cama[0]][cama[1]] += delta
+
+    departamentos = dict(
+        Habitacion.objects.filter(id__in=list(por_habitacion)).values_list('id', 'departamento')
+    )
+    por_departamento = defaultdict(Counter)
+    for habitacion_id, deltas in por_habitacion.items():
+        # La fila de la habitación nace con ella (señal de Habitacion): aquí no se crea,
+        # porque al borrar una habitación sus camas se eliminan antes que ella.
+        _sumar(CensoHabitacion, {'habitacion_id': habitacion_id}, deltas)
+        if habitacion_id in departamentos:
+            por_departamento[departamentos[habitacion_id]].update(deltas)
+    for departamento, deltas in por_departamento.items():
+        _sumar(CensoDepartamento, {'departamento': departamento}, deltas, crear=True)
+
+
+def mover_habitacion(habitacion_id, departamento_antes, departamento_despues):
+    """La habitación cambió de departamento: sus camas cuentan en el nuevo."""
+    from .models import CensoDepartamento, CensoHabitacion  # importación local para evitar ciclo
+
+    if departamento_antes == departamento_despues:
+        return
+    censo = CensoHabitacion.objects.filter(habitacion_id=habitacion_id).values(*ESTADOS_CAMA).first()
+    if not censo:
+        return
+    _sumar(CensoDepartamento, {'departamento': departamento_antes}, {e: -n for e, n in censo.items()}, crear=True)
+    _sumar(CensoDepartamento, {'departamento': departamento_despues}, censo, crear=True)
+
+
+# --------------------------
+# Lectura
+# --------------------------
+def censo_departamento(departamento):
+    """Contadores del departamento ({estado: camas}), ceros si no tiene camas."""
+    from .models import CensoDepartamento  # importación local para evitar ciclo
+
+    fila = CensoDepartamento.objects.filter(departamento=departamento).values(*ESTADOS_CAMA).first()
+    return fila or dict.fromkeys(ESTADOS_CAMA, 0)
+
+
+def habitaciones_con_camas_libres(departamento):
+    """Habitaciones habilitadas del departamento con al menos una cama disponible (una consulta)."""
+    from .models import CensoHabitacion  # importación local para evitar ciclo
+
+    return CensoHabitacion.objects.filter(
+        habitacion__departamento=departamento,
+        habitacion__estado='disponible',
+        disponible__gt=0,
+    ).select_related('habitacion').order_by('habitacion__numero')
+
+
+# --------------------------
+# Tablero de camas en vivo (canal 'camas')
+# --------------------------
+# Al conectarse, cada puesto recibe una foto compacta de todas las camas y
+# después solo los eventos "cama" (estado nuevo) y "baja" (cama eliminada).
+# Cada evento trae el estado completo de la cama: aplicarlo dos veces no
+# cambia nada, así la foto y los eventos se pueden solapar sin problema.
+def datos_cama(cama):
+    habitacion = cama.habitacion
+    return {
+        "id": cama.id,
+        "codigo": cama.codigo,
+        "habitacion": habitacion.numero,
+        "departamento": habitacion.departamento,
+        "estado": cama.estado,
+    }
+
+
+def publicar_cama(datos):
+    publicar(CANAL_CAMAS, "cama", datos)
+
+
+def publicar_baja_cama(cama_id):
+    publicar(CANAL_CAMAS, "baja", {"id": cama_id})
+
+
+def foto_camas():
+    """
+    {"ultimo", "camas": [[id, codigo, habitación, departamento, estado]]} en
+    una consulta. `ultimo` se lee antes que las camas: los eventos posteriores
+    a la foto nunca se pierden, a lo sumo se repiten.
+    """
+    from .models import Cama  # importación local para evitar ciclo
+
+    ultimo = ultimo_evento(CANAL_CAMAS)
+    camas = Cama.objects.order_by('habitacion__departamento', 'habitacion__numero', 'codigo').values_list(
+        'id', 'codigo', 'habitacion__numero', 'habitacion__departamento', 'estado'
+    )
+    return {"ultimo": ultimo, "camas": [list(fila) for fila in camas]}
+
+
+# --------------------------
+# Reconstrucción
+# --------------------------
+def reconstruir():
+    """Recalcula todos los contadores con una consulta agrupada. Retorna {departamento: contadores}."""
+    from .models import Cama, CensoDepartamento, CensoHabitacion, Habitacion  # importación local para evitar ciclo
+
+    with transaction.atomic():
+        # Congela las camas mientras se cuenta: ningún cambio queda a medio contar
+        list(Cama.objects.select_for_update().values_list('id', flat=True))
+        filas = Habitacion.objects.annotate(**{
+            estado: Count('camas', filter=Q(camas__estado=estado)) for estado in ESTADOS_CAMA
+        }).values('id', 'departamento', *ESTADOS_CAMA)
+
+        habitaciones = []
+        departamentos = defaultdict(Counter)
+        for fila in filas:
+            contadores = {estado: fila[estado] for estado in ESTADOS_CAMA}
+            habitaciones.append(CensoHabitacion(habitacion_id=fila['id'], **contadores))
+            departamentos[fila['departamento']].update(contadores)
+
+        CensoHabitacion.objects.all().delete()
+        CensoDepartamento.objects.all().delete()
+        CensoHabitacion.objects.bulk_create(habitaciones, batch_size=1000)
+        CensoDepartamento.objects.bulk_create([
+            CensoDepartamento(departamento=departamento, **{e: contadores[e] for e in ESTADOS_CAMA})
+            for departamento, contadores in departamentos.items()
+        ])
+    return {departamento: dict(contadores) for departamento, contadores in departamentos.items()}
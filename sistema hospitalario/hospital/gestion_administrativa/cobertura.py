@@ -0,0 +1,184 @@
+# gestion_administrativa/cobertura.py
+
+# --------------------------
+# Cobertura de personal por hora (departamento y cargo)
+# --------------------------
+from collections import defaultdict
+from datetime import timedelta
+from itertools import accumulate
+
+from .turnos import FECHA_BASE_ROTACION, cargar_planes, semanas_del_rango
+from .utils import HORARIOS_POR_GRUPO
+
+MINUTOS_DIA = 24 * 60
+
+
+def _minutos(hora):
+    """'08:00' o time(8, 0) -> 480"""
+    if isinstance(hora, str):
+        h, m = hora.split(':')
+        return int(h) * 60 + int(m)
+    return hora.hour * 60 + hora.minute
+
+
+# HORARIOS_POR_GRUPO precompilado a minutos: {(cargo, grupo): [(inicio, fin), ...]}
+ROTACIONES_EN_MINUTOS = {
+    (cargo, grupo): [(_minutos(t['hora_inicio']), _minutos(t['hora_fin'])) for t in turnos]
+    for cargo, grupos in HORARIOS_POR_GRUPO.items()
+    for grupo, turnos in grupos.items()
+}
+
+
+def _info_fechas(desde, dias):
+    """
+    Para cada día: (fecha, minuto de inicio relativo a desde, semana de rotación, índice 0-6).
+    Misma regla de semanas que turnos.semana_rotacion / turnos.es_dia_descanso
+    (incluido el plan de descansos del planificador).
+    """
+    info = []
+    for d in range(dias):
+        fecha = desde + timedelta(days=d)
+        idx = fecha.day - 1
+        semana = (fecha.replace(day=1) - FECHA_BASE_ROTACION).days // 7 + idx // 7
+        info.append((fecha, d * MINUTOS_DIA, semana, idx % 7))
+    return info
+
+
+def _info_rango(desde, dias):
+    """
+    _info_fechas desde la víspera: el día -1 queda con inicio negativo y solo
+    aporta la parte de sus turnos nocturnos posterior a medianoche.
+    """
+    return [
+        (fecha, inicio - MINUTOS_DIA, semana, idx)
+        for fecha, inicio, semana, idx in _info_fechas(desde - timedelta(days=1), dias + 1)
+    ]
+
+
+def _sumar_turnos(dif, emp_id, rotacion, turnos_emp, planes, info_fechas, total_minutos):
+    """Suma +1 al inicio y -1 al fin de cada turno del empleado en el arreglo de diferencias dif."""
+    total_horas = len(dif) - 1
+    for fecha, inicio_dia, semana, idx in info_fechas:
+        turno = turnos_emp.get(fecha)
+        if turno is None:
+            if not rotacion:
+                continue
+            plan = planes.get((emp_id, semana))
+            dia_descanso, desfase = plan if plan is not None else ((emp_id + semana) % 7, 0)
+            if idx == dia_descanso:
+                continue
+            turno = rotacion[(semana + desfase) % len(rotacion)]
+
+        inicio, fin = turno
+        if fin <= inicio:
+            fin += MINUTOS_DIA  # cruza la medianoche
+        inicio += inicio_dia
+        fin += inicio_dia
+        if fin <= 0 or inicio >= total_minutos:
+            continue
+
+        dif[max(inicio, 0) // 60] += 1
+        dif[min(-(-fin // 60), total_horas)] -= 1
+
+
+def calcular_cobertura(desde, hasta, departamento=None, cargo=None):
+    """
+    Personal en turno por hora entre desde y hasta (incluidos), agrupado por
+    departamento y cargo. Combina turnos manuales (TurnoEmpleado) y la rotación
+    de HORARIOS_POR_GRUPO; los turnos nocturnos (23:00-07:00) se parten entre
+    los dos días.
+
+    Cada turno suma +1 en su hora de inicio y -1 en su hora de fin sobre un
+    arreglo de diferencias; una suma acumulada da el personal por hora.
+
+    Retorna {departamento: {cargo: [personal en la hora 0, 1, ...]}}.
+    """
+    from .models import Empleado, TurnoEmpleado, PlanDescanso  # importación local para evitar ciclo
+
+    dias = (hasta - desde).days + 1
+    total_horas = dias * 24
+    total_minutos = dias * MINUTOS_DIA
+
+    empleados = Empleado.objects.filter(estado='Activo')
+    turnos = TurnoEmpleado.objects.filter(
+        empleado__estado='Activo',
+        # Un día antes: los turnos nocturnos de la víspera terminan dentro del rango
+        fecha__range=(desde - timedelta(days=1), hasta)
+    )
+    planes = PlanDescanso.objects.filter(
+        empleado__estado='Activo',
+        semana__in=semanas_del_rango(desde - timedelta(days=1), hasta)
+    )
+    if departamento:
+        empleados = empleados.filter(departamento=departamento)
+        turnos = turnos.filter(empleado__departamento=departamento)
+        planes = planes.filter(empleado__departamento=departamento)
+    if cargo:
+        empleados = empleados.filter(cargo=cargo)
+        turnos = turnos.filter(empleado__cargo=cargo)
+        planes = planes.filter(empleado__cargo=cargo)
+
+    manuales = defaultdict(dict)
+    for emp_id, fecha, hora_inicio, hora_fin in turnos.values_list('empleado_id', 'fecha', 'hora_inicio', 'hora_fin'):
+        manuales[emp_id][fecha] = (_minutos(hora_inicio), _minutos(hora_fin))
+
+    # {(empleado_id, semana): (dia_descanso, desfase)} del planificador
+    planes = {
+        (emp_id, semana): (dia, desfase)
+        for emp_id, semana, dia, desfase in planes.values_list('empleado_id', 'semana', 'dia_descanso', 'desfase')
+    }
+
+    info_fechas = _info_rango(desde, dias)
+
+    diferencias = {}
+    for emp_id, emp_cargo, emp_dep, emp_grupo in empleados.values_list('id', 'cargo', 'departamento', 'grupo_cargo'):
+        rotacion = ROTACIONES_EN_MINUTOS.get((emp_cargo, emp_grupo))
+        turnos_emp = manuales.get(emp_id, {})
+        if not rotacion and not turnos_emp:
+            continue
+
+        clave = (emp_dep, emp_cargo)
+        if clave not in diferencias:
+            diferencias[clave] = [0] * (total_horas + 1)
+        _sumar_turnos(diferencias[clave], emp_id, rotacion, turnos_emp, planes, info_fechas, total_minutos)
+
+    cobertura = {}
+    for (dep, emp_cargo), dif in diferencias.items():
+        cobertura.setdefault(dep or "Sin departamento", {})[emp_cargo] = list(accumulate(dif))[:total_horas]
+    return cobertura
+
+
+def aporte_empleado(empleado, desde, hasta):
+    """
+    Personal por hora que aporta un solo empleado entre desde y hasta (misma
+    regla que calcular_cobertura). Sirve para actualizar la cobertura en caché
+    restando el aporte anterior y sumando el nuevo, sin recalcular todo.
+    """
+    from .models import TurnoEmpleado  # importación local para evitar ciclo
+
+    dias = (hasta - desde).days + 1
+    total_horas = dias * 24
+    if empleado.estado != 'Activo':
+        return [0] * total_horas
+
+    turnos_emp = {
+        fecha: (_minutos(hora_inicio), _minutos(hora_fin))
+        for fecha, hora_inicio, hora_fin in TurnoEmpleado.objects.filter(
+            empleado_id=empleado.id,
+            fecha__range=(desde - timedelta(days=1), hasta)
+        ).values_list('fecha', 'hora_inicio', 'hora_fin')
+    }
+    rotacion = ROTACIONES_EN_MINUTOS.get((empleado.cargo, empleado.grupo_cargo))
+    dif = [0] * (total_horas + 1)
+    if rotacion or turnos_emp:
+        planes = cargar_planes([empleado.id], desde - timedelta(days=1), hasta)
+        _sumar_turnos(dif, empleado.id, rotacion, turnos_emp, planes, _info_rango(desde, dias), dias * MINUTOS_DIA)
+    return list(accumulate(dif))[:total_horas]
+
+
+def personal_en_turno(departamento, cargo, momento):
+    """¿Cuántos <cargo> hay de turno en <departamento> a la hora de <momento> (datetime)?"""
+    fecha = momento.date()
+    cobertura = calcular_cobertura(fecha, fecha, departamento=departamento, cargo=cargo)
+    serie = cobertura.get(departamento, {}).get(cargo)
+    return serie[momento.hour] if serie else 0
@@ -0,0 +1,341 @@
+# gestion_administrativa/colas.py
+
+# --------------------------
+# Colas de espera en memoria (un heap por doctor)
+# --------------------------
+# La base de datos sigue siendo la fuente de verdad (Cita.estado = "en_espera").
+# Cada proceso mantiene en memoria un heap por doctor ordenado por
+# (prioridad, hora, id), actualizado por las señales de Cita al confirmar la
+# transacción. Una versión global en la base (Secuencia "colas") detecta
+# cambios hechos por otros procesos: si no coincide, el proceso reconstruye
+# sus colas con UNA consulta. Cada lectura cuesta solo leer esa fila, y no
+# depende de que la caché sea compartida (LocMemCache es por proceso). La
+# primera lectura tras arrancar también reconstruye.
+# Lecturas y cambios pasan por el mismo candado del servicio: ColaDoctor no
+# es segura entre hilos (el heap se poda y la lista se memoriza al leer).
+import heapq
+import json
+import threading
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .eventos import publicar
+from .utils import avanzar_secuencia, leer_secuencia
+
+SECUENCIA_COLAS = 'colas'
+CANAL_COLAS = 'colas'
+
+# Evento publicado según el estado al que pasa la cita
+EVENTOS_POR_ESTADO = {
+    "en_espera": "checkin",
+    "en_progreso": "llamado",  # comenzar_cita llama al paciente y empieza la consulta
+    "atendida": "fin",
+}
+
+DoctorCola = namedtuple('DoctorCola', ['id', 'nombre', 'apellido'])
+EntradaCola = namedtuple(
+    'EntradaCola',
+    ['id', 'paciente', 'fecha', 'hora', 'prioridad', 'numero_atencion', 'estado', 'doctor'],
+)
+
+
+def _orden(entrada):
+    return (entrada.prioridad, entrada.hora, entrada.id)
+
+
+class ColaDoctor:
+    """
+    Heap con borrado perezoso: quitar es O(1) y las entradas muertas se
+    descartan al llegar a la cima. La lista ordenada se memoriza hasta el
+    próximo cambio. Solo se usa bajo el candado de ServicioColas.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.vivas = {}  # cita_id -> EntradaCola
+        self._lista = None
+
+    def __len__(self):
+        return len(self.vivas)
+
+    def agregar(self, entrada):
+        self.vivas[entrada.id] = entrada
+        heapq.heappush(self.heap, (_orden(entrada), entrada.id))
+        self._lista = None
+
+    def quitar(self, cita_id):
+        if self.vivas.pop(cita_id, None) is not None:
+            self._lista = None
+
+    def siguiente(self):
+        """Próximo paciente en O(log n) amortizado."""
+        while self.heap:
+            orden, cita_id = self.heap[0]
+            entrada = self.vivas.get(cita_id)
+            if entrada is not None and _orden(entrada) == orden:
+                return entrada
+            heapq.heappop(self.heap)  # quitada o reencolada con otra prioridad
+        return None
+
+    def lista(self):
+        if self._lista is None:
+            self._lista = sorted(self.vivas.values(), key=_orden)
+        return self._lista
+
+
+class ServicioColas:
+    def __init__(self):
+        self._colas = {}
+        self._version = None
+        self._lock = threading.RLock()  # reentrante: las lecturas reconstruyen con el candado tomado
+        self._por_numero = None
+
+    # --- Sincronización con la base de datos ---
+    def _version_compartida(self):
+        return leer_secuencia(SECUENCIA_COLAS)
+
+    def reconstruir(self):
+        """Carga todas las citas en espera en una sola consulta."""
+        from .models import Cita  # importación local para evitar ciclo
+
+        with self._lock:
+            version = self._version_compartida()
+            colas = {}
+            for cita in Cita.objects.filter(estado="en_espera").select_related('doctor'):
+                colas.setdefault(cita.doctor_id, ColaDoctor()).agregar(entrada_de_cita(cita))
+            self._colas = colas
+            self._por_numero = None
+            self._version = version
+
+    def _al_dia(self):
+        """Llamar con el candado tomado."""
+        if self._version != self._version_compartida():
+            self.reconstruir()
+
+    def aplicar(self, *citas):
+        """Refleja en memoria el estado ya confirmado de una o varias citas (una sola versión nueva)."""
+        with self._lock:
+            version = avanzar_secuencia(SECUENCIA_COLAS)
+            if self._version != version - 1:
+                # Otro proceso cambió algo que este no vio: reconstruir al leer
+                self._version = None
+                return
+
+            for cita in citas:
+                for cola in self._colas.values():
+                    cola.quitar(cita.id)
+                if cita.estado == "en_espera":
+                    self._colas.setdefault(cita.doctor_id, ColaDoctor()).agregar(entrada_de_cita(cita))
+            self._por_numero = None
+            self._version = version
+
+    def quitar(self, cita_id):
+        """Una cita borrada deja la cola (no hace falta releerla)."""
+        from .models import Cita  # importación local para evitar ciclo
+
+        self.aplicar(Cita(id=cita_id, estado="eliminada"))
+
+    # --- Lecturas (no consultan la base de datos) ---
+    def cola(self, doctor_id):
+        """Citas en espera del doctor, ordenadas por (prioridad, hora)."""
+        with self._lock:
+            self._al_dia()
+            cola = self._colas.get(doctor_id)
+            return cola.lista() if cola else []
+
+    def siguiente(self, doctor_id):
+        with self._lock:
+            self._al_dia()
+            cola = self._colas.get(doctor_id)
+            return cola.siguiente() if cola else None
+
+    def _por_doctor(self):
+        """Llamar con el candado tomado."""
+        colas = {}
+        for cola in self._colas.values():
+            lista = cola.lista()
+            if lista:
+                colas[lista[0].doctor] = lista
+        return colas
+
+    def colas_por_doctor(self):
+        """{DoctorCola: [EntradaCola, ...]} de los doctores con pacientes en espera."""
+        with self._lock:
+            self._al_dia()
+            return self._por_doctor()
+
+    def version_y_colas(self):
+        """(versión, colas_por_doctor) consistentes entre sí (para ETag)."""
+        while True:
+            with self._lock:
+                self._al_dia()
+                if self._version is not None:
+                    return self._version, self._por_doctor()
+
+    def todas_por_numero(self):
+        """Todas las citas en espera ordenadas por número de atención (tablero)."""
+        with self._lock:
+            self._al_dia()
+            if self._por_numero is None:
+                self._por_numero = sorted(
+                    (e for cola in self._colas.values() for e in cola.lista()),
+                    key=lambda e: e.numero_atencion or ""
+                )
+            return self._por_numero
+
+
+def entrada_de_cita(cita):
+    doctor = cita.doctor
+    return EntradaCola(
+        id=cita.id,
+        paciente=cita.paciente,
+        fecha=cita.fecha,
+        hora=cita.hora,
+        prioridad=cita.prioridad,
+        numero_atencion=cita.numero_atencion,
+        estado=cita.estado,
+        doctor=DoctorCola(doctor.id, doctor.nombre, doctor.apellido),
+    )
+
+
+# Una instancia por proceso
+colas = ServicioColas()
+
+
+# --------------------------
+# Instantánea JSON de todas las colas (una por versión)
+# --------------------------
+TIEMPO_INSTANTANEA = 60 * 60  # 1 hora
+
+
+def instantanea():
+    """
+    (versión, JSON) con las colas de todos los doctores. El JSON se serializa
+    una sola vez por versión y se comparte entre procesos en la caché.
+    """
+    version, por_doctor = colas.version_y_colas()
+    clave = f"colas:instantanea:{version}"
+    contenido = cache.get(clave)
+    if contenido is None:
+        contenido = json.dumps({
+            "version": version,
+            "colas": [
+                {
+                    "doctor": doctor._asdict(),
+                    "citas": [
+                        {
+                            "id": c.id,
+                            "numero_atencion": c.numero_atencion,
+                            "paciente": c.paciente,
+                            "fecha": c.fecha,
+                            "hora": c.hora,
+                            "prioridad": c.prioridad,
+                        }
+                        for c in citas
+                    ],
+                }
+                for doctor, citas in sorted(por_doctor.items(), key=lambda par: (par[0].nombre, par[0].id))
+            ],
+        }, cls=DjangoJSONEncoder)
+        cache.set(clave, contenido, TIEMPO_INSTANTANEA)
+    return version, contenido
+
+
+# --------------------------
+# Eventos para los tableros (canal "colas")
+# --------------------------
+def datos_evento(cita):
+    return {
+        "id": cita.id,
+        "numero_atencion": cita.numero_atencion,
+        "paciente": cita.paciente,
+        "hora": cita.hora.strftime("%H:%M") if cita.hora else "",
+        "doctor_id": cita.doctor_id,
+        "doctor": cita.doctor.nombre,
+    }
+
+
+def _tipo_evento(cita, estado_anterior):
+    if cita.estado in EVENTOS_POR_ESTADO and cita.estado != estado_anterior:
+        return EVENTOS_POR_ESTADO[cita.estado]
+    if cita.estado == "en_espera":
+        return "actualizada"  # cambió la prioridad, la hora o el número
+    if estado_anterior == "en_espera":
+        return "salida"  # cancelada o devuelta a pendiente
+    return None
+
+
+def cambio_de_cita(cita, estado_anterior):
+    """Aplica un cambio confirmado de una cita a las colas y lo publica para los tableros."""
+    cambios_de_citas([cita], estado_anterior)
+
+
+def cambios_de_citas(citas, estado_anterior):
+    """Como cambio_de_cita para varias citas que venían del mismo estado (bulk_update no dispara señales)."""
+    afectadas = citas if estado_anterior == "en_espera" else [c for c in citas if c.estado == "en_espera"]
+    if afectadas:
+        colas.aplicar(*afectadas)
+    for cita in citas:
+        tipo = _tipo_evento(cita, estado_anterior)
+        if tipo:
+            publicar(CANAL_COLAS, tipo, datos_evento(cita))
+
+
+def baja_de_cita(cita_id, estado_anterior):
+    if estado_anterior == "en_espera":
+        colas.quitar(cita_id)
+        publicar(CANAL_COLAS, "salida", {"id": cita_id})
+
+
+# --------------------------
+# Check-in en lote (kioscos, pre-registro de la mañana)
+# --------------------------
+MAX_CHECKIN_LOTE = 200
+
+
+def checkin_en_lote(ids):
+    """
+    Hace check-in de varias citas en una transacción: valida estados, reserva
+    los números de atención de cada departamento en un solo UPDATE y guarda
+    todo con bulk_update. Los números se asignan en el orden de ids.
+    Retorna (asignados [{id, numero_atencion, doctor_id}], errores [{id, error}]).
+    """
+    from django.db import transaction
+    from .models import Cita  # importación local para evitar ciclo
+    from .utils import formatear_numero_atencion, reservar_numeros_atencion
+
+    ids = list(dict.fromkeys(ids))
+    errores = []
+    with transaction.atomic():
+        encontradas = Cita.objects.select_for_update().select_related('doctor').in_bulk(ids)
+
+        por_departamento = {}
+        for cita_id in ids:
+            cita = encontradas.get(cita_id)
+            if cita is None:
+                errores.append({"id": cita_id, "error": "La cita no existe."})
+            elif cita.estado != "pendiente":
+                errores.append({"id": cita_id, "error": "La cita ya no puede hacer check-in."})
+            else:
+                por_departamento.setdefault(cita.doctor.departamento or "General", []).append(cita)
+
+        for departamento, citas in por_departamento.items():
+            ultimo = reservar_numeros_atencion(departamento, len(citas))
+            for consecutivo, cita in enumerate(citas, start=ultimo - len(citas) + 1):
+                cita.numero_atencion = formatear_numero_atencion(departamento, consecutivo)
+                cita.estado = "en_espera"
+
+        validas = [c for citas in por_departamento.values() for c in citas]
+        Cita.objects.bulk_update(validas, ["numero_atencion", "estado"], batch_size=MAX_CHECKIN_LOTE)
+        for cita in validas:
+            cita._estado_cargado = cita.estado
+        transaction.on_commit(lambda: cambios_de_citas(validas, "pendiente"))
+
+    orden = {cita_id: i for i, cita_id in enumerate(ids)}
+    asignados = [
+        {"id": c.id, "numero_atencion": c.numero_atencion, "doctor_id": c.doctor_id}
+        for c in sorted(validas, key=lambda c: orden[c.id])
+    ]
+    return asignados, errores
@@ -0,0 +1,129 @@
+# gestion_administrativa/difusion.py
+
+# --------------------------
+# Difusión de eventos a conexiones abiertas (SSE / long-poll, ASGI)
+# --------------------------
+# Un solo lector por proceso (y por event loop) consulta el registro de
+# eventos en la base y reparte cada evento a todas las conexiones suscritas:
+# 50 tableros abiertos cuestan una lectura por intervalo, no 50.
+import asyncio
+import json
+import weakref
+
+from asgiref.sync import sync_to_async
+
+from .eventos import eventos_desde, ultimo_evento
+
+INTERVALO_LECTURA = 1.0  # segundos entre lecturas del canal
+MAX_PENDIENTES = 200  # eventos sin leer por conexión antes de pedirle recargar
+LATIDO = 15  # segundos sin eventos antes de enviar un comentario (mantiene viva la conexión)
+
+RECARGAR = {"id": None, "tipo": "recargar", "datos": {}}
+
+_eventos_desde = sync_to_async(eventos_desde, thread_sensitive=False)
+_ultimo_evento = sync_to_async(ultimo_evento, thread_sensitive=False)
+
+
+class Difusor:
+    def __init__(self, canal):
+        self.canal = canal
+        self.suscriptores = set()
+        self.ultimo = 0
+        self._tarea = None
+
+    async def suscribir(self):
+        cola = asyncio.Queue(maxsize=MAX_PENDIENTES)
+        if self._tarea is None:
+            # Arranca desde el último evento: cada conexión se pone al día por su cuenta
+            ultimo = await _ultimo_evento(self.canal)
+            if self._tarea is None:
+                self.ultimo = ultimo
+                self._tarea = asyncio.create_task(self._leer())
+        self.suscriptores.add(cola)
+        return cola
+
+    def desuscribir(self, cola):
+        self.suscriptores.discard(cola)
+
+    def _repartir(self, evento):
+        for cola in list(self.suscriptores):
+            try:
+                cola.put_nowait(evento)
+            except asyncio.QueueFull:
+                # Conexión demasiado lenta: se le pide recargar y deja de recibir
+                cola.get_nowait()
+                cola.put_nowait(RECARGAR)
+                self.suscriptores.discard(cola)
+
+    async def _leer(self):
+        try:
+            while self.suscriptores:
+                await asyncio.sleep(INTERVALO_LECTURA)
+                ultimo, eventos, recargar = await _eventos_desde(self.canal, self.ultimo)
+                self.ultimo = ultimo
+                if recargar:
+                    self._repartir(RECARGAR)
+                for evento in eventos:
+                    self._repartir(evento)
+        finally:
+            self._tarea = None
+
+
+# Un difusor por (event loop, canal): bajo ASGI hay un único loop por proceso
+_difusores = weakref.WeakKeyDictionary()
+
+
+def difusor(canal):
+    por_canal = _difusores.setdefault(asyncio.get_running_loop(), {})
+    if canal not in por_canal:
+        por_canal[canal] = Difusor(canal)
+    return por_canal[canal]
+
+
+def formato_sse(evento):
+    datos = json.dumps(evento["datos"], ensure_ascii=False)
+    identificador = f"id: {evento['id']}\n" if evento["id"] is not None else ""
+    return f"{identificador}event: {evento['tipo']}\ndata: {datos}\n\n"
+
+
+async def eventos_en_vivo(canal, ultimo):
+    """
+    Genera los eventos del canal posteriores a `ultimo`: primero los que el
+    cliente se perdió (reconexión con Last-Event-ID) y luego los nuevos a
+    medida que el difusor los reparte. Un evento "recargar" cierra el flujo.
+    None = latido (sin eventos durante LATIDO segundos).
+    """
+    d = difusor(canal)
+    cola = await d.suscribir()  # antes de ponerse al día: no se pierde nada entre medio
+    try:
+        enviado, eventos, recargar = await _eventos_desde(canal, ultimo)
+        if recargar:
+            yield RECARGAR
+            return
+        for evento in eventos:
+            yield evento
+
+        while True:
+            try:
+                evento = await asyncio.wait_for(cola.get(), LATIDO)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if evento["id"] is None:
+                yield evento
+                return
+            if evento["id"] <= enviado:
+                continue  # ya entregado al ponerse al día
+            if evento["id"] > enviado + 1:
+                # Hueco entre la puesta al día y el difusor: pedir lo que falta
+                _, faltan, recargar = await _eventos_desde(canal, enviado)
+                if recargar:
+                    yield RECARGAR
+                    return
+                for anterior in faltan:
+                    if anterior["id"] < evento["id"]:
+                        yield anterior
+            enviado = evento["id"]
+            yield evento
+    finally:
+        d.desuscribir(cola)
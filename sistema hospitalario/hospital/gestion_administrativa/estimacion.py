@@ -0,0 +1,199 @@
+# gestion_administrativa/estimacion.py
+
+# --------------------------
+# Estimación de tiempos de espera por doctor
+# --------------------------
+# Por doctor y por hora del día se mantienen en caché estadísticas de la
+# duración de las consultas (hora_fin - hora_inicio), actualizadas de forma
+# incremental cada vez que una cita pasa a "atendida":
+#   - media móvil exponencial (EWMA)
+#   - mediana y percentil 90 con el algoritmo P² (5 marcadores por cuantil)
+# El historial solo se lee una vez por doctor si la caché está vacía.
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache_turnos import parchar
+
+ALFA_EWMA = 0.2
+DURACION_DEFECTO = 20  # minutos, mientras no haya historial
+DURACION_MAXIMA = 240  # minutos; más que esto es una cita que no se cerró a tiempo
+MIN_MUESTRAS_HORA = 5  # por debajo se usan las estadísticas generales del doctor
+HISTORIAL_INICIAL = 500  # consultas leídas al reconstruir
+TOTAL = 'total'
+
+
+# --------------------------
+# Cuantiles P² (Jain y Chlamtac): O(1) memoria por cuantil
+# --------------------------
+def _p2_agregar(estado, p, x):
+    q = estado.setdefault('q', [])
+    if len(q) < 5:
+        q.append(x)
+        q.sort()
+        if len(q) == 5:
+            estado['n'] = [0, 1, 2, 3, 4]
+            estado['np'] = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        return
+
+    n, np_ = estado['n'], estado['np']
+    if x < q[0]:
+        q[0] = x
+        k = 0
+    elif x >= q[4]:
+        q[4] = x
+        k = 3
+    else:
+        k = max(i for i in range(4) if q[i] <= x)
+    for i in range(k + 1, 5):
+        n[i] += 1
+    for i, dn in enumerate((0, p / 2, p, (1 + p) / 2, 1)):
+        np_[i] += dn
+
+    # Ajustar los marcadores intermedios (parabólico o, si se sale de orden, lineal)
+    for i in (1, 2, 3):
+        d = np_[i] - n[i]
+        if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+            d = 1 if d > 0 else -1
+            qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+            )
+            if not q[i - 1] < qp < q[i + 1]:
+                qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+            q[i] = qp
+            n[i] += d
+
+
+def _p2_valor(estado, p):
+    q = estado.get('q', [])
+    if not q:
+        return None
+    if len(q) < 5:
+        return q[min(int(p * len(q)), len(q) - 1)]
+    return q[2]
+
+
+def _nueva():
+    return {'n': 0, 'ewma': None, 'p50': {}, 'p90': {}}
+
+
+def _agregar(est, minutos):
+    est['n'] += 1
+    est['ewma'] = minutos if est['ewma'] is None else ALFA_EWMA * minutos + (1 - ALFA_EWMA) * est['ewma']
+    _p2_agregar(est['p50'], 0.5, minutos)
+    _p2_agregar(est['p90'], 0.9, minutos)
+
+
+def resumen(est):
+    """{'n', 'promedio', 'mediana', 'p90'} en minutos."""
+    return {
+        'n': est['n'],
+        'promedio': est['ewma'],
+        'mediana': _p2_valor(est['p50'], 0.5),
+        'p90': _p2_valor(est['p90'], 0.9),
+    }
+
+
+# --------------------------
+# Estadísticas por doctor (en caché)
+# --------------------------
+def _clave(doctor_id):
+    return f"estimacion:doctor:{doctor_id}"
+
+
+def _duracion(hora_inicio, hora_fin):
+    """Minutos de consulta, o None si el dato no sirve."""
+    if not hora_inicio or not hora_fin:
+        return None
+    minutos = (hora_fin - hora_inicio).total_seconds() / 60
+    return minutos if 0 < minutos <= DURACION_MAXIMA else None
+
+
+def _registrar(stats, hora_inicio, minutos):
+    _agregar(stats.setdefault(TOTAL, _nueva()), minutos)
+    _agregar(stats.setdefault(timezone.localtime(hora_inicio).hour, _nueva()), minutos)
+
+
+def reconstruir_estadisticas(doctor_id):
+    """Recalcula las estadísticas del doctor con sus últimas consultas atendidas."""
+    from .models import Cita  # importación local para evitar ciclo
+
+    historial = Cita.objects.filter(
+        doctor_id=doctor_id,
+        estado='atendida',
+        hora_inicio__isnull=False,
+        hora_fin__isnull=False
+    ).order_by('-hora_fin').values_list('hora_inicio', 'hora_fin')[:HISTORIAL_INICIAL]
+
+    stats = {}
+    for hora_inicio, hora_fin in reversed(list(historial)):
+        minutos = _duracion(hora_inicio, hora_fin)
+        if minutos is not None:
+            _registrar(stats, hora_inicio, minutos)
+    cache.set(_clave(doctor_id), stats, None)
+    return stats
+
+
+def estadisticas_doctor(doctor_id):
+    stats = cache.get(_clave(doctor_id))
+    return reconstruir_estadisticas(doctor_id) if stats is None else stats
+
+
+def registrar_consulta(cita):
+    """Suma una consulta terminada (la llama la señal de Cita al pasar a "atendida")."""
+    minutos = _duracion(cita.hora_inicio, cita.hora_fin)
+    if minutos is None:
+        return
+    clave = _clave(cita.doctor_id)
+    if cache.get(clave) is None:
+        reconstruir_estadisticas(cita.doctor_id)  # ya incluye esta consulta
+        return
+    # Dos consultas del mismo doctor a la vez: la entrada se descarta y se reconstruye al leerla
+    parchar(clave, lambda stats: _registrar(stats, cita.hora_inicio, minutos), None)
+
+
+# --------------------------
+# Predicción
+# --------------------------
+def duracion_esperada(stats, hora):
+    """(promedio, p90) en minutos para una consulta que empieza a esa hora."""
+    est = stats.get(hora)
+    if est is None or est['n'] < MIN_MUESTRAS_HORA:
+        est = stats.get(TOTAL)
+    if est is None or not est['n']:
+        return DURACION_DEFECTO, DURACION_DEFECTO
+    datos = resumen(est)
+    return datos['promedio'], max(datos['p90'], datos['promedio'])
+
+
+def esperas_cola(doctor_id, posiciones, ahora=None):
+    """
+    Espera estimada (minutos, minutos con p90) para cada posición 0..posiciones
+    de la cola del doctor: lo que le falta a la consulta en curso más la
+    duración esperada de cada paciente anterior, según la hora a la que le
+    tocaría empezar.
+    """
+    from .models import Cita  # importación local para evitar ciclo
+
+    ahora = ahora or timezone.now()
+    stats = estadisticas_doctor(doctor_id)
+
+    espera = espera_p90 = 0
+    inicio_actual = Cita.objects.filter(
+        doctor_id=doctor_id, estado='en_progreso', hora_inicio__isnull=False
+    ).order_by('hora_inicio').values_list('hora_inicio', flat=True).first()
+    if inicio_actual:
+        promedio, p90 = duracion_esperada(stats, timezone.localtime(inicio_actual).hour)
+        transcurrido = (ahora - inicio_actual).total_seconds() / 60
+        espera = max(promedio - transcurrido, 0)
+        espera_p90 = max(p90 - transcurrido, 0)
+
+    esperas = []
+    for _ in range(posiciones + 1):
+        esperas.append((round(espera), round(espera_p90)))
+        promedio, p90 = duracion_esperada(stats, timezone.localtime(ahora + timedelta(minutes=espera)).hour)
+        espera += promedio
+        espera_p90 += p90
+    return esperas
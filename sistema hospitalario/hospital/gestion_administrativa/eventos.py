@@ -0,0 +1,67 @@
+# gestion_administrativa/eventos.py
+
+# --------------------------
+# Registro de eventos (cambios para páginas abiertas)
+# --------------------------
+# Los eventos se guardan en la base (EventoTablero), no en la caché: con
+# LocMemCache cada worker tendría su propio registro y un tablero conectado
+# a otro proceso nunca los vería. El número de cada evento sale de una
+# Secuencia por canal; su fila queda bloqueada hasta que el evento se
+# confirma, así los números se confirman en orden y sin huecos.
+from django.db import transaction
+
+from .utils import avanzar_secuencia, leer_secuencia
+
+EVENTOS_RETENIDOS = 500
+PODA_CADA = 100  # cada cuántos eventos se borran los que ya no se retienen
+
+
+def _secuencia(canal):
+    return f"eventos:{canal}"
+
+
+def ultimo_evento(canal):
+    """Número del último evento publicado en el canal (0 si no hay)."""
+    return leer_secuencia(_secuencia(canal))
+
+
+def publicar(canal, tipo, datos):
+    """
+    Agrega un evento {id, tipo, datos} al canal. Los ids son consecutivos por
+    canal, así cada cliente pide solo lo que le falta.
+    """
+    from .models import EventoTablero  # importación local para evitar ciclo
+
+    with transaction.atomic():
+        numero = avanzar_secuencia(_secuencia(canal))
+        EventoTablero.objects.create(canal=canal, numero=numero, tipo=tipo, datos=datos)
+    if numero % PODA_CADA == 0:
+        EventoTablero.objects.filter(canal=canal, numero__lte=numero - EVENTOS_RETENIDOS).delete()
+    return numero
+
+
+def eventos_desde(canal, ultimo):
+    """
+    Eventos del canal con id > ultimo.
+    Retorna (último id entregado, eventos, recargar): recargar=True si el
+    cliente se perdió eventos (muy atrasado o registro reiniciado) y debe
+    volver a cargar la página completa.
+    """
+    from .models import EventoTablero  # importación local para evitar ciclo
+
+    actual = ultimo_evento(canal)
+    if ultimo > actual or actual - ultimo > EVENTOS_RETENIDOS:
+        return actual, [], True
+    if ultimo == actual:
+        return actual, [], False
+
+    eventos = [
+        {"id": numero, "tipo": tipo, "datos": datos}
+        for numero, tipo, datos in EventoTablero.objects.filter(
+            canal=canal, numero__gt=ultimo, numero__lte=actual
+        ).order_by('numero').values_list('numero', 'tipo', 'datos')
+    ]
+    # Un número que falta ya fue podado: el cliente se lo perdió
+    if [e["id"] for e in eventos] != list(range(ultimo + 1, actual + 1)):
+        return actual, [], True
+    return actual, eventos, False
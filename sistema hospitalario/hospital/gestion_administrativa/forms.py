@@ -13,9 +13,13 @@ from .models import (
     TurnoEmpleado,
     Habitacion,
     Cama,
+    CensoHabitacion,
     DEPARTAMENTOS
 )
 
+# Agenda de horarios libres
+from .agenda import MINUTOS_BLOQUE, horario_ocupado, horario_sugerido, olvidar
+
 # Modelos de otras apps
 from gestion_administrativa.models import Empleado  # Para citas
 from gestion_pacientes.models import Paciente
@@ -60,11 +64,20 @@ class TurnoEmpleadoForm(forms.ModelForm):
 
     def clean(self):
         cleaned_data = super().clean()
+        empleado = cleaned_data.get("empleado")
+        fecha = cleaned_data.get("fecha")
         hora_inicio = cleaned_data.get("hora_inicio")
         hora_fin = cleaned_data.get("hora_fin")
 
-        if hora_inicio and hora_fin and hora_fin <= hora_inicio:
-            raise ValidationError("La hora de fin debe ser mayor que la hora de inicio.")
+        # hora_fin < hora_inicio es un turno nocturno (ej: 23:00-07:00, termina al día siguiente)
+        if hora_inicio and hora_fin and hora_fin == hora_inicio:
+            raise ValidationError("La hora de inicio y la de fin no pueden ser iguales.")
+
+        if empleado and fecha and hora_inicio and hora_fin:
+            from .intervalos import validar_turno  # importación local para evitar ciclo
+            error = validar_turno(empleado, fecha, hora_inicio, hora_fin, excluir_id=self.instance.pk)
+            if error:
+                raise ValidationError(error)
 
         return cleaned_data
 
@@ -88,7 +101,7 @@ class CitaForm(forms.ModelForm):
         fields = ['paciente', 'doctor', 'fecha', 'hora', 'estado']
         widgets = {
             'fecha': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d'),
-            'hora': forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}, format='%H:%M'),
+            'hora': forms.TimeInput(attrs={'type': 'time', 'step': MINUTOS_BLOQUE * 60, 'class': 'form-control'}, format='%H:%M'),
             'paciente': forms.TextInput(attrs={'class': 'form-control'}),
             'doctor': forms.Select(attrs={'class': 'form-control'}),
             'estado': forms.Select(attrs={'class': 'form-control'}),
@@ -99,6 +112,37 @@ class CitaForm(forms.ModelForm):
         if self.instance and self.instance.pk:
             self.fields['fecha'].initial = self.instance.fecha
             self.fields['hora'].initial = self.instance.hora
+        self.sugerencia = None
+
+    def clean_hora(self):
+        hora = self.cleaned_data['hora']
+        # Las citas ocupan bloques de 15 minutos (el mismo que usa la agenda)
+        if (hora.minute % MINUTOS_BLOQUE or hora.second) and hora != self.instance.hora:
+            raise ValidationError(f"La hora debe ser múltiplo de {MINUTOS_BLOQUE} minutos (ej: 08:00, 08:15).")
+        return hora
+
+    def clean(self):
+        datos = super().clean()
+        doctor, fecha, hora = datos.get('doctor'), datos.get('fecha'), datos.get('hora')
+        if doctor and fecha and hora and datos.get('estado') != 'cancelada':
+            propia = self.instance._reserva_cargada if self.instance.pk else None
+            if horario_ocupado(doctor, fecha, hora, propia):
+                self.horario_ocupado()
+        return datos
+
+    def horario_ocupado(self, refrescar=False):
+        """
+        Marca el horario como tomado y sugiere el próximo libre del mismo doctor.
+        refrescar=True cuando lo rechazó la base: la caché no sabía de esa cita.
+        """
+        doctor, fecha, hora = (self.cleaned_data[k] for k in ('doctor', 'fecha', 'hora'))
+        if refrescar:
+            olvidar(doctor.id, fecha)
+        mensaje = f"{doctor.nombre} {doctor.apellido or ''} ya tiene una cita el {fecha:%d/%m/%Y} a las {hora:%H:%M}."
+        self.sugerencia = horario_sugerido(doctor, fecha, hora)
+        if self.sugerencia:
+            mensaje += f" Próximo horario libre: {self.sugerencia[0]:%d/%m/%Y} {self.sugerencia[1]:%H:%M}."
+        self.add_error('hora', mensaje)
 
 
 # ------------------------------
@@ -131,7 +175,11 @@ class CamaForm(forms.ModelForm):
         habitacion = cleaned_data.get("habitacion")
 
         if habitacion:
-            total_camas = habitacion.camas.count()
+            # Total de camas desde el censo; la cama que se edita sin cambiar de habitación no cuenta
+            censo = CensoHabitacion.objects.filter(habitacion=habitacion).first()
+            total_camas = censo.total if censo else 0
+            if self.instance.pk and self.instance.habitacion_id == habitacion.id:
+                total_camas -= 1
             if total_camas >= habitacion.capacidad:
                 raise forms.ValidationError(
                     f"⚠️ La habitación {habitacion.numero} ya tiene el máximo ({habitacion.capacidad}) de camas."
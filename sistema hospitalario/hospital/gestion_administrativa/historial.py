@@ -0,0 +1,80 @@
+# gestion_administrativa/historial.py
+
+# --------------------------
+# Historial de citas: vigentes (Cita) + archivadas (CitaHistorica)
+# --------------------------
+# Las páginas se piden por clave (fecha, hora, id) en orden descendente, no
+# por OFFSET: "dame las 50 siguientes a esta cita". Con los índices
+# compuestos de ambas tablas cada página cuesta lo mismo sin importar
+# cuántos años de historial haya detrás.
+from datetime import date, time
+
+from django.db.models import Count, Q, Sum
+
+TAMANO_PAGINA = 50
+ORDEN = ('-fecha', '-hora', '-id')
+
+
+def cursor_de(cita):
+    return f"{cita.fecha.isoformat()}_{cita.hora.strftime('%H:%M:%S')}_{cita.id}"
+
+
+def leer_cursor(texto):
+    """(fecha, hora, id) del parámetro de la URL, o None si no viene o no sirve."""
+    try:
+        fecha, hora, cita_id = texto.split('_')
+        return date.fromisoformat(fecha), time.fromisoformat(hora), int(cita_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _despues_de(qs, cursor):
+    fecha, hora, cita_id = cursor
+    # fecha__lte acota el rango del índice; el Q desempata dentro del mismo día
+    return qs.filter(fecha__lte=fecha).filter(
+        Q(fecha__lt=fecha) | Q(hora__lt=hora) | Q(hora=hora, id__lt=cita_id)
+    )
+
+
+def pagina_citas(filtros, cursor=None, tamano=TAMANO_PAGINA):
+    """
+    Citas vigentes y archivadas que cumplen `filtros`, de la más reciente a la
+    más antigua, a partir de `cursor`. Una consulta por tabla.
+    Retorna (citas, cursor de la página siguiente o None).
+    """
+    from .models import Cita, CitaHistorica  # importación local para evitar ciclo
+
+    filas = []
+    for modelo in (Cita, CitaHistorica):
+        qs = modelo.objects.filter(**filtros).select_related('doctor').order_by(*ORDEN)
+        if cursor:
+            qs = _despues_de(qs, cursor)
+        filas.extend(qs[:tamano + 1])
+
+    filas.sort(key=lambda c: (c.fecha, c.hora, c.id), reverse=True)
+    pagina = filas[:tamano]
+    siguiente = cursor_de(pagina[-1]) if len(filas) > tamano else None
+    return pagina, siguiente
+
+
+def atendidas_por_doctor():
+    """
+    {doctor_id: (citas atendidas, promedio de calificación o None)} contando
+    también las archivadas. Una consulta agrupada por tabla.
+    """
+    from .models import Cita, CitaHistorica  # importación local para evitar ciclo
+
+    totales = {}
+    for modelo in (Cita, CitaHistorica):
+        filas = modelo.objects.filter(estado='atendida').values('doctor_id').annotate(
+            n=Count('id'), calificadas=Count('calificacion'), suma=Sum('calificacion')
+        )
+        for fila in filas:
+            t = totales.setdefault(fila['doctor_id'], [0, 0, 0])
+            t[0] += fila['n']
+            t[1] += fila['calificadas']
+            t[2] += fila['suma'] or 0
+    return {
+        doctor_id: (n, suma / calificadas if calificadas else None)
+        for doctor_id, (n, calificadas, suma) in totales.items()
+    }
@@ -0,0 +1,173 @@
+# gestion_administrativa/ical.py
+
+# --------------------------
+# Feeds iCalendar (.ics) de turnos
+# --------------------------
+import hashlib
+from datetime import date, timedelta
+
+from django.core import signing
+
+from .cache_turnos import ultimo_cambio, version_calendario
+from .turnos import a_hora, cargar_planes, intervalo_turno, turno_rotado_del_dia
+from .utils import avanzar_secuencia, leer_secuencia
+
+DIAS_ATRAS_ICAL = 31
+DIAS_ADELANTE_ICAL = 92
+EMPLEADOS_POR_LOTE_ICAL = 200
+SALT_ICAL = 'gestion_administrativa.ical'
+
+
+# --------------------------
+# Tokens para suscribirse sin sesión (apps de calendario del celular)
+# --------------------------
+# Cada token lleva una clave que se puede rotar: la del empleado
+# (Empleado.clave_ical) o la revisión del (departamento, grupo) en Secuencia.
+# Rotarla invalida los enlaces ya entregados (comando rotar_tokens_ical).
+def _secuencia_grupo(departamento, grupo):
+    return "ical:" + hashlib.md5(f"{departamento}|{grupo}".encode("utf-8")).hexdigest()
+
+
+def _partes_empleado(empleado):
+    return ['empleado', empleado.id, empleado.clave_ical]
+
+
+def _partes_grupo(departamento, grupo):
+    return ['grupo', departamento, grupo, leer_secuencia(_secuencia_grupo(departamento, grupo))]
+
+
+def _token(partes):
+    return signing.dumps([str(p) for p in partes], salt=SALT_ICAL, compress=True)
+
+
+def _token_valido(token, partes):
+    try:
+        return signing.loads(token, salt=SALT_ICAL) == [str(p) for p in partes]
+    except signing.BadSignature:
+        return False
+
+
+def token_ical_empleado(empleado):
+    return _token(_partes_empleado(empleado))
+
+
+def token_ical_empleado_valido(token, empleado):
+    return _token_valido(token, _partes_empleado(empleado))
+
+
+def token_ical_grupo(departamento, grupo):
+    return _token(_partes_grupo(departamento, grupo))
+
+
+def token_ical_grupo_valido(token, departamento, grupo):
+    return _token_valido(token, _partes_grupo(departamento, grupo))
+
+
+def rotar_token_empleado(empleado):
+    """Nueva clave iCal del empleado (sin señales: no cambia nada de sus turnos)."""
+    from .models import Empleado, nueva_clave_ical  # importación local para evitar ciclo
+
+    empleado.clave_ical = nueva_clave_ical()
+    Empleado.objects.filter(pk=empleado.pk).update(clave_ical=empleado.clave_ical)
+
+
+def rotar_token_grupo(departamento, grupo):
+    avanzar_secuencia(_secuencia_grupo(departamento, grupo))
+
+
+# --------------------------
+# Rango y validación condicional (ETag / Last-Modified)
+# --------------------------
+def rango_ical(hoy=None):
+    """Ventana del feed: un mes hacia atrás y un trimestre hacia adelante."""
+    hoy = hoy or date.today()
+    return hoy - timedelta(days=DIAS_ATRAS_ICAL), hoy + timedelta(days=DIAS_ADELANTE_ICAL)
+
+
+def etag_ical(grupos, desde, hasta):
+    """
+    ETag a partir de la versión y el último cambio de cada (departamento, grupo)
+    del feed, más la ventana de fechas (que avanza cada día).
+    """
+    partes = [desde.isoformat(), hasta.isoformat()]
+    for dep, grupo in sorted(grupos, key=lambda g: (str(g[0]), str(g[1]))):
+        partes.append(f"{dep}|{grupo}|{version_calendario(dep, grupo)}|{ultimo_cambio(dep, grupo).timestamp()}")
+    return hashlib.md5("#".join(partes).encode("utf-8")).hexdigest()
+
+
+def ultima_modificacion_ical(grupos):
+    return max(ultimo_cambio(dep, grupo) for dep, grupo in grupos)
+
+
+# --------------------------
+# Generación en streaming
+# --------------------------
+def _escapar(texto):
+    return str(texto).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _evento(empleado, fecha, hora_inicio, hora_fin, manual, sello):
+    inicio, fin = intervalo_turno(fecha, hora_inicio, hora_fin)
+    resumen = f"Turno {empleado.nombre} {empleado.apellido}".strip()
+    descripcion = f"{empleado.cargo} - {empleado.departamento or 'Sin departamento'} - {empleado.grupo_cargo or 'Sin grupo'}"
+    if manual:
+        descripcion += " (Manual)"
+    return (
+        "BEGIN:VEVENT\r\n"
+        f"UID:turno-{empleado.id}-{fecha:%Y%m%d}@hospital-villa-carmen\r\n"
+        f"DTSTAMP:{sello}\r\n"
+        f"DTSTART:{inicio:%Y%m%dT%H%M%S}\r\n"
+        f"DTEND:{fin:%Y%m%dT%H%M%S}\r\n"
+        f"SUMMARY:{_escapar(resumen)}\r\n"
+        f"DESCRIPTION:{_escapar(descripcion)}\r\n"
+        "END:VEVENT\r\n"
+    )
+
+
+def generar_ical(empleados, desde, hasta, nombre, sello):
+    """
+    Genera el .ics por partes (para StreamingHttpResponse): cabecera, un bloque
+    de eventos por cada lote de empleados y cierre. Los turnos manuales de cada
+    lote se leen en una sola consulta; el resto sale de la rotación.
+    """
+    from .models import TurnoEmpleado  # importación local para evitar ciclo
+
+    sello = f"{sello:%Y%m%dT%H%M%SZ}"
+    yield (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        "PRODID:-//Hospital Villa Carmen//Turnos//ES\r\n"
+        "CALSCALE:GREGORIAN\r\n"
+        f"X-WR-CALNAME:{_escapar(nombre)}\r\n"
+    )
+
+    empleados = list(empleados)
+    dias = (hasta - desde).days + 1
+    fechas = [desde + timedelta(days=i) for i in range(dias)]
+
+    for i in range(0, len(empleados), EMPLEADOS_POR_LOTE_ICAL):
+        lote = empleados[i:i + EMPLEADOS_POR_LOTE_ICAL]
+        manuales = {}
+        for t in TurnoEmpleado.objects.filter(
+            empleado_id__in=[emp.id for emp in lote],
+            fecha__range=(desde, hasta)
+        ):
+            manuales[(t.empleado_id, t.fecha)] = t
+        planes = cargar_planes([emp.id for emp in lote], desde, hasta)
+
+        bloque = []
+        for emp in lote:
+            for fecha in fechas:
+                t = manuales.get((emp.id, fecha))
+                if t is not None:
+                    bloque.append(_evento(emp, fecha, t.hora_inicio, t.hora_fin, True, sello))
+                    continue
+
+                turno = turno_rotado_del_dia(emp, fecha, planes)
+                if turno:
+                    bloque.append(_evento(
+                        emp, fecha, a_hora(turno['hora_inicio']), a_hora(turno['hora_fin']), False, sello
+                    ))
+        yield "".join(bloque)
+
+    yield "END:VCALENDAR\r\n"
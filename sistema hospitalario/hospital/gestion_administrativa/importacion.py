@@ -0,0 +1,190 @@
+# gestion_administrativa/importacion.py
+
+# --------------------------
+# Alta masiva de empleados (CSV / XLSX)
+# --------------------------
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .turnos import turnos_iniciales
+from .utils import DEPARTAMENTOS
+
+COLUMNAS_EMPLEADOS = ['nombre', 'apellido', 'cargo', 'departamento', 'telefono', 'estado', 'grupo_cargo', 'username', 'password']
+TAMANO_LOTE_EMPLEADOS = 500
+HASHES_POR_TAREA = 16
+
+
+# --------------------------
+# Lectura en streaming
+# --------------------------
+def leer_filas(archivo, nombre):
+    """
+    Genera (número de línea, {columna: valor}) sin cargar el archivo completo.
+    Acepta .csv (UTF-8) y .xlsx (requiere openpyxl).
+    """
+    if nombre.lower().endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Para importar archivos .xlsx instala openpyxl.")
+        hoja = load_workbook(archivo, read_only=True, data_only=True).active
+        filas = hoja.iter_rows(values_only=True)
+        encabezados = [str(c or '').strip().lower() for c in next(filas, [])]
+        for n, valores in enumerate(filas, start=2):
+            if any(v not in (None, '') for v in valores):
+                yield n, {k: '' if v is None else str(v).strip() for k, v in zip(encabezados, valores)}
+    elif nombre.lower().endswith('.csv'):
+        # Los archivos subidos (UploadedFile) exponen el binario real en .file
+        texto = io.TextIOWrapper(getattr(archivo, 'file', archivo), encoding='utf-8-sig', newline='')
+        lector = csv.DictReader(texto)
+        lector.fieldnames = [c.strip().lower() for c in lector.fieldnames or []]
+        for n, registro in enumerate(lector, start=2):
+            yield n, {k: (v or '').strip() for k, v in registro.items() if k}
+    else:
+        raise ValueError("Formato no soportado: usa .csv o .xlsx")
+
+
+def validar_fila(registro, usernames_vistos):
+    """Retorna (datos limpios, lista de errores) de una fila del archivo."""
+    from .models import Empleado  # importación local para evitar ciclo
+
+    errores = []
+    datos = {c: registro.get(c, '') for c in COLUMNAS_EMPLEADOS}
+
+    for campo in ('nombre', 'cargo', 'username', 'password'):
+        if not datos[campo]:
+            errores.append(f"Falta '{campo}'.")
+    if datos['cargo'] and datos['cargo'] not in dict(Empleado.CARGOS):
+        errores.append(f"Cargo inválido: {datos['cargo']}.")
+    if datos['departamento'] and datos['departamento'] not in dict(DEPARTAMENTOS):
+        errores.append(f"Departamento inválido: {datos['departamento']}.")
+    if datos['grupo_cargo'] and datos['grupo_cargo'] not in dict(Empleado.GRUPOS):
+        errores.append(f"Grupo inválido: {datos['grupo_cargo']}.")
+    datos['estado'] = datos['estado'] or 'Activo'
+    if datos['estado'] not in dict(Empleado.ESTADOS):
+        errores.append(f"Estado inválido: {datos['estado']}.")
+    if datos['username']:
+        if datos['username'] in usernames_vistos:
+            errores.append(f"Usuario repetido en el archivo: {datos['username']}.")
+        usernames_vistos.add(datos['username'])
+    return datos, errores
+
+
+def _usernames_existentes(usernames):
+    from .models import Usuario  # importación local para evitar ciclo
+
+    return set(Usuario.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+
+# --------------------------
+# Importación
+# --------------------------
+def importar_empleados(filas, procesos=None, dry_run=False, progreso=None):
+    """
+    Importa empleados (y sus usuarios) desde filas de leer_filas().
+
+    1. Valida cada fila al leerla; los usuarios ya existentes se consultan por lotes.
+    2. Calcula los hashes de contraseña en un pool de procesos (PBKDF2 es lo caro).
+    3. En una transacción: bulk_create de Usuario, Empleado y turnos iniciales.
+
+    progreso(etapa, hechos, total) se llama a medida que avanza.
+    Retorna {'total', 'validas', 'creados', 'errores': [(línea, mensaje)]}.
+    """
+    from .models import Empleado, Usuario, TurnoEmpleado  # importación local para evitar ciclo
+    from .cache_turnos import invalidar_grupo
+
+    progreso = progreso or (lambda etapa, hechos, total: None)
+    errores = []
+    validas = []
+    pendientes = []
+    vistos = set()
+    total = 0
+
+    def revisar_pendientes():
+        existentes = _usernames_existentes([d['username'] for _, d in pendientes])
+        for n, datos in pendientes:
+            if datos['username'] in existentes:
+                errores.append((n, f"El usuario {datos['username']} ya existe."))
+            else:
+                validas.append((n, datos))
+        pendientes.clear()
+
+    for n, registro in filas:
+        total += 1
+        datos, errores_fila = validar_fila(registro, vistos)
+        if errores_fila:
+            errores.append((n, " ".join(errores_fila)))
+            continue
+        pendientes.append((n, datos))
+        if len(pendientes) >= TAMANO_LOTE_EMPLEADOS:
+            revisar_pendientes()
+            progreso('validacion', total, None)
+    revisar_pendientes()
+    progreso('validacion', total, total)
+
+    errores.sort()
+    if dry_run or not validas:
+        return {'total': total, 'validas': len(validas), 'creados': 0, 'errores': errores}
+
+    # Hashes en paralelo (make_password genera una sal distinta por contraseña)
+    contrasenas = [datos['password'] for _, datos in validas]
+    hashes = []
+    if procesos == 1 or len(contrasenas) < HASHES_POR_TAREA:
+        for i, c in enumerate(contrasenas, start=1):
+            hashes.append(make_password(c))
+            if i % HASHES_POR_TAREA == 0:
+                progreso('contrasenas', i, len(contrasenas))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            for i, h in enumerate(pool.map(make_password, contrasenas, chunksize=HASHES_POR_TAREA), start=1):
+                hashes.append(h)
+                if i % HASHES_POR_TAREA == 0:
+                    progreso('contrasenas', i, len(contrasenas))
+    progreso('contrasenas', len(hashes), len(contrasenas))
+
+    with transaction.atomic():
+        Usuario.objects.bulk_create([
+            Usuario(username=datos['username'], password=h, cargo=datos['cargo'])
+            for (_, datos), h in zip(validas, hashes)
+        ], batch_size=TAMANO_LOTE_EMPLEADOS)
+
+        # MySQL no devuelve los ids de bulk_create: se releen por username
+        ids_usuario = {}
+        usernames = [datos['username'] for _, datos in validas]
+        for i in range(0, len(usernames), TAMANO_LOTE_EMPLEADOS):
+            ids_usuario.update(Usuario.objects.filter(
+                username__in=usernames[i:i + TAMANO_LOTE_EMPLEADOS]
+            ).values_list('username', 'id'))
+
+        Empleado.objects.bulk_create([
+            Empleado(
+                nombre=datos['nombre'],
+                apellido=datos['apellido'],
+                cargo=datos['cargo'],
+                departamento=datos['departamento'] or None,
+                telefono=datos['telefono'] or None,
+                estado=datos['estado'],
+                grupo_cargo=datos['grupo_cargo'] or None,
+                usuario_id=ids_usuario[datos['username']],
+            )
+            for _, datos in validas
+        ], batch_size=TAMANO_LOTE_EMPLEADOS)
+        progreso('empleados', len(validas), len(validas))
+
+        # bulk_create no dispara post_save: los turnos iniciales se insertan aquí
+        empleados = []
+        ids = list(ids_usuario.values())
+        for i in range(0, len(ids), TAMANO_LOTE_EMPLEADOS):
+            empleados.extend(Empleado.objects.filter(usuario_id__in=ids[i:i + TAMANO_LOTE_EMPLEADOS]))
+        turnos = [t for emp in empleados for t in turnos_iniciales(emp)]
+        TurnoEmpleado.objects.bulk_create(turnos, batch_size=1000, ignore_conflicts=True)
+        progreso('turnos', len(turnos), len(turnos))
+
+    for dep, grupo in {(e.departamento, e.grupo_cargo) for e in empleados}:
+        invalidar_grupo(dep, grupo)
+
+    return {'total': total, 'validas': len(validas), 'creados': len(validas), 'errores': errores}
@@ -0,0 +1,176 @@
+# gestion_administrativa/intervalos.py
+
+# --------------------------
+# Índice de intervalos de turnos (superposición y descanso mínimo)
+# --------------------------
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from .turnos import intervalo_turno
+
+DESCANSO_MINIMO = timedelta(hours=8)
+EMPLEADOS_POR_CONSULTA = 500
+
+
+class IndiceTurnos:
+    """
+    Turnos de un empleado como intervalos datetime ordenados por inicio.
+    Como los turnos válidos no se superponen, basta comparar con el vecino
+    anterior y el siguiente (bisect): O(log n) por validación.
+    """
+
+    def __init__(self):
+        self.inicios = []
+        self.fines = []
+        self.fechas = []
+        self.por_fecha = {}  # fecha -> inicio (un turno por empleado y fecha)
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def agregar(self, fecha, inicio, fin):
+        """Agrega (o reemplaza) el turno de la fecha."""
+        self.quitar(fecha)
+        i = bisect_right(self.inicios, inicio)
+        self.inicios.insert(i, inicio)
+        self.fines.insert(i, fin)
+        self.fechas.insert(i, fecha)
+        self.por_fecha[fecha] = inicio
+
+    def quitar(self, fecha):
+        inicio = self.por_fecha.pop(fecha, None)
+        if inicio is None:
+            return
+        i = bisect_left(self.inicios, inicio)
+        while self.fechas[i] != fecha:
+            i += 1
+        del self.inicios[i], self.fines[i], self.fechas[i]
+
+    def conflicto(self, fecha, inicio, fin, descanso=DESCANSO_MINIMO):
+        """
+        Mensaje de error si el turno (inicio, fin) se superpone o deja menos de
+        <descanso> con sus vecinos; None si es válido. El turno que ya exista
+        en la misma fecha no cuenta (se va a reemplazar).
+        """
+        i = bisect_left(self.inicios, inicio)
+
+        # Vecino anterior (saltando el turno de la misma fecha)
+        j = i - 1
+        if j >= 0 and self.fechas[j] == fecha:
+            j -= 1
+        if j >= 0:
+            error = _comparar(self.fechas[j], self.inicios[j], self.fines[j], inicio, descanso)
+            if error:
+                return error
+
+        # Vecino siguiente
+        k = i
+        while k < len(self.inicios) and self.fechas[k] == fecha:
+            k += 1
+        if k < len(self.inicios):
+            error = _comparar(fecha, inicio, fin, self.inicios[k], descanso, otro=(self.fechas[k], self.inicios[k], self.fines[k]))
+            if error:
+                return error
+        return None
+
+
+def _describir(fecha, inicio, fin):
+    return f"{fecha:%d/%m/%Y} ({inicio:%H:%M}-{fin:%H:%M})"
+
+
+def _comparar(fecha, inicio, fin, siguiente_inicio, descanso, otro=None):
+    """Compara un turno con el que empieza después; otro es el turno a nombrar en el mensaje."""
+    if otro is None:
+        otro = (fecha, inicio, fin)
+    if siguiente_inicio < fin:
+        return f"Se superpone con el turno del {_describir(*otro)}."
+    if siguiente_inicio - fin < descanso:
+        horas = descanso.total_seconds() / 3600
+        return f"Debe haber al menos {horas:g} h de descanso respecto al turno del {_describir(*otro)}."
+    return None
+
+
+# --------------------------
+# Construcción de índices desde la base de datos
+# --------------------------
+def cargar_indices(empleados, desde, hasta, excluir_id=None):
+    """
+    Índices {empleado_id: IndiceTurnos} con los TurnoEmpleado guardados del
+    rango, una consulta por cada bloque de empleados. Los turnos que solo
+    salen de la rotación no cuentan: en un cambio de rotación dejarían 0 h de
+    descanso con un turno que nadie cargó y bloquearían cualquier turno nuevo.
+    """
+    from .models import TurnoEmpleado  # importación local para evitar ciclo
+
+    empleados = list(empleados)
+    indices = {}
+
+    for b in range(0, len(empleados), EMPLEADOS_POR_CONSULTA):
+        bloque = empleados[b:b + EMPLEADOS_POR_CONSULTA]
+        ids = [emp.id for emp in bloque]
+        for emp_id in ids:
+            indices[emp_id] = IndiceTurnos()
+
+        turnos = TurnoEmpleado.objects.filter(empleado_id__in=ids, fecha__range=(desde, hasta))
+        if excluir_id:
+            turnos = turnos.exclude(id=excluir_id)
+        for emp_id, fecha, hi, hf in turnos.values_list('empleado_id', 'fecha', 'hora_inicio', 'hora_fin'):
+            indices[emp_id].agregar(fecha, *intervalo_turno(fecha, hi, hf))
+    return indices
+
+
+# --------------------------
+# Validación (formulario e importación masiva)
+# --------------------------
+def validar_turno(empleado, fecha, hora_inicio, hora_fin, excluir_id=None, descanso=DESCANSO_MINIMO):
+    """Valida un turno contra los turnos vecinos del empleado. Retorna el error o None."""
+    indice = cargar_indices(
+        [empleado], fecha - timedelta(days=2), fecha + timedelta(days=2), excluir_id=excluir_id
+    )[empleado.id]
+    inicio, fin = intervalo_turno(fecha, hora_inicio, hora_fin)
+    return indice.conflicto(fecha, inicio, fin, descanso)
+
+
+def validar_lote(filas, descanso=DESCANSO_MINIMO):
+    """
+    Valida una importación masiva de turnos: filas con atributos empleado_id,
+    fecha, hora_inicio, hora_fin (p. ej. TurnoEmpleado sin guardar).
+
+    Cada fila se compara contra la base de datos y contra las filas válidas
+    anteriores del mismo lote; una fila de una fecha ya cargada la reemplaza.
+    Retorna (validas, errores) con errores = [(fila, mensaje)].
+    """
+    from .models import Empleado  # importación local para evitar ciclo
+
+    filas = list(filas)
+    if not filas:
+        return [], []
+
+    errores = []
+    candidatas = []
+    for fila in filas:
+        if fila.hora_inicio == fila.hora_fin:
+            errores.append((fila, "La hora de inicio y la de fin no pueden ser iguales."))
+        else:
+            candidatas.append((fila, *intervalo_turno(fila.fecha, fila.hora_inicio, fila.hora_fin)))
+
+    desde = min(f.fecha for f in filas) - timedelta(days=1)
+    hasta = max(f.fecha for f in filas) + timedelta(days=1)
+    empleados = Empleado.objects.filter(id__in={f.empleado_id for f in filas})
+    indices = cargar_indices(empleados, desde, hasta)
+
+    validas = []
+    # Ordenadas por empleado e inicio: casi siempre se agrega al final del índice
+    candidatas.sort(key=lambda c: (c[0].empleado_id, c[0].fecha))
+    for fila, inicio, fin in candidatas:
+        indice = indices.get(fila.empleado_id)
+        if indice is None:
+            errores.append((fila, "Empleado no encontrado."))
+            continue
+        error = indice.conflicto(fila.fecha, inicio, fin, descanso)
+        if error:
+            errores.append((fila, error))
+        else:
+            indice.agregar(fila.fecha, inicio, fin)
+            validas.append(fila)
+    return validas, errores
@@ -0,0 +1,57 @@
+# gestion_administrativa/management/commands/archivar_citas.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from gestion_administrativa.models import Cita, CitaHistorica
+
+TAMANO_LOTE = 1000
+EN_CURSO = ['en_espera', 'en_progreso']  # siguen en las colas: nunca se archivan
+
+
+def inicio_de_mes(hoy, meses_atras):
+    total = hoy.year * 12 + hoy.month - 1 - meses_atras
+    anio, mes = divmod(total, 12)
+    return date(anio, mes + 1, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve a CitaHistorica las citas de meses completos anteriores a N meses. "
+        "Los historiales (lista_citas, pacientes_atendidos) las siguen mostrando."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=12, help="Meses de citas que se quedan en la tabla principal")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Citas movidas por transacción")
+        parser.add_argument('--dry-run', action='store_true', help="Solo contar, sin mover nada")
+
+    def handle(self, *args, **options):
+        if options['meses'] < 1 or options['lote'] < 1:
+            raise CommandError("--meses y --lote deben ser mayores que cero.")
+        limite = inicio_de_mes(timezone.localdate(), options['meses'])
+        pendientes = Cita.objects.filter(fecha__lt=limite).exclude(estado__in=EN_CURSO)
+
+        if options['dry_run']:
+            self.stdout.write(f"{pendientes.count()} citas anteriores a {limite} se archivarían.")
+            return
+
+        campos = [f.attname for f in CitaHistorica._meta.concrete_fields if f.name != 'archivada_en']
+        movidas = 0
+        while True:
+            # Lotes cortos: cada transacción bloquea pocas filas y el comando se
+            # puede cortar y volver a correr sin perder ni duplicar nada.
+            with transaction.atomic():
+                lote = list(pendientes.select_for_update().order_by('fecha', 'hora', 'id')[:options['lote']])
+                if not lote:
+                    break
+                CitaHistorica.objects.bulk_create([
+                    CitaHistorica(**{campo: getattr(cita, campo) for campo in campos}) for cita in lote
+                ])
+                Cita.objects.filter(id__in=[cita.id for cita in lote]).delete()
+            movidas += len(lote)
+            self.stdout.write(f"  {movidas} citas archivadas (hasta {lote[-1].fecha})")
+
+        self.stdout.write(self.style.SUCCESS(f"{movidas} citas anteriores a {limite} archivadas."))
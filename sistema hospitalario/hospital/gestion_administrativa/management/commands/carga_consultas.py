@@ -0,0 +1,509 @@
+# gestion_administrativa/management/commands/carga_consultas.py
+import http.cookiejar
+import json
+import queue
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, time as hora_del_dia, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, Q
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion_administrativa.censo import ESTADOS_CAMA
+from gestion_administrativa.models import (
+    AsignacionCama, Cama, CensoDepartamento, CensoHabitacion, Cita, Empleado, Habitacion, ListaEspera, Usuario,
+)
+from gestion_administrativa.utils import DEPARTAMENTOS
+from gestion_pacientes.models import Paciente
+
+PREFIJO = 'carga_'
+CONTRASENA = 'carga-1234'
+PASOS = ['checkin', 'siguiente', 'comenzar', 'atender', 'calificar']
+PASOS_RESERVAS = ['reservada', 'rechazada']
+PASOS_CAMAS = ['asignar', 'liberar', 'limpieza']
+DEPARTAMENTO_CARGA = 'Carga'  # departamento propio: no toca camas ni listas de espera reales
+CAMAS_POR_HABITACION = 4
+
+
+# --------------------------
+# Clientes: test client de Django (en proceso) o HTTP contra un servidor local
+# --------------------------
+class ClienteDjango:
+    """Client de Django en el hilo actual; cuenta las consultas SQL de cada petición."""
+
+    def __init__(self, usuario):
+        self.client = Client()
+        self.client.force_login(usuario)
+
+    def pedir(self, metodo, url, datos=None):
+        consultas = [0]
+
+        def contar(execute, sql, params, many, context):
+            consultas[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(contar):
+            respuesta = getattr(self.client, metodo)(url, datos or {})
+        contenido = b'' if respuesta.streaming else respuesta.content
+        return respuesta.status_code, contenido, consultas[0]
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ClienteHttp:
+    """Peticiones reales contra un servidor (runserver, gunicorn, uvicorn...). No cuenta consultas."""
+
+    def __init__(self, base, usuario):
+        self.base = base.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedirecciones
+        )
+        _, html, _ = self.pedir('get', reverse('login'))
+        token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', html)
+        estado, _, _ = self.pedir('post', reverse('login'), {
+            'username': usuario.username,
+            'password': CONTRASENA,
+            'csrfmiddlewaretoken': token.group(1).decode() if token else '',
+        })
+        if estado != 302:
+            raise CommandError(f"No se pudo iniciar sesión como {usuario.username} en {self.base}.")
+
+    def _csrf(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def pedir(self, metodo, url, datos=None):
+        cuerpo = urllib.parse.urlencode(datos or {}).encode() if metodo == 'post' else None
+        peticion = urllib.request.Request(self.base + url, data=cuerpo, method=metodo.upper())
+        if metodo == 'post':
+            peticion.add_header('X-CSRFToken', self._csrf())
+            peticion.add_header('Referer', self.base + url)
+        try:
+            with self.opener.open(peticion, timeout=30) as respuesta:
+                return respuesta.status, respuesta.read(), None
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), None
+
+
+# --------------------------
+# Métricas
+# --------------------------
+class Metricas:
+    def __init__(self, pasos=PASOS):
+        self.lock = threading.Lock()
+        self.datos = {paso: {'latencias': [], 'consultas': [], 'errores': 0} for paso in pasos}
+
+    def registrar(self, paso, segundos, consultas, error):
+        with self.lock:
+            d = self.datos[paso]
+            d['latencias'].append(segundos)
+            if consultas is not None:
+                d['consultas'].append(consultas)
+            d['errores'] += error
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0
+    return ordenados[min(int(p / 100 * len(ordenados)), len(ordenados) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga del flujo de consulta: check-in -> comenzar_cita -> "
+        "atender_siguiente -> calificar_cita. Crea sus propios datos (usuarios '"
+        + PREFIJO + "*') y reporta rendimiento, latencias p50/p95/p99 y consultas por petición. "
+        "Con --escenario reservas, varias recepcionistas agendan a la vez los mismos "
+        "horarios y se verifica que ninguno quede duplicado. Con --escenario camas, "
+        "asignan las mismas camas, las liberan y confirman su limpieza mientras la "
+        "lista de espera se reparte, y se verifica que ninguna cama ni paciente quede doble."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenario', choices=['consultas', 'reservas', 'camas'], default='consultas')
+        parser.add_argument('--doctores', type=int, default=10, help="Doctores atendiendo en paralelo (un hilo cada uno)")
+        parser.add_argument('--citas', type=int, default=20,
+                            help="Citas (o horarios a disputar) por doctor; con --escenario camas, camas en disputa")
+        parser.add_argument('--recepcionistas', type=int, default=4, help="Hilos haciendo check-in")
+        parser.add_argument('--url', help="Probar contra un servidor ya levantado (ej. http://127.0.0.1:8000) en vez del test client")
+        parser.add_argument('--conservar', action='store_true', help="No borrar los datos de prueba al terminar")
+        parser.add_argument('--forzar', action='store_true', help="Permitir correr contra una base que no parece de pruebas")
+
+    # --- Datos ---
+    def _verificar_base(self, forzar):
+        ajustes = connection.settings_dict
+        nombre = str(ajustes['NAME'])
+        de_prueba = ajustes['ENGINE'].endswith('sqlite3') or any(p in nombre for p in ('carga', 'test', 'prueba'))
+        if not de_prueba and not forzar:
+            raise CommandError(
+                f"La base '{nombre}' no parece de pruebas. Usa --settings=hospital.settings_carga, "
+                "una base MySQL local de pruebas o --forzar."
+            )
+
+    def _limpiar(self):
+        Cita.objects.filter(paciente__startswith=PREFIJO).delete()
+        Paciente.objects.filter(ci__startswith=PREFIJO).delete()  # con sus asignaciones y listas de espera
+        Habitacion.objects.filter(numero__startswith=PREFIJO).delete()  # con sus camas y su censo
+        CensoDepartamento.objects.filter(departamento=DEPARTAMENTO_CARGA).delete()
+        Empleado.objects.filter(usuario__username__startswith=PREFIJO).delete()
+        Usuario.objects.filter(username__startswith=PREFIJO).delete()
+
+    def _sembrar(self, n_doctores, n_citas, n_recepcionistas, con_citas=True):
+        self._limpiar()
+        clave = make_password(CONTRASENA)  # un solo hash para todos
+        departamentos = [d for d, _ in DEPARTAMENTOS]
+
+        doctores = []
+        for i in range(n_doctores):
+            usuario = Usuario.objects.create(username=f"{PREFIJO}medico_{i}", password=clave, cargo='Medico')
+            doctores.append(Empleado.objects.create(
+                nombre=f"Medico {i}", apellido="Carga", cargo='Medico',
+                departamento=departamentos[i % len(departamentos)], usuario=usuario
+            ))
+        recepcion = []
+        for i in range(n_recepcionistas):
+            usuario = Usuario.objects.create(username=f"{PREFIJO}recepcion_{i}", password=clave, cargo='Recepcionista')
+            Empleado.objects.create(
+                nombre=f"Recepcion {i}", apellido="Carga", cargo='Recepcionista',
+                departamento='Consulta Externa', usuario=usuario
+            )
+            recepcion.append(usuario)
+        if not con_citas:
+            return doctores, recepcion, []
+
+        hoy = timezone.localdate()
+        citas = [
+            Cita(
+                paciente=f"{PREFIJO}paciente_{d.id}_{j}", doctor=d, fecha=hoy,
+                hora=hora_del_dia(7 + (j // 4) % 12, (j % 4) * 15), prioridad=1 + j % 3
+            )
+            for d in doctores for j in range(n_citas)
+        ]
+        Cita.objects.bulk_create(citas, batch_size=500)
+        ids = list(Cita.objects.filter(paciente__startswith=PREFIJO).order_by('hora', 'id').values_list('id', flat=True))
+        return doctores, recepcion, ids
+
+    # --- Ejecución ---
+    def _cliente(self, usuario, url):
+        return ClienteHttp(url, usuario) if url else ClienteDjango(usuario)
+
+    def _medir(self, metricas, paso, cliente, metodo, url, datos=None):
+        inicio = time.perf_counter()
+        try:
+            estado, contenido, consultas = cliente.pedir(metodo, url, datos)
+            error = estado >= 400
+        except Exception:
+            estado, contenido, consultas, error = None, b'', None, True
+        metricas.registrar(paso, time.perf_counter() - inicio, consultas, error)
+        return estado, contenido
+
+    def _recepcionista(self, usuario, pendientes, metricas, url):
+        try:
+            cliente = self._cliente(usuario, url)
+            while True:
+                try:
+                    cita_id = pendientes.get_nowait()
+                except queue.Empty:
+                    return
+                self._medir(metricas, 'checkin', cliente, 'get', reverse('checkin_cita', args=[cita_id]))
+        finally:
+            connections.close_all()
+
+    def _doctor(self, doctor, total, metricas, url, limite, recepcion_terminada):
+        try:
+            cliente = self._cliente(doctor.usuario, url)
+            atendidas = 0
+            while atendidas < total and time.monotonic() < limite:
+                ultima_vuelta = recepcion_terminada.is_set()
+                # Próximo paciente: la instantánea de colas (la misma que usan los tableros)
+                estado, contenido = self._medir(metricas, 'siguiente', cliente, 'get', reverse('colas_snapshot'))
+                cita_id = None
+                if estado == 200:
+                    for cola in json.loads(contenido)['colas']:
+                        if cola['doctor']['id'] == doctor.id and cola['citas']:
+                            cita_id = cola['citas'][0]['id']
+                if cita_id is None:
+                    if ultima_vuelta:
+                        return  # check-in fallidos: esos pacientes nunca llegarán
+                    time.sleep(0.02)  # aún no llegan pacientes
+                    continue
+
+                self._medir(metricas, 'comenzar', cliente, 'get', reverse('comenzar_cita', args=[cita_id]))
+                self._medir(metricas, 'atender', cliente, 'post', reverse('atender_siguiente', args=[doctor.id]))
+                self._medir(metricas, 'calificar', cliente, 'post', reverse('calificar_cita', args=[cita_id]),
+                            {'calificacion': 5})
+                atendidas += 1
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        self._verificar_base(options['forzar'])
+        if options['escenario'] == 'reservas':
+            return self._reservas(options)
+        if options['escenario'] == 'camas':
+            return self._camas(options)
+        url = options['url']
+        n_doctores, n_citas = options['doctores'], options['citas']
+
+        self.stdout.write("Sembrando datos de prueba...")
+        doctores, recepcion, ids = self._sembrar(n_doctores, n_citas, options['recepcionistas'])
+        self.stdout.write(f"{len(doctores)} doctores, {len(recepcion)} recepcionistas, {len(ids)} citas.")
+
+        pendientes = queue.Queue()
+        for cita_id in ids:
+            pendientes.put(cita_id)
+        metricas = Metricas()
+        limite = time.monotonic() + 600  # tope de 10 minutos por si algo se traba
+        recepcion_terminada = threading.Event()
+
+        recepcionistas = [
+            threading.Thread(target=self._recepcionista, args=(u, pendientes, metricas, url))
+            for u in recepcion
+        ]
+        medicos = [
+            threading.Thread(target=self._doctor, args=(d, n_citas, metricas, url, limite, recepcion_terminada))
+            for d in doctores
+        ]
+        inicio = time.perf_counter()
+        for h in recepcionistas + medicos:
+            h.start()
+        for h in recepcionistas:
+            h.join()
+        recepcion_terminada.set()
+        for h in medicos:
+            h.join()
+        duracion = time.perf_counter() - inicio
+
+        self._reporte(metricas, duracion, contar_consultas=not url)
+        atendidas = Cita.objects.filter(paciente__startswith=PREFIJO, estado='atendida').count()
+        estilo = self.style.SUCCESS if atendidas == len(ids) else self.style.WARNING
+        self.stdout.write(estilo(f"{atendidas}/{len(ids)} citas atendidas en {duracion:.2f} s."))
+
+        if not options['conservar']:
+            self._limpiar()
+
+    # --- Escenario de reservas concurrentes ---
+    def _reservador(self, usuario, numero, horarios, metricas, url):
+        """Intenta agendar todos los horarios, en otro orden que las demás recepcionistas."""
+        try:
+            cliente = self._cliente(usuario, url)
+            horarios = list(horarios)
+            random.Random(numero).shuffle(horarios)
+            for k, (doctor, fecha, hora) in enumerate(horarios):
+                datos = {
+                    'paciente': f"{PREFIJO}reserva_{numero}_{k}", 'doctor': doctor.id,
+                    'fecha': fecha.isoformat(), 'hora': hora.strftime('%H:%M'), 'estado': 'pendiente',
+                }
+                inicio = time.perf_counter()
+                try:
+                    estado, _, consultas = cliente.pedir('post', reverse('crear_cita'), datos)
+                except Exception:
+                    estado, consultas = None, None
+                # 302 = agendada; 200 = el formulario la rechazó por horario ocupado
+                paso = 'reservada' if estado == 302 else 'rechazada'
+                error = estado not in (200, 302)
+                metricas.registrar(paso, time.perf_counter() - inicio, consultas, error)
+        finally:
+            connections.close_all()
+
+    def _reservas(self, options):
+        url = options['url']
+        self.stdout.write("Sembrando datos de prueba...")
+        doctores, recepcion, _ = self._sembrar(
+            options['doctores'], 0, options['recepcionistas'], con_citas=False
+        )
+        # Todos los horarios de mañana desde las 08:00 (dentro del turno por defecto)
+        manana = timezone.localdate() + timedelta(days=1)
+        n_horarios = min(options['citas'], 32)
+        horarios = [
+            (d, manana, hora_del_dia(8 + j // 4, (j % 4) * 15))
+            for d in doctores for j in range(n_horarios)
+        ]
+        self.stdout.write(
+            f"{len(recepcion)} recepcionistas disputando {len(horarios)} horarios "
+            f"({len(doctores)} doctores)."
+        )
+
+        metricas = Metricas(PASOS_RESERVAS)
+        hilos = [
+            threading.Thread(target=self._reservador, args=(u, i, horarios, metricas, url))
+            for i, u in enumerate(recepcion)
+        ]
+        inicio = time.perf_counter()
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        duracion = time.perf_counter() - inicio
+
+        self._reporte(metricas, duracion, contar_consultas=not url, pasos=PASOS_RESERVAS)
+        citas = Cita.objects.filter(paciente__startswith=PREFIJO).exclude(estado='cancelada')
+        duplicados = (
+            citas.values('doctor_id', 'fecha', 'hora').annotate(n=Count('id')).filter(n__gt=1).count()
+        )
+        agendadas = citas.count()
+        bien = duplicados == 0 and agendadas == len(horarios)
+        estilo = self.style.SUCCESS if bien else self.style.ERROR
+        self.stdout.write(estilo(
+            f"{agendadas}/{len(horarios)} horarios agendados, {duplicados} duplicados, "
+            f"en {duracion:.2f} s."
+        ))
+
+        if not options['conservar']:
+            self._limpiar()
+
+    # --- Escenario de camas concurrentes ---
+    def _sembrar_camas(self, n_camas, n_pacientes):
+        # Uno por uno: habitaciones y camas entran al censo por sus señales, como en producción
+        for k in range(n_camas):
+            if k % CAMAS_POR_HABITACION == 0:
+                habitacion = Habitacion.objects.create(
+                    numero=f"{PREFIJO}{k // CAMAS_POR_HABITACION:02d}", departamento=DEPARTAMENTO_CARGA,
+                    tipo='Carga', capacidad=CAMAS_POR_HABITACION,
+                )
+            Cama.objects.create(codigo=f"{habitacion.numero}-{k % CAMAS_POR_HABITACION}", habitacion=habitacion)
+        Paciente.objects.bulk_create([
+            Paciente(nombre=f"Carga {i}", apellido_paterno="Camas", ci=f"{PREFIJO}{i}",
+                     fecha_nacimiento=date(1980, 1, 1), genero='F')
+            for i in range(n_pacientes)
+        ])
+        camas = list(Cama.objects.filter(habitacion__numero__startswith=PREFIJO).values_list('id', flat=True))
+        cis = [f"{PREFIJO}{i}" for i in range(n_pacientes)]
+        return camas, cis
+
+    def _en_paralelo(self, usuarios, objetivo, *args):
+        hilos = [threading.Thread(target=objetivo, args=(u, i) + args) for i, u in enumerate(usuarios)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+    def _admision(self, usuario, numero, camas, cis, metricas, url):
+        """Intenta todas las camas, en otro orden y con otros pacientes que las demás admisiones."""
+        try:
+            cliente = self._cliente(usuario, url)
+            camas = list(camas)
+            azar = random.Random(numero)
+            azar.shuffle(camas)
+            for cama_id in camas:
+                self._medir(metricas, 'asignar', cliente, 'post', reverse('asignar_cama'), {
+                    'ci': azar.choice(cis), 'cama_id': cama_id, 'departamento': DEPARTAMENTO_CARGA,
+                })
+        finally:
+            connections.close_all()
+
+    def _enfermeria(self, usuario, numero, paso, nombre_url, ids, metricas, url):
+        """Libera (o confirma la limpieza de) todas las camas; las demás enfermeras compiten por las mismas."""
+        try:
+            cliente = self._cliente(usuario, url)
+            ids = list(ids)
+            random.Random(numero).shuffle(ids)
+            for id_ in ids:
+                self._medir(metricas, paso, cliente, 'get', reverse(nombre_url, args=[id_]))
+        finally:
+            connections.close_all()
+
+    def _verificar_camas(self):
+        """Lista de problemas: camas o pacientes con dos asignaciones vigentes, estados y censo descuadrados."""
+        problemas = []
+        vigentes = AsignacionCama.objects.filter(paciente__ci__startswith=PREFIJO, fecha_salida__isnull=True)
+        for campo, nombre in (('cama_id', 'camas'), ('paciente_id', 'pacientes')):
+            dobles = vigentes.values(campo).annotate(n=Count('id')).filter(n__gt=1).count()
+            if dobles:
+                problemas.append(f"{dobles} {nombre} con dos asignaciones vigentes")
+        camas = Cama.objects.filter(habitacion__numero__startswith=PREFIJO)
+        ocupadas = camas.filter(estado='ocupada').count()
+        if ocupadas != vigentes.count():
+            problemas.append(f"{ocupadas} camas ocupadas pero {vigentes.count()} asignaciones vigentes")
+
+        reales = Habitacion.objects.filter(numero__startswith=PREFIJO).annotate(**{
+            estado: Count('camas', filter=Q(camas__estado=estado)) for estado in ESTADOS_CAMA
+        }).values_list('id', *ESTADOS_CAMA)
+        censo = dict(
+            (fila[0], fila) for fila in
+            CensoHabitacion.objects.filter(habitacion__numero__startswith=PREFIJO).values_list('habitacion_id', *ESTADOS_CAMA)
+        )
+        if any(censo.get(fila[0]) != fila for fila in reales):
+            problemas.append("el censo por habitación no coincide con las camas")
+        departamento = CensoDepartamento.objects.filter(departamento=DEPARTAMENTO_CARGA).values_list(*ESTADOS_CAMA).first()
+        if departamento != tuple(camas.filter(estado=e).count() for e in ESTADOS_CAMA):
+            problemas.append("el censo del departamento no coincide con las camas")
+        return problemas
+
+    def _camas(self, options):
+        url = options['url']
+        n_camas = min(options['citas'], 99 * CAMAS_POR_HABITACION)
+        self.stdout.write("Sembrando datos de prueba...")
+        _, recepcion, _ = self._sembrar(0, 0, options['recepcionistas'], con_citas=False)
+        camas, cis = self._sembrar_camas(n_camas, 2 * n_camas)
+        self.stdout.write(f"{len(recepcion)} usuarios disputando {len(camas)} camas entre {len(cis)} pacientes.")
+        metricas = Metricas(PASOS_CAMAS)
+        inicio = time.perf_counter()
+
+        # 1. Todas las admisiones intentan asignar todas las camas a la vez
+        self._en_paralelo(recepcion, self._admision, camas, cis, metricas, url)
+        problemas = self._verificar_camas()
+
+        # 2. Los pacientes sin cama esperan, en orden; se liberan y limpian todas las camas a la vez
+        con_cama = set(AsignacionCama.objects.filter(paciente__ci__startswith=PREFIJO).values_list('paciente_id', flat=True))
+        en_espera = list(Paciente.objects.filter(ci__startswith=PREFIJO).exclude(id__in=con_cama).order_by('id'))
+        for paciente in en_espera:
+            ListaEspera.objects.create(paciente=paciente, departamento=DEPARTAMENTO_CARGA)
+        asignaciones = list(AsignacionCama.objects.filter(paciente__ci__startswith=PREFIJO).values_list('id', flat=True))
+        self._en_paralelo(recepcion, self._enfermeria, 'liberar', 'liberar_cama', asignaciones, metricas, url)
+        self._en_paralelo(recepcion, self._enfermeria, 'limpieza', 'confirmar_limpieza', camas, metricas, url)
+        duracion = time.perf_counter() - inicio
+        problemas += self._verificar_camas()
+
+        # La lista de espera se atiende en orden de llegada. Solo vuelven a
+        # ofrecerse las camas que pasaron por limpieza: si al azar ninguna
+        # admisión eligió un paciente libre para alguna cama, esa sigue disponible.
+        servidos = set(AsignacionCama.objects.filter(
+            paciente__in=en_espera, fecha_salida__isnull=True
+        ).values_list('paciente_id', flat=True))
+        esperados = {p.id for p in en_espera[:len(asignaciones)]}
+        if servidos != esperados:
+            problemas.append(f"lista de espera fuera de orden: {len(servidos - esperados)} atendidos antes de tiempo")
+
+        self._reporte(metricas, duracion, contar_consultas=not url, pasos=PASOS_CAMAS)
+        ocupadas = Cama.objects.filter(habitacion__numero__startswith=PREFIJO, estado='ocupada').count()
+        if problemas:
+            self.stdout.write(self.style.ERROR("Problemas: " + "; ".join(problemas)))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Sin dobles asignaciones; {ocupadas}/{len(asignaciones)} camas reasignadas desde la lista "
+                f"de espera en orden; censo cuadrado. {duracion:.2f} s."
+            ))
+
+        if not options['conservar']:
+            self._limpiar()
+
+    def _reporte(self, metricas, duracion, contar_consultas, pasos=PASOS):
+        self.stdout.write(
+            f"{'paso':<10} {'peticiones':>10} {'errores':>8} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'consultas':>10}"
+        )
+        for paso in pasos:
+            d = metricas.datos[paso]
+            latencias = sorted(d['latencias'])
+            consultas = (
+                f"{sum(d['consultas']) / len(d['consultas']):.1f}" if contar_consultas and d['consultas'] else '-'
+            )
+            self.stdout.write(
+                f"{paso:<10} {len(latencias):>10} {d['errores']:>8} {len(latencias) / duracion:>8.1f} "
+                f"{_percentil(latencias, 50) * 1000:>8.1f} {_percentil(latencias, 95) * 1000:>8.1f} "
+                f"{_percentil(latencias, 99) * 1000:>8.1f} {consultas:>10}"
+            )
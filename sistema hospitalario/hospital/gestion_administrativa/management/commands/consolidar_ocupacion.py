@@ -0,0 +1,36 @@
+# gestion_administrativa/management/commands/consolidar_ocupacion.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gestion_administrativa.ocupacion import consolidar
+
+
+class Command(BaseCommand):
+    help = (
+        "Consolida el censo diario por departamento (CensoDiario) y la duración de las "
+        "estancias (EstanciaMensual) desde AsignacionCama, solo para los días cerrados "
+        "que faltan. Pensado para correr cada noche (cron); se puede cortar y reanudar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hasta', help="Último día a consolidar (AAAA-MM-DD). Por defecto, ayer")
+        parser.add_argument('--reiniciar', action='store_true',
+                            help="Borrar lo consolidado y recorrer todo el historial (ej: tras corregir fechas a mano)")
+
+    def handle(self, *args, **options):
+        hasta = None
+        if options['hasta']:
+            try:
+                hasta = date.fromisoformat(options['hasta'])
+            except ValueError:
+                raise CommandError("--hasta debe tener el formato AAAA-MM-DD.")
+            if hasta >= timezone.localdate():
+                raise CommandError("--hasta debe ser un día ya cerrado (a más tardar, ayer).")
+
+        def avance(desde, fin):
+            self.stdout.write(f"  {desde} a {fin} consolidados")
+
+        dias = consolidar(hasta=hasta, reiniciar=options['reiniciar'], al_avanzar=avance)
+        self.stdout.write(self.style.SUCCESS(f"{dias} días consolidados."))
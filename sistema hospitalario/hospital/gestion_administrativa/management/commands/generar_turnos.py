@@ -0,0 +1,63 @@
+# gestion_administrativa/management/commands/generar_turnos.py
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_administrativa.models import Empleado
+from gestion_administrativa.turnos import generar_turnos, TAMANO_LOTE_TURNOS
+
+
+def _fecha(texto):
+    try:
+        return datetime.strptime(texto, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Fecha inválida: {texto} (formato AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = "Genera por lotes los turnos de rotación de los empleados activos en un rango de fechas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Fecha inicial AAAA-MM-DD (por defecto hoy)")
+        parser.add_argument('--hasta', help="Fecha final AAAA-MM-DD (por defecto desde + días - 1)")
+        parser.add_argument('--dias', type=int, default=90, help="Días a generar si no se indica --hasta (90 = un trimestre)")
+        parser.add_argument('--departamento', help="Solo empleados de este departamento")
+        parser.add_argument('--grupo', help="Solo empleados de este grupo (ej: 'Grupo 1')")
+        parser.add_argument('--sobrescribir', action='store_true', help="Actualizar turnos existentes que difieran de la rotación")
+        parser.add_argument('--dry-run', action='store_true', help="Mostrar el diff sin escribir en la base de datos")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_TURNOS, help="Tamaño de lote para las inserciones")
+
+    def handle(self, *args, **options):
+        desde = _fecha(options['desde']) if options['desde'] else date.today()
+        hasta = _fecha(options['hasta']) if options['hasta'] else desde + timedelta(days=options['dias'] - 1)
+        if hasta < desde:
+            raise CommandError("--hasta no puede ser anterior a --desde")
+
+        empleados = Empleado.objects.filter(estado='Activo').exclude(grupo_cargo__isnull=True)
+        if options['departamento']:
+            empleados = empleados.filter(departamento=options['departamento'])
+        if options['grupo']:
+            empleados = empleados.filter(grupo_cargo=options['grupo'])
+        empleados = list(empleados.order_by('id'))
+
+        resultado = generar_turnos(
+            empleados,
+            desde,
+            hasta,
+            sobrescribir=options['sobrescribir'],
+            dry_run=options['dry_run'],
+            lote=options['lote'],
+        )
+
+        if options['dry_run']:
+            for fila in resultado['nuevos']:
+                self.stdout.write(f"+ {fila.empleado_id} {fila.fecha} {fila.hora_inicio:%H:%M}-{fila.hora_fin:%H:%M}")
+            for fila in resultado['cambios']:
+                self.stdout.write(f"~ {fila.empleado_id} {fila.fecha} {fila.hora_inicio:%H:%M}-{fila.hora_fin:%H:%M}")
+
+        accion = "Se generarían" if options['dry_run'] else "Generados"
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {len(resultado['nuevos'])} turnos nuevos y {len(resultado['cambios'])} actualizados "
+            f"({resultado['sin_cambios']} sin cambios) para {len(empleados)} empleados "
+            f"entre {desde} y {hasta}."
+        ))
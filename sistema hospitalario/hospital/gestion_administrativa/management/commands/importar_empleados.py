@@ -0,0 +1,39 @@
+# gestion_administrativa/management/commands/importar_empleados.py
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_administrativa.importacion import COLUMNAS_EMPLEADOS, importar_empleados, leer_filas
+
+
+class Command(BaseCommand):
+    help = "Alta masiva de empleados y usuarios desde un archivo CSV o XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help=f"CSV/XLSX con columnas {','.join(COLUMNAS_EMPLEADOS)}")
+        parser.add_argument('--procesos', type=int, help="Procesos para calcular los hashes (por defecto, uno por CPU)")
+        parser.add_argument('--dry-run', action='store_true', help="Solo validar, sin escribir en la base de datos")
+
+    def handle(self, *args, **options):
+        def progreso(etapa, hechos, total):
+            self.stdout.write(f"{etapa}: {hechos}" + (f"/{total}" if total else ""))
+
+        try:
+            with open(options['archivo'], 'rb') as f:
+                resultado = importar_empleados(
+                    leer_filas(f, options['archivo']),
+                    procesos=options['procesos'],
+                    dry_run=options['dry_run'],
+                    progreso=progreso,
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for n, mensaje in resultado['errores']:
+            self.stdout.write(self.style.WARNING(f"Línea {n}: {mensaje}"))
+
+        if options['dry_run']:
+            texto = f"{resultado['validas']} filas válidas"
+        else:
+            texto = f"Creados {resultado['creados']} empleados"
+        self.stdout.write(self.style.SUCCESS(
+            f"{texto}; {len(resultado['errores'])} con errores de {resultado['total']} filas."
+        ))
@@ -0,0 +1,78 @@
+# gestion_administrativa/management/commands/importar_turnos.py
+import csv
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from gestion_administrativa.cache_turnos import invalidar_grupo
+from gestion_administrativa.intervalos import DESCANSO_MINIMO, validar_lote
+from gestion_administrativa.models import Empleado, TurnoEmpleado
+from gestion_administrativa.turnos import TAMANO_LOTE_TURNOS
+
+
+def _fila(n, registro):
+    """
+    Convierte un registro del CSV en (TurnoEmpleado sin guardar, error). Un
+    registro sin horas es un error de esa fila: TurnoEmpleado no admite
+    horas vacías.
+    """
+    try:
+        fila = TurnoEmpleado(
+            empleado_id=int(registro['empleado_id']),
+            fecha=datetime.strptime(registro['fecha'], "%Y-%m-%d").date(),
+        )
+        hora_inicio, hora_fin = registro.get('hora_inicio'), registro.get('hora_fin')
+        if not hora_inicio or not hora_fin:
+            return fila, "Faltan hora_inicio u hora_fin."
+        fila.hora_inicio = datetime.strptime(hora_inicio, "%H:%M").time()
+        fila.hora_fin = datetime.strptime(hora_fin, "%H:%M").time()
+        return fila, None
+    except (KeyError, TypeError, ValueError):
+        raise CommandError(f"Línea {n}: formato inválido (empleado_id, fecha AAAA-MM-DD, hora_inicio HH:MM, hora_fin HH:MM)")
+
+
+class Command(BaseCommand):
+    help = "Importa turnos desde un CSV validando superposición y descanso mínimo (incluye turnos nocturnos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="CSV con columnas empleado_id,fecha,hora_inicio,hora_fin")
+        parser.add_argument('--descanso', type=float, default=DESCANSO_MINIMO.total_seconds() / 3600,
+                            help="Horas mínimas de descanso entre turnos")
+        parser.add_argument('--dry-run', action='store_true', help="Solo validar, sin escribir en la base de datos")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_TURNOS, help="Tamaño de lote para las inserciones")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], newline='', encoding='utf-8') as f:
+                leidas = [_fila(n, r) for n, r in enumerate(csv.DictReader(f), start=2)]
+        except OSError as e:
+            raise CommandError(f"No se pudo leer el archivo: {e}")
+
+        filas = [fila for fila, _ in leidas]
+        validas, errores = validar_lote(
+            [fila for fila, error in leidas if not error], descanso=timedelta(hours=options['descanso'])
+        )
+        errores = [(fila, error) for fila, error in leidas if error] + errores
+        for fila, mensaje in errores:
+            self.stdout.write(self.style.WARNING(f"Empleado {fila.empleado_id} {fila.fecha}: {mensaje}"))
+
+        if validas and not options['dry_run']:
+            with transaction.atomic():
+                TurnoEmpleado.objects.bulk_create(
+                    validas,
+                    batch_size=options['lote'],
+                    update_conflicts=True,
+                    update_fields=['hora_inicio', 'hora_fin'],
+                    unique_fields=['empleado', 'fecha'],
+                )
+            grupos = Empleado.objects.filter(
+                id__in={f.empleado_id for f in validas}
+            ).values_list('departamento', 'grupo_cargo').distinct()
+            for dep, grupo in grupos:
+                invalidar_grupo(dep, grupo)
+
+        accion = "Válidos" if options['dry_run'] else "Importados"
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {len(validas)} turnos; {len(errores)} rechazados de {len(filas)} filas."
+        ))
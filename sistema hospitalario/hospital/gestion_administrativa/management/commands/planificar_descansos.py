@@ -0,0 +1,108 @@
+# gestion_administrativa/management/commands/planificar_descansos.py
+import time
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_administrativa.models import Empleado
+from gestion_administrativa.planificador import empleados_para_plan, guardar_plan, resolver_plan_paralelo
+from gestion_administrativa.turnos import FECHA_BASE_ROTACION, semanas_del_rango
+
+
+def _fecha(texto):
+    try:
+        return datetime.strptime(texto, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Fecha inválida: {texto} (formato AAAA-MM-DD)")
+
+
+def _fechas_por_dia(desde, hasta):
+    """
+    {(semana, día del bloque): [fechas]} de los meses que tocan el rango.
+    Los bloques de 7 días arrancan el 1 de cada mes, así que el día del
+    bloque no es un día de la semana y el último bloque de un mes puede
+    compartir número de semana con el primero del siguiente.
+    """
+    fechas = {}
+    fecha = desde.replace(day=1)
+    fin = hasta.replace(day=monthrange(hasta.year, hasta.month)[1])
+    while fecha <= fin:
+        idx = fecha.day - 1
+        semana = (fecha.replace(day=1) - FECHA_BASE_ROTACION).days // 7 + idx // 7
+        fechas.setdefault((semana, idx % 7), []).append(fecha)
+        fecha += timedelta(days=1)
+    return fechas
+
+
+def _minimos(valores):
+    """['Enfermero=3', 'Medico=2'] -> {'Enfermero': 3, 'Medico': 2}"""
+    minimos = {}
+    for valor in valores or []:
+        cargo, _, n = valor.partition('=')
+        try:
+            minimos[cargo.strip()] = int(n)
+        except ValueError:
+            raise CommandError(f"Mínimo inválido: {valor} (formato Cargo=N)")
+    return minimos
+
+
+class Command(BaseCommand):
+    help = "Planifica días de descanso y desfases de rotación cumpliendo la cobertura mínima por turno."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Fecha inicial AAAA-MM-DD (por defecto hoy)")
+        parser.add_argument('--semanas', type=int, default=12, help="Semanas de rotación a planificar")
+        parser.add_argument('--departamento', help="Solo empleados de este departamento")
+        parser.add_argument('--grupo', help="Solo empleados de este grupo (ej: 'Grupo 1')")
+        parser.add_argument('--minimo', action='append', help="Personal mínimo por turno y día: Cargo=N (repetible)")
+        parser.add_argument('--minimo-defecto', type=int, default=1, help="Mínimo para cargos sin --minimo")
+        parser.add_argument('--semillas', type=int, default=1, help="Semillas a probar (se guarda el mejor plan)")
+        parser.add_argument('--procesos', type=int, default=1, help="Procesos en paralelo para las semillas")
+        parser.add_argument('--dry-run', action='store_true', help="Mostrar el resultado sin guardar el plan")
+
+    def handle(self, *args, **options):
+        if options['semanas'] < 1 or options['semillas'] < 1:
+            raise CommandError("--semanas y --semillas deben ser mayores que 0")
+
+        desde = _fecha(options['desde']) if options['desde'] else date.today()
+        hasta = desde + timedelta(days=options['semanas'] * 7 - 1)
+        semanas = sorted(semanas_del_rango(desde, hasta))
+
+        empleados = Empleado.objects.filter(estado='Activo').exclude(grupo_cargo__isnull=True)
+        if options['departamento']:
+            empleados = empleados.filter(departamento=options['departamento'])
+        if options['grupo']:
+            empleados = empleados.filter(grupo_cargo=options['grupo'])
+        empleados = empleados_para_plan(empleados.order_by('id'))
+        if not empleados:
+            raise CommandError("No hay empleados activos con rotación para planificar")
+
+        inicio = time.perf_counter()
+        plan = resolver_plan_paralelo(
+            empleados,
+            semanas,
+            minimos=_minimos(options['minimo']),
+            minimo_defecto=options['minimo_defecto'],
+            semillas=options['semillas'],
+            procesos=options['procesos'],
+        )
+        segundos = time.perf_counter() - inicio
+
+        fechas = _fechas_por_dia(desde, hasta)
+        for f in plan['faltantes']:
+            dias = fechas.get((f['semana'], f['dia']))
+            cuando = ", ".join(d.isoformat() for d in dias) if dias else f"día {f['dia'] + 1} del bloque"
+            self.stdout.write(self.style.WARNING(
+                f"Semana {f['semana']} ({cuando}): faltan {f['faltan']} {f['cargo']} "
+                f"en {f['departamento'] or 'Sin departamento'} ({f['turno']})"
+            ))
+
+        if not options['dry_run']:
+            guardar_plan(plan, empleados)
+
+        accion = "Plan calculado" if options['dry_run'] else "Plan guardado"
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} para {len(empleados)} empleados y {len(semanas)} semanas en {segundos:.2f}s "
+            f"(semilla {plan['semilla']}, déficit {plan['deficit']}, penalización {plan['penalizacion']})."
+        ))
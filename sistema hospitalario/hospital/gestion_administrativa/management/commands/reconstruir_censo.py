@@ -0,0 +1,19 @@
+# gestion_administrativa/management/commands/reconstruir_censo.py
+from django.core.management.base import BaseCommand
+
+from gestion_administrativa.censo import ESTADOS_CAMA, reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el censo de camas (contadores por habitación y departamento) "
+        "con una sola consulta agrupada. Úsalo si los contadores se desalinean, "
+        "por ejemplo tras cargar camas directamente en la base."
+    )
+
+    def handle(self, *args, **options):
+        departamentos = reconstruir()
+        for departamento, contadores in sorted(departamentos.items()):
+            detalle = ", ".join(f"{contadores.get(estado, 0)} {estado}" for estado in ESTADOS_CAMA)
+            self.stdout.write(f"  {departamento}: {detalle}")
+        self.stdout.write(self.style.SUCCESS(f"Censo reconstruido para {len(departamentos)} departamentos."))
@@ -0,0 +1,35 @@
+# gestion_administrativa/management/commands/rotar_tokens_ical.py
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_administrativa.ical import rotar_token_empleado, rotar_token_grupo
+from gestion_administrativa.models import Empleado
+
+
+class Command(BaseCommand):
+    help = (
+        "Revoca los enlaces iCal entregados: rota la clave de un empleado o la "
+        "revisión de un (departamento, grupo). Los enlaces nuevos se muestran en "
+        "su calendario."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empleado', type=int, help="ID del empleado")
+        parser.add_argument('--departamento', help="Departamento del feed de grupo")
+        parser.add_argument('--grupo', help="Grupo del feed (ej: 'Grupo 1')")
+
+    def handle(self, *args, **options):
+        if options['empleado'] is None and not options['grupo']:
+            raise CommandError("Indica --empleado o --departamento y --grupo")
+
+        if options['empleado'] is not None:
+            empleado = Empleado.objects.filter(pk=options['empleado']).first()
+            if empleado is None:
+                raise CommandError(f"No existe el empleado {options['empleado']}")
+            rotar_token_empleado(empleado)
+            self.stdout.write(self.style.SUCCESS(f"Enlace iCal de {empleado.nombre} {empleado.apellido} revocado."))
+
+        if options['grupo']:
+            rotar_token_grupo(options['departamento'], options['grupo'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Enlace iCal de {options['departamento'] or 'Sin departamento'} / {options['grupo']} revocado."
+            ))
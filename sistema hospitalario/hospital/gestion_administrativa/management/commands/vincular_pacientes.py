@@ -0,0 +1,132 @@
+# gestion_administrativa/management/commands/vincular_pacientes.py
+import time
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from gestion_administrativa.models import Cita, CitaHistorica, ProgresoTarea, RevisionPaciente
+from gestion_administrativa.vinculacion import (
+    REVISION,
+    SIN_COINCIDENCIA,
+    VINCULADO,
+    IndicePacientes,
+    normalizar,
+)
+
+TAMANO_LOTE = 5000
+TAREA = 'vincular_pacientes'
+
+
+class Command(BaseCommand):
+    help = (
+        "Completa Cita.paciente_registrado comparando el texto de cada cita con los "
+        "pacientes registrados. Avanza por lotes de ids (transacciones cortas) y se puede "
+        "cortar y reanudar. Los nombres dudosos quedan en RevisionPaciente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Citas leídas y actualizadas por transacción")
+        parser.add_argument('--archivadas', action='store_true', help="Procesar también CitaHistorica")
+        parser.add_argument('--reiniciar', action='store_true',
+                            help="Volver a recorrer desde el principio las citas sin vincular (ej: tras resolver revisiones)")
+        parser.add_argument('--pausa', type=float, default=0, help="Segundos de espera entre lotes para no cargar la base")
+        parser.add_argument('--dry-run', action='store_true', help="Solo contar resultados, sin escribir nada")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+
+        inicio = time.perf_counter()
+        self.indice = IndicePacientes.cargar()
+        self.stdout.write(f"{len(self.indice.nombres)} pacientes indexados en {time.perf_counter() - inicio:.1f} s.")
+
+        # Revisiones ya resueltas a mano: mandan sobre la comparación automática
+        self.resultados = {}
+        for texto, estado, paciente_id in RevisionPaciente.objects.exclude(estado='pendiente').values_list(
+            'texto', 'estado', 'paciente_id'
+        ):
+            if estado == 'resuelta' and paciente_id:
+                self.resultados[texto] = (VINCULADO, paciente_id, [])
+            else:
+                self.resultados[texto] = (SIN_COINCIDENCIA, None, [])
+
+        if options['reiniciar'] and not options['dry_run']:
+            # Se vuelven a contar desde cero en esta pasada
+            RevisionPaciente.objects.filter(estado='pendiente').update(citas=0)
+
+        modelos = [(Cita, TAREA)]
+        if options['archivadas']:
+            modelos.append((CitaHistorica, f"{TAREA}:archivadas"))
+        for modelo, tarea in modelos:
+            self._procesar(modelo, tarea, options)
+
+    def _resolver(self, texto):
+        clave = normalizar(texto)
+        if clave not in self.resultados:
+            self.resultados[clave] = self.indice.resolver(clave)
+        return clave, self.resultados[clave]
+
+    def _procesar(self, modelo, tarea, options):
+        progreso, _ = ProgresoTarea.objects.get_or_create(tarea=tarea)
+        ultimo = 0 if options['reiniciar'] else progreso.ultimo_id
+        totales = Counter()
+        self.stdout.write(f"{modelo.__name__}: desde el id {ultimo}")
+
+        while True:
+            # Por clave primaria: cada lote es un rango corto de ids, nunca un recorrido completo
+            filas = list(
+                modelo.objects.filter(id__gt=ultimo, paciente_registrado__isnull=True)
+                .order_by('id').values_list('id', 'paciente')[:options['lote']]
+            )
+            if not filas:
+                break
+            ultimo = filas[-1][0]
+
+            vinculos = []
+            revisar = defaultdict(lambda: {'citas': 0})
+            for cita_id, texto in filas:
+                clave, (resultado, paciente_id, candidatos) = self._resolver(texto)
+                totales[resultado] += 1
+                if resultado == VINCULADO:
+                    vinculos.append(modelo(id=cita_id, paciente_registrado_id=paciente_id))
+                elif resultado == REVISION:
+                    pendiente = revisar[clave]
+                    pendiente['citas'] += 1
+                    pendiente.setdefault('ejemplo', texto[:100])
+                    pendiente.setdefault('candidatos', candidatos)
+
+            if not options['dry_run']:
+                with transaction.atomic():
+                    modelo.objects.bulk_update(vinculos, ['paciente_registrado'], batch_size=1000)
+                    self._guardar_revisiones(revisar)
+                    ProgresoTarea.objects.filter(pk=progreso.pk).update(ultimo_id=ultimo)
+
+            self.stdout.write(
+                f"  hasta id {ultimo}: {totales[VINCULADO]} vinculadas, "
+                f"{totales[REVISION]} a revisión, {totales[SIN_COINCIDENCIA]} sin coincidencia"
+            )
+            if options['pausa']:
+                time.sleep(options['pausa'])
+
+        pendientes = RevisionPaciente.objects.filter(estado='pendiente').count()
+        self.stdout.write(self.style.SUCCESS(
+            f"{modelo.__name__}: {totales[VINCULADO]} vinculadas, {totales[REVISION]} citas en "
+            f"{pendientes} nombres a revisar, {totales[SIN_COINCIDENCIA]} sin coincidencia."
+        ))
+
+    def _guardar_revisiones(self, revisar):
+        if not revisar:
+            return
+        existentes = RevisionPaciente.objects.in_bulk(list(revisar), field_name='texto')
+        nuevas, cambiadas = [], []
+        for texto, datos in revisar.items():
+            revision = existentes.get(texto)
+            if revision is None:
+                nuevas.append(RevisionPaciente(texto=texto, **datos))
+            else:
+                revision.citas += datos['citas']
+                revision.candidatos = datos['candidatos']
+                cambiadas.append(revision)
+        RevisionPaciente.objects.bulk_create(nuevas)
+        RevisionPaciente.objects.bulk_update(cambiadas, ['citas', 'candidatos'])
@@ -0,0 +1,138 @@
+# gestion_administrativa/matriz_anual.py
+
+# --------------------------
+# Matriz anual de turnos (empleado x día) con NumPy
+# --------------------------
+# numpy se importa recién al calcular la matriz: el resto de la aplicación
+# (y views.py, que importa este módulo) funciona sin él.
+from datetime import date, timedelta
+from functools import lru_cache
+
+from .turnos import FECHA_BASE_ROTACION, semanas_del_rango
+from .utils import HORARIOS_POR_GRUPO
+
+CODIGO_SIN_TURNO = -1  # cargo/grupo sin rotación
+CODIGO_DESCANSO = 0
+
+
+def _texto(hora_inicio, hora_fin):
+    return f"{hora_inicio}-{hora_fin}"
+
+
+# HORARIOS_POR_GRUPO precompilado: cada horario distinto recibe un código entero (1, 2, ...)
+HORARIOS_BASE = sorted({
+    _texto(t['hora_inicio'], t['hora_fin'])
+    for grupos in HORARIOS_POR_GRUPO.values()
+    for turnos in grupos.values()
+    for t in turnos
+})
+CODIGOS_BASE = {horario: i + 1 for i, horario in enumerate(HORARIOS_BASE)}
+
+# Rotaciones (una fila por (cargo, grupo) en la tabla de _tablas)
+ROTACIONES = [(cargo, grupo) for cargo, grupos in HORARIOS_POR_GRUPO.items() for grupo in grupos]
+INDICE_ROTACION = {clave: i for i, clave in enumerate(ROTACIONES)}
+
+
+@lru_cache(maxsize=None)
+def _tablas():
+    """(tabla, largo): códigos de cada rotación por fila (rellenada con -1) y su largo."""
+    import numpy as np
+
+    max_rotacion = max(len(t) for g in HORARIOS_POR_GRUPO.values() for t in g.values())
+    tabla = np.full((len(ROTACIONES) + 1, max_rotacion), CODIGO_SIN_TURNO, dtype=np.int16)
+    largo = np.ones(len(ROTACIONES) + 1, dtype=np.int64)  # la última fila = sin rotación
+    for (cargo, grupo), i in INDICE_ROTACION.items():
+        turnos = HORARIOS_POR_GRUPO[cargo][grupo]
+        tabla[i, :len(turnos)] = [CODIGOS_BASE[_texto(t['hora_inicio'], t['hora_fin'])] for t in turnos]
+        largo[i] = len(turnos)
+    return tabla, largo
+
+
+def _dias_del_anio(year):
+    """Fechas del año y, por día, su semana de rotación y su índice 0-6 (como turnos.semana_rotacion)."""
+    import numpy as np
+
+    inicio = date(year, 1, 1)
+    fechas = [inicio + timedelta(days=i) for i in range((date(year + 1, 1, 1) - inicio).days)]
+    semanas = np.array(
+        [(f.replace(day=1) - FECHA_BASE_ROTACION).days // 7 + (f.day - 1) // 7 for f in fechas], dtype=np.int64
+    )
+    idx7 = np.array([(f.day - 1) % 7 for f in fechas], dtype=np.int64)
+    return fechas, semanas, idx7
+
+
+def matriz_anual(empleados, year):
+    """
+    Calcula la matriz de turnos del año para los empleados dados.
+
+    Retorna (matriz, horarios, fechas): matriz int16 de forma (empleados, días)
+    con CODIGO_DESCANSO, CODIGO_SIN_TURNO o un código de horario; horarios es
+    {código: 'HH:MM-HH:MM'} (incluye los horarios manuales que no estén en la
+    rotación). Requiere numpy (ImportError si no está instalado).
+    """
+    import numpy as np
+
+    from .models import TurnoEmpleado, PlanDescanso  # importación local para evitar ciclo
+
+    empleados = list(empleados)
+    fechas, semanas, idx7 = _dias_del_anio(year)
+    horarios = {c: h for h, c in CODIGOS_BASE.items()}
+    n_emp, n_dias = len(empleados), len(fechas)
+    if not n_emp:
+        return np.zeros((0, n_dias), dtype=np.int16), horarios, fechas
+
+    ids = np.array([e.id for e in empleados], dtype=np.int64)
+    fila_de = {e.id: i for i, e in enumerate(empleados)}
+    rot = np.array(
+        [INDICE_ROTACION.get((e.cargo, e.grupo_cargo), len(ROTACIONES)) for e in empleados], dtype=np.int64
+    )
+    tabla_rotaciones, largo_rotaciones = _tablas()
+    largo = largo_rotaciones[rot]
+
+    # Semanas del año como columnas: descanso por defecto (id + semana) % 7, desfase 0
+    lista_semanas = np.array(sorted(semanas_del_rango(fechas[0], fechas[-1])), dtype=np.int64)
+    col_semana = np.searchsorted(lista_semanas, semanas)
+    dia_descanso = (ids[:, None] + lista_semanas[None, :]) % 7
+    desfase = np.zeros_like(dia_descanso)
+
+    # Plan del planificador: scatter sobre (empleado, semana)
+    planes = np.array(list(PlanDescanso.objects.filter(
+        empleado_id__in=list(fila_de),
+        semana__in=lista_semanas.tolist()
+    ).values_list('empleado_id', 'semana', 'dia_descanso', 'desfase')), dtype=np.int64).reshape(-1, 4)
+    if len(planes):
+        filas = np.array([fila_de[i] for i in planes[:, 0]], dtype=np.int64)
+        cols = np.searchsorted(lista_semanas, planes[:, 1])
+        dia_descanso[filas, cols] = planes[:, 2]
+        desfase[filas, cols] = planes[:, 3]
+
+    # Rotación: índice por semana + desfase, módulo el largo de cada rotación
+    indice = (semanas[None, :] + desfase[:, col_semana]) % largo[:, None]
+    matriz = tabla_rotaciones[rot[:, None], indice]
+
+    # Máscara de descanso (solo donde hay rotación)
+    descanso = (idx7[None, :] == dia_descanso[:, col_semana]) & (matriz != CODIGO_SIN_TURNO)
+    matriz[descanso] = CODIGO_DESCANSO
+
+    # Turnos manuales: scatter de los TurnoEmpleado del año
+    codigos = dict(CODIGOS_BASE)
+    filas, cols, valores = [], [], []
+    for emp_id, fecha, hi, hf in TurnoEmpleado.objects.filter(
+        empleado_id__in=list(fila_de),
+        fecha__year=year
+    ).values_list('empleado_id', 'fecha', 'hora_inicio', 'hora_fin'):
+        if hi is None or hf is None:
+            codigo = CODIGO_DESCANSO
+        else:
+            horario = _texto(f"{hi:%H:%M}", f"{hf:%H:%M}")
+            if horario not in codigos:
+                codigos[horario] = len(codigos) + 1
+                horarios[codigos[horario]] = horario
+            codigo = codigos[horario]
+        filas.append(fila_de[emp_id])
+        cols.append((fecha - fechas[0]).days)
+        valores.append(codigo)
+    if filas:
+        matriz[np.array(filas), np.array(cols)] = np.array(valores, dtype=np.int16)
+
+    return matriz, horarios, fechas
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def revisar_duplicados(apps, schema_editor):
+    TurnoEmpleado = apps.get_model('gestion_administrativa', 'TurnoEmpleado')
+
+    # La restricción única no se puede crear si ya hay dos turnos el mismo día
+    dobles = list(
+        TurnoEmpleado.objects.values('empleado_id', 'fecha')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .order_by('fecha', 'empleado_id')[:20]
+    )
+    if dobles:
+        detalle = "\n".join(
+            f"  empleado {d['empleado_id']}: {d['fecha']} ({d['n']} turnos)" for d in dobles
+        )
+        raise RuntimeError(
+            "Hay empleados con más de un turno en la misma fecha. "
+            "Elimina los sobrantes y vuelve a migrar:\n" + detalle
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(revisar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='turnoempleado',
+            constraint=models.UniqueConstraint(fields=('empleado', 'fecha'), name='turno_unico_empleado_fecha'),
+        ),
+    ]
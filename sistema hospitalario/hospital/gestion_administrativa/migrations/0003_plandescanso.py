@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0002_turnoempleado_turno_unico_empleado_fecha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanDescanso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana', models.IntegerField()),
+                ('dia_descanso', models.PositiveSmallIntegerField()),
+                ('desfase', models.SmallIntegerField(default=0)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='planes_descanso', to='gestion_administrativa.empleado')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('empleado', 'semana'), name='plan_unico_empleado_semana')],
+            },
+        ),
+    ]
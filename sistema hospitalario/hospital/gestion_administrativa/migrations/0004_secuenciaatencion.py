@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0003_plandescanso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaAtencion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('departamento', models.CharField(max_length=50)),
+                ('fecha', models.DateField()),
+                ('ultimo', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('departamento', 'fecha'), name='secuencia_unica_departamento_fecha')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def liberar_canceladas(apps, schema_editor):
+    Cita = apps.get_model('gestion_administrativa', 'Cita')
+    Cita.objects.filter(estado='cancelada').update(ocupa_horario=None)
+
+    # El índice único no se puede crear si ya hay horarios dobles
+    dobles = list(
+        Cita.objects.filter(ocupa_horario=True)
+        .values('doctor_id', 'fecha', 'hora')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .order_by('fecha', 'hora')[:20]
+    )
+    if dobles:
+        detalle = "\n".join(
+            f"  doctor {d['doctor_id']}: {d['fecha']} {d['hora']} ({d['n']} citas)" for d in dobles
+        )
+        raise RuntimeError(
+            "Hay citas activas duplicadas para el mismo doctor, fecha y hora. "
+            "Cancela o mueve las sobrantes y vuelve a migrar:\n" + detalle
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0004_secuenciaatencion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cita',
+            name='ocupa_horario',
+            field=models.BooleanField(default=True, editable=False, null=True),
+        ),
+        migrations.RunPython(liberar_canceladas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cita',
+            constraint=models.UniqueConstraint(fields=('doctor', 'fecha', 'hora', 'ocupa_horario'), name='cita_unica_doctor_fecha_hora'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0005_cita_ocupa_horario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CitaHistorica',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('paciente', models.CharField(max_length=100)),
+                ('fecha', models.DateField()),
+                ('hora', models.TimeField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_espera', 'En espera'), ('atendida', 'Atendida'), ('cancelada', 'Cancelada'), ('en_progreso', 'En Progreso')], max_length=20)),
+                ('numero_atencion', models.CharField(blank=True, max_length=20, null=True)),
+                ('prioridad', models.IntegerField(default=1)),
+                ('hora_inicio', models.DateTimeField(blank=True, null=True)),
+                ('hora_fin', models.DateTimeField(blank=True, null=True)),
+                ('calificacion', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('archivada_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['fecha', 'hora', 'id'], name='cita_fecha_hora_id'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['doctor', 'estado', 'fecha', 'hora', 'id'], name='cita_doctor_estado_fecha'),
+        ),
+        migrations.AddField(
+            model_name='citahistorica',
+            name='doctor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas_archivadas', to='gestion_administrativa.empleado'),
+        ),
+        migrations.AddIndex(
+            model_name='citahistorica',
+            index=models.Index(fields=['fecha', 'hora', 'id'], name='citahist_fecha_hora_id'),
+        ),
+        migrations.AddIndex(
+            model_name='citahistorica',
+            index=models.Index(fields=['doctor', 'estado', 'fecha', 'hora', 'id'], name='citahist_doctor_estado_fecha'),
+        ),
+    ]
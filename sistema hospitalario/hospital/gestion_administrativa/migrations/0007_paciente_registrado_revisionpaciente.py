@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0006_citahistorica_indices'),
+        ('gestion_pacientes', '0005_cita'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgresoTarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarea', models.CharField(max_length=50, unique=True)),
+                ('ultimo_id', models.BigIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cita',
+            name='paciente_registrado',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='citas_agendadas', to='gestion_pacientes.paciente'),
+        ),
+        migrations.AddField(
+            model_name='citahistorica',
+            name='paciente_registrado',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='citas_archivadas', to='gestion_pacientes.paciente'),
+        ),
+        migrations.CreateModel(
+            name='RevisionPaciente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('texto', models.CharField(max_length=100, unique=True)),
+                ('ejemplo', models.CharField(max_length=100)),
+                ('candidatos', models.JSONField(default=list)),
+                ('citas', models.PositiveIntegerField(default=0)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('resuelta', 'Resuelta'), ('descartada', 'Descartada')], default='pendiente', max_length=20)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('paciente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='gestion_pacientes.paciente')),
+            ],
+        ),
+    ]
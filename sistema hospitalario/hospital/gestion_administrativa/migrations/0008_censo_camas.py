@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:41
+
+import django.db.models.deletion
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+ESTADOS_CAMA = ('disponible', 'ocupada', 'limpieza', 'bloqueada')
+
+
+def censo_inicial(apps, schema_editor):
+    Habitacion = apps.get_model('gestion_administrativa', 'Habitacion')
+    CensoHabitacion = apps.get_model('gestion_administrativa', 'CensoHabitacion')
+    CensoDepartamento = apps.get_model('gestion_administrativa', 'CensoDepartamento')
+
+    filas = Habitacion.objects.annotate(**{
+        estado: Count('camas', filter=Q(camas__estado=estado)) for estado in ESTADOS_CAMA
+    }).values('id', 'departamento', *ESTADOS_CAMA)
+    habitaciones = []
+    departamentos = {}
+    for fila in filas:
+        contadores = {estado: fila[estado] for estado in ESTADOS_CAMA}
+        habitaciones.append(CensoHabitacion(habitacion_id=fila['id'], **contadores))
+        departamentos.setdefault(fila['departamento'], Counter()).update(contadores)
+    CensoHabitacion.objects.bulk_create(habitaciones, batch_size=1000)
+    CensoDepartamento.objects.bulk_create([
+        CensoDepartamento(departamento=departamento, **{e: contadores[e] for e in ESTADOS_CAMA})
+        for departamento, contadores in departamentos.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0007_paciente_registrado_revisionpaciente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CensoDepartamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('disponible', models.IntegerField(default=0)),
+                ('ocupada', models.IntegerField(default=0)),
+                ('limpieza', models.IntegerField(default=0)),
+                ('bloqueada', models.IntegerField(default=0)),
+                ('departamento', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CensoHabitacion',
+            fields=[
+                ('disponible', models.IntegerField(default=0)),
+                ('ocupada', models.IntegerField(default=0)),
+                ('limpieza', models.IntegerField(default=0)),
+                ('bloqueada', models.IntegerField(default=0)),
+                ('habitacion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='censo', serialize=False, to='gestion_administrativa.habitacion')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(censo_inicial, migrations.RunPython.noop),
+    ]
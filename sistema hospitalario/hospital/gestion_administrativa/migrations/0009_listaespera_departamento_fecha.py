@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0008_censo_camas'),
+        ('gestion_pacientes', '0005_cita'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listaespera',
+            index=models.Index(fields=['departamento', 'fecha_registro'], name='espera_departamento_fecha'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0009_listaespera_departamento_fecha'),
+        ('gestion_pacientes', '0005_cita'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CensoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('departamento', models.CharField(max_length=50)),
+                ('ingresos', models.IntegerField(default=0)),
+                ('egresos', models.IntegerField(default=0)),
+                ('ocupadas', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EstanciaMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('departamento', models.CharField(max_length=50)),
+                ('egresos', models.IntegerField(default=0)),
+                ('minutos', models.BigIntegerField(default=0)),
+                ('hasta_1_dia', models.IntegerField(default=0)),
+                ('hasta_3_dias', models.IntegerField(default=0)),
+                ('hasta_7_dias', models.IntegerField(default=0)),
+                ('hasta_14_dias', models.IntegerField(default=0)),
+                ('hasta_30_dias', models.IntegerField(default=0)),
+                ('mas_de_30_dias', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='asignacioncama',
+            index=models.Index(fields=['fecha_ingreso'], name='asignacion_ingreso'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacioncama',
+            index=models.Index(fields=['fecha_salida'], name='asignacion_salida'),
+        ),
+        migrations.AddConstraint(
+            model_name='censodiario',
+            constraint=models.UniqueConstraint(fields=('fecha', 'departamento'), name='censo_diario_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='estanciamensual',
+            constraint=models.UniqueConstraint(fields=('mes', 'departamento'), name='estancia_mensual_unica'),
+        ),
+    ]
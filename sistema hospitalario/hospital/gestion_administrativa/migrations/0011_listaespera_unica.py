@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:05
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def quitar_duplicados(apps, schema_editor):
+    ListaEspera = apps.get_model('gestion_administrativa', 'ListaEspera')
+
+    # Cada paciente conserva su entrada más antigua (su lugar en la cola)
+    dobles = (
+        ListaEspera.objects.values('paciente_id', 'departamento')
+        .annotate(n=Count('id'), primera=Min('id'))
+        .filter(n__gt=1)
+    )
+    for fila in dobles.iterator():
+        ListaEspera.objects.filter(
+            paciente_id=fila['paciente_id'], departamento=fila['departamento']
+        ).exclude(id=fila['primera']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0010_censodiario_estanciamensual'),
+        ('gestion_pacientes', '0005_cita'),
+    ]
+
+    operations = [
+        migrations.RunPython(quitar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='listaespera',
+            constraint=models.UniqueConstraint(fields=('paciente', 'departamento'), name='espera_unica_paciente_departamento'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:40
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0012_secuencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoTablero',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canal', models.CharField(max_length=30)),
+                ('numero', models.BigIntegerField()),
+                ('tipo', models.CharField(max_length=30)),
+                ('datos', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('canal', 'numero'), name='evento_unico_canal_numero')],
+            },
+        ),
+    ]
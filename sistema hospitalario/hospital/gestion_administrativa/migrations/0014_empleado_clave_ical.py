@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:10
+
+import gestion_administrativa.models
+from django.db import migrations, models
+
+
+def claves_distintas(apps, schema_editor):
+    Empleado = apps.get_model('gestion_administrativa', 'Empleado')
+
+    # AddField evalúa el default una sola vez: cada empleado necesita su propia clave
+    for empleado in Empleado.objects.only('id').iterator():
+        Empleado.objects.filter(pk=empleado.pk).update(
+            clave_ical=gestion_administrativa.models.nueva_clave_ical()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_administrativa', '0013_eventotablero'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empleado',
+            name='clave_ical',
+            field=models.CharField(default=gestion_administrativa.models.nueva_clave_ical, editable=False, max_length=32),
+        ),
+        migrations.RunPython(claves_distintas, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,11 @@
 # IMPORTS
 # ============================
 
+import secrets
 from datetime import date, time, timedelta
 
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Group, Permission
 from django.utils import timezone
 
@@ -29,6 +31,10 @@ class Rol(models.Model):
 # 2️⃣ EMPLEADOS
 # ============================
 
+def nueva_clave_ical():
+    return secrets.token_hex(16)
+
+
 class Empleado(models.Model):
     ESTADOS = [
         ('Activo', 'Activo'),
@@ -61,6 +67,8 @@ class Empleado(models.Model):
     usuario = models.OneToOneField('gestion_administrativa.Usuario', on_delete=models.CASCADE, null=True, blank=True)
     grupo_cargo = models.CharField(max_length=10, choices=GRUPOS, blank=True, null=True)
     horario = models.CharField(max_length=20, blank=True, null=True)
+    # Va dentro del token de su feed iCal: cambiarla revoca los enlaces ya entregados
+    clave_ical = models.CharField(max_length=32, default=nueva_clave_ical, editable=False)
 
     def __str__(self):
         return f"{self.nombre} - {self.cargo}"
@@ -76,10 +84,36 @@ class TurnoEmpleado(models.Model):
     hora_inicio = models.TimeField()
     hora_fin = models.TimeField()
 
+    class Meta:
+        constraints = [
+            # Un solo turno por empleado y día (permite insertar/actualizar por lotes)
+            models.UniqueConstraint(fields=['empleado', 'fecha'], name='turno_unico_empleado_fecha'),
+        ]
+
     def __str__(self):
         return f"{self.empleado.nombre} ({self.fecha} {self.hora_inicio}-{self.hora_fin})"
 
 
+class PlanDescanso(models.Model):
+    """
+    Día de descanso y desfase de rotación de un empleado para una semana de
+    rotación (ver turnos.semana_rotacion). Lo genera el planificador; si no
+    hay plan se usa la regla round-robin.
+    """
+    empleado = models.ForeignKey(Empleado, on_delete=models.CASCADE, related_name='planes_descanso')
+    semana = models.IntegerField()
+    dia_descanso = models.PositiveSmallIntegerField()  # 0-6 dentro del bloque de 7 días
+    desfase = models.SmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['empleado', 'semana'], name='plan_unico_empleado_semana'),
+        ]
+
+    def __str__(self):
+        return f"{self.empleado.nombre} semana {self.semana}: descanso {self.dia_descanso}, desfase {self.desfase}"
+
+
 # ============================
 # 4️⃣ USUARIOS (SEGURIDAD Y ACCESO)
 # ============================
@@ -169,6 +203,11 @@ class Cita(models.Model):
     ]
 
     paciente = models.CharField(max_length=100)
+    # Paciente real detrás del texto libre (lo completa vincular_pacientes)
+    paciente_registrado = models.ForeignKey(
+        Paciente, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='citas_agendadas', editable=False
+    )
     doctor = models.ForeignKey(
         Empleado,
         on_delete=models.CASCADE,
@@ -182,11 +221,152 @@ class Cita(models.Model):
     hora_inicio = models.DateTimeField(null=True, blank=True)
     hora_fin = models.DateTimeField(null=True, blank=True)
     calificacion = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    # True mientras la cita ocupa su horario, NULL si está cancelada. MySQL no
+    # tiene índices únicos parciales, pero sí ignora los NULL en un índice
+    # único: así una cancelada no bloquea el horario para una cita nueva.
+    ocupa_horario = models.BooleanField(null=True, default=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'fecha', 'hora', 'ocupa_horario'],
+                name='cita_unica_doctor_fecha_hora'
+            ),
+        ]
+        # Paginación por clave (fecha, hora, id) de los historiales, ver historial.py
+        indexes = [
+            models.Index(fields=['fecha', 'hora', 'id'], name='cita_fecha_hora_id'),
+            models.Index(fields=['doctor', 'estado', 'fecha', 'hora', 'id'], name='cita_doctor_estado_fecha'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.ocupa_horario = None if self.estado == 'cancelada' else True
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'estado' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'ocupa_horario'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.paciente} - {self.doctor}"
 
 
+class CitaHistorica(models.Model):
+    """
+    Citas archivadas (más antiguas que N meses, ver el comando archivar_citas).
+    Conserva el id y los campos de Cita para que los historiales las sigan
+    mostrando junto con las vigentes.
+    """
+    archivada = True
+
+    id = models.BigIntegerField(primary_key=True)
+    paciente = models.CharField(max_length=100)
+    paciente_registrado = models.ForeignKey(
+        Paciente, on_delete=models.SET_NULL, null=True, blank=True, related_name='citas_archivadas'
+    )
+    doctor = models.ForeignKey(Empleado, on_delete=models.CASCADE, related_name='citas_archivadas')
+    fecha = models.DateField()
+    hora = models.TimeField()
+    estado = models.CharField(max_length=20, choices=Cita.ESTADOS)
+    numero_atencion = models.CharField(max_length=20, null=True, blank=True)
+    prioridad = models.IntegerField(default=1)
+    hora_inicio = models.DateTimeField(null=True, blank=True)
+    hora_fin = models.DateTimeField(null=True, blank=True)
+    calificacion = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    archivada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha', 'hora', 'id'], name='citahist_fecha_hora_id'),
+            models.Index(fields=['doctor', 'estado', 'fecha', 'hora', 'id'], name='citahist_doctor_estado_fecha'),
+        ]
+
+    def __str__(self):
+        return f"{self.paciente} - {self.doctor} (archivada)"
+
+
+class RevisionPaciente(models.Model):
+    """
+    Nombre de paciente (normalizado) que vincular_pacientes no pudo asignar
+    solo: varios candidatos parecidos o uno con puntaje dudoso. Al resolverlo
+    se elige el paciente (o se descarta) y la próxima pasada lo aplica.
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('resuelta', 'Resuelta'),
+        ('descartada', 'Descartada'),
+    ]
+
+    texto = models.CharField(max_length=100, unique=True)
+    ejemplo = models.CharField(max_length=100)
+    candidatos = models.JSONField(default=list)  # [{"id", "nombre", "puntaje"}]
+    citas = models.PositiveIntegerField(default=0)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    paciente = models.ForeignKey(Paciente, on_delete=models.SET_NULL, null=True, blank=True)
+    creada = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.ejemplo} ({self.get_estado_display()})"
+
+
+class ProgresoTarea(models.Model):
+    """Último id procesado por una tarea por lotes, para poder reanudarla."""
+    tarea = models.CharField(max_length=50, unique=True)
+    ultimo_id = models.BigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.tarea}: {self.ultimo_id}"
+
+
+class Secuencia(models.Model):
+    """
+    Contador compartido por todos los procesos (versión de las colas en
+    memoria, números de eventos por canal). Vive en la base y no en la caché: con LocMemCache cada worker
+    tendría el suyo y no vería los cambios de los demás.
+    """
+    nombre = models.CharField(max_length=50, unique=True)
+    ultimo = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.nombre}: {self.ultimo}"
+
+
+class EventoTablero(models.Model):
+    """Evento de un canal (colas, camas, turnos) para las páginas abiertas, ver eventos.py."""
+    canal = models.CharField(max_length=30)
+    numero = models.BigIntegerField()
+    tipo = models.CharField(max_length=30)
+    datos = models.JSONField(encoder=DjangoJSONEncoder)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['canal', 'numero'], name='evento_unico_canal_numero'),
+        ]
+
+    def __str__(self):
+        return f"{self.canal} #{self.numero} {self.tipo}"
+
+
+class SecuenciaAtencion(models.Model):
+    """
+    Último número de atención entregado por departamento y día. Se reserva
+    con un UPDATE ultimo = ultimo + n (bloquea solo esta fila) en lugar de
+    contar las citas existentes.
+    """
+    departamento = models.CharField(max_length=50)
+    fecha = models.DateField()
+    ultimo = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['departamento', 'fecha'], name='secuencia_unica_departamento_fecha'),
+        ]
+
+    def __str__(self):
+        return f"{self.departamento} {self.fecha}: {self.ultimo}"
+
+
 # ============================
 # 7️⃣ HABITACIONES Y CAMAS
 # ============================
@@ -202,6 +382,11 @@ class Habitacion(models.Model):
         default='disponible'
     )
 
+    # Crear su fila de censo o moverla de departamento va en la misma transacción
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f'Habitación {self.numero} ({self.tipo} - {self.departamento})'
 
@@ -222,10 +407,45 @@ class Cama(models.Model):
     )
     estado = models.CharField(max_length=20, choices=ESTADOS, default="disponible")
 
+    # El censo (censo.py) se ajusta desde las señales: dentro de la misma
+    # transacción que el cambio de la cama (delete() ya es atómico)
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Cama {self.codigo} - Hab. {self.habitacion.numero}"
 
 
+class ContadoresCamas(models.Model):
+    """Camas por estado; los nombres de los campos son los estados de Cama."""
+    disponible = models.IntegerField(default=0)
+    ocupada = models.IntegerField(default=0)
+    limpieza = models.IntegerField(default=0)
+    bloqueada = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total(self):
+        return self.disponible + self.ocupada + self.limpieza + self.bloqueada
+
+
+class CensoHabitacion(ContadoresCamas):
+    habitacion = models.OneToOneField(Habitacion, on_delete=models.CASCADE, primary_key=True, related_name='censo')
+
+    def __str__(self):
+        return f"Censo {self.habitacion_id}: {self.disponible} disponibles"
+
+
+class CensoDepartamento(ContadoresCamas):
+    departamento = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return f"Censo {self.departamento}: {self.disponible} disponibles"
+
+
 from gestion_pacientes.models import Paciente  # Importa el nuevo modelo
 
 class AsignacionCama(models.Model):
@@ -234,6 +454,13 @@ class AsignacionCama(models.Model):
     fecha_ingreso = models.DateTimeField(auto_now_add=True)
     fecha_salida = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Barrido diario de ingresos y egresos (ocupacion.py)
+            models.Index(fields=['fecha_ingreso'], name='asignacion_ingreso'),
+            models.Index(fields=['fecha_salida'], name='asignacion_salida'),
+        ]
+
     def __str__(self):
         return f"{self.paciente} → {self.cama}"
 
@@ -243,10 +470,59 @@ class ListaEspera(models.Model):
     departamento = models.CharField(max_length=50)
     fecha_registro = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Cola FIFO por departamento (asignacion_camas.devolver_a_servicio)
+            models.Index(fields=['departamento', 'fecha_registro'], name='espera_departamento_fecha'),
+        ]
+        constraints = [
+            # Un lugar por paciente y departamento (verificar_camas_disponibles usa get_or_create)
+            models.UniqueConstraint(fields=['paciente', 'departamento'], name='espera_unica_paciente_departamento'),
+        ]
+
     def __str__(self):
         return f"{self.paciente.nombre} - {self.departamento}"
 
 
+class CensoDiario(models.Model):
+    """Censo de medianoche por departamento, consolidado cada noche desde AsignacionCama (ocupacion.py)."""
+    fecha = models.DateField()
+    departamento = models.CharField(max_length=50)
+    ingresos = models.IntegerField(default=0)
+    egresos = models.IntegerField(default=0)
+    ocupadas = models.IntegerField(default=0)  # pacientes internados al cerrar el día
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'departamento'], name='censo_diario_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.departamento}: {self.ocupadas} ocupadas"
+
+
+class EstanciaMensual(models.Model):
+    """Duración de las estancias cerradas en el mes (por fecha de salida): total y distribución."""
+    mes = models.DateField()  # primer día del mes
+    departamento = models.CharField(max_length=50)
+    egresos = models.IntegerField(default=0)
+    minutos = models.BigIntegerField(default=0)  # suma de las estancias, para el promedio exacto
+    hasta_1_dia = models.IntegerField(default=0)
+    hasta_3_dias = models.IntegerField(default=0)
+    hasta_7_dias = models.IntegerField(default=0)
+    hasta_14_dias = models.IntegerField(default=0)
+    hasta_30_dias = models.IntegerField(default=0)
+    mas_de_30_dias = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mes', 'departamento'], name='estancia_mensual_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.mes:%Y-%m} {self.departamento}: {self.egresos} egresos"
+
+
 # ============================
 # 8️⃣ MEDICAMENTOS
 # ============================
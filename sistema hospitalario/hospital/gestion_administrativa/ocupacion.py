@@ -0,0 +1,225 @@
+# gestion_administrativa/ocupacion.py
+
+# --------------------------
+# Censo diario histórico y duración de estancias (consolidado incremental)
+# --------------------------
+# Cada noche se consolidan los días cerrados desde el último procesado:
+#   ingresos  = asignaciones con fecha_ingreso ese día
+#   egresos   = asignaciones con fecha_salida ese día (su duración suma en
+#               EstanciaMensual del mes de salida)
+#   ocupadas  = ocupadas del día anterior + ingresos - egresos
+# Solo se leen las estancias que empezaron o terminaron en los días nuevos
+# (dos rangos indexados); las que siguen abiertas van en el arrastre de
+# "ocupadas". ProgresoTarea guarda el último día cerrado (date.toordinal()).
+# Un día sin movimientos ni pacientes no deja fila: cuenta como cero.
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F, Min, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+TAREA = 'ocupacion'
+DIAS_POR_LOTE = 31  # días consolidados por transacción (la primera pasada recorre todo el historial)
+MINUTOS_DIA = 24 * 60
+
+# (límite en días, campo de EstanciaMensual); None = sin límite
+TRAMOS_ESTANCIA = [
+    (1, 'hasta_1_dia'),
+    (3, 'hasta_3_dias'),
+    (7, 'hasta_7_dias'),
+    (14, 'hasta_14_dias'),
+    (30, 'hasta_30_dias'),
+    (None, 'mas_de_30_dias'),
+]
+
+
+def tramo_estancia(minutos):
+    for limite, campo in TRAMOS_ESTANCIA:
+        if limite is None or minutos <= limite * MINUTOS_DIA:
+            return campo
+
+
+def _inicio_del_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def _ultimo_cerrado():
+    """Último día consolidado, o None si nunca se corrió."""
+    from .models import ProgresoTarea  # importación local para evitar ciclo
+
+    ultimo = ProgresoTarea.objects.filter(tarea=TAREA).values_list('ultimo_id', flat=True).first()
+    return date.fromordinal(ultimo) if ultimo else None
+
+
+# --------------------------
+# Consolidación
+# --------------------------
+def _consolidar_dias(desde, hasta, ocupadas):
+    """Escribe CensoDiario y suma EstanciaMensual de [desde, hasta]. Retorna las ocupadas al cierre de `hasta`."""
+    from .models import AsignacionCama, CensoDiario, EstanciaMensual  # importación local para evitar ciclo
+
+    inicio, fin = _inicio_del_dia(desde), _inicio_del_dia(hasta + timedelta(days=1))
+    ingresos, egresos = Counter(), Counter()
+    estancias = defaultdict(Counter)
+
+    for entrada, departamento in AsignacionCama.objects.filter(
+        fecha_ingreso__gte=inicio, fecha_ingreso__lt=fin
+    ).values_list('fecha_ingreso', 'cama__habitacion__departamento').iterator(chunk_size=5000):
+        ingresos[timezone.localdate(entrada), departamento] += 1
+
+    for entrada, salida, departamento in AsignacionCama.objects.filter(
+        fecha_salida__gte=inicio, fecha_salida__lt=fin
+    ).values_list('fecha_ingreso', 'fecha_salida', 'cama__habitacion__departamento').iterator(chunk_size=5000):
+        dia = timezone.localdate(salida)
+        egresos[dia, departamento] += 1
+        minutos = max(int((salida - entrada).total_seconds() // 60), 0)
+        estancia = estancias[dia.replace(day=1), departamento]
+        estancia['egresos'] += 1
+        estancia['minutos'] += minutos
+        estancia[tramo_estancia(minutos)] += 1
+
+    departamentos_del_dia = defaultdict(set)
+    for dia, departamento in list(ingresos) + list(egresos):
+        departamentos_del_dia[dia].add(departamento)
+
+    filas = []
+    dia = desde
+    while dia <= hasta:
+        for departamento in set(ocupadas) | departamentos_del_dia[dia]:
+            entran, salen = ingresos[dia, departamento], egresos[dia, departamento]
+            ocupadas[departamento] = ocupadas.get(departamento, 0) + entran - salen
+            if ocupadas[departamento] or entran or salen:
+                filas.append(CensoDiario(
+                    fecha=dia, departamento=departamento,
+                    ingresos=entran, egresos=salen, ocupadas=ocupadas[departamento],
+                ))
+        ocupadas = {d: n for d, n in ocupadas.items() if n}
+        dia += timedelta(days=1)
+    CensoDiario.objects.bulk_create(filas, batch_size=1000)
+
+    for (mes, departamento), sumas in estancias.items():
+        fila, _ = EstanciaMensual.objects.get_or_create(mes=mes, departamento=departamento)
+        EstanciaMensual.objects.filter(pk=fila.pk).update(**{campo: F(campo) + n for campo, n in sumas.items()})
+    return ocupadas
+
+
+def consolidar(hasta=None, reiniciar=False, al_avanzar=None):
+    """
+    Consolida los días cerrados pendientes hasta `hasta` (por defecto y como
+    máximo ayer: un día consolidado no se vuelve a leer, así que hoy o una
+    fecha futura quedarían incompletos para siempre), en transacciones de
+    DIAS_POR_LOTE días: si se corta, retoma donde quedó.
+    reiniciar=True borra lo consolidado y recorre todo el historial.
+    al_avanzar(desde, hasta) se llama tras cada lote. Retorna los días consolidados.
+    """
+    from .models import AsignacionCama, CensoDiario, EstanciaMensual, ProgresoTarea  # importación local para evitar ciclo
+
+    ayer = timezone.localdate() - timedelta(days=1)
+    hasta = min(hasta, ayer) if hasta else ayer
+    if reiniciar:
+        with transaction.atomic():
+            CensoDiario.objects.all().delete()
+            EstanciaMensual.objects.all().delete()
+            ProgresoTarea.objects.filter(tarea=TAREA).update(ultimo_id=0)
+    progreso, _ = ProgresoTarea.objects.get_or_create(tarea=TAREA)
+
+    ultimo = _ultimo_cerrado()
+    if ultimo:
+        desde = ultimo + timedelta(days=1)
+    else:
+        primero = AsignacionCama.objects.aggregate(primero=Min('fecha_ingreso'))['primero']
+        if primero is None:
+            return 0
+        desde = timezone.localdate(primero)
+
+    ocupadas = dict(
+        CensoDiario.objects.filter(fecha=desde - timedelta(days=1)).values_list('departamento', 'ocupadas')
+    )
+    dias = 0
+    while desde <= hasta:
+        fin = min(hasta, desde + timedelta(days=DIAS_POR_LOTE - 1))
+        with transaction.atomic():
+            ocupadas = _consolidar_dias(desde, fin, ocupadas)
+            ProgresoTarea.objects.filter(pk=progreso.pk).update(ultimo_id=fin.toordinal())
+        dias += (fin - desde).days + 1
+        if al_avanzar:
+            al_avanzar(desde, fin)
+        desde = fin + timedelta(days=1)
+    return dias
+
+
+# --------------------------
+# Lectura para reportes
+# --------------------------
+def resumen(desde, hasta, departamento=None):
+    """
+    Ocupación y estancias entre dos fechas, solo desde las tablas consolidadas
+    (una fila por departamento y día, una por departamento y mes): responde
+    igual de rápido para una semana que para varios años.
+    """
+    from .models import CensoDepartamento, CensoDiario, EstanciaMensual  # importación local para evitar ciclo
+
+    cerrado = _ultimo_cerrado()
+    if cerrado:
+        hasta = min(hasta, cerrado)
+    dias = max((hasta - desde).days + 1, 0)
+
+    censo = CensoDiario.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+    estancias = EstanciaMensual.objects.filter(mes__gte=desde.replace(day=1), mes__lte=hasta)
+    if departamento:
+        censo = censo.filter(departamento=departamento)
+        estancias = estancias.filter(departamento=departamento)
+
+    campos_estancia = ['egresos', 'minutos'] + [campo for _, campo in TRAMOS_ESTANCIA]
+    # Los totales se nombran suma_<campo>: un annotate no puede llamarse igual que un campo
+    por_estancia = {
+        fila['departamento']: {c: fila[f'suma_{c}'] or 0 for c in campos_estancia}
+        for fila in estancias.values('departamento').annotate(**{f'suma_{c}': Sum(c) for c in campos_estancia})
+    }
+    camas = {fila.departamento: fila.total for fila in CensoDepartamento.objects.all()}  # camas actuales
+
+    departamentos = []
+    for fila in censo.values('departamento').annotate(
+        dias_paciente=Sum('ocupadas'), total_ingresos=Sum('ingresos'), total_egresos=Sum('egresos')
+    ).order_by('departamento'):
+        estancia = por_estancia.get(fila['departamento'], {})
+        promedio = fila['dias_paciente'] / dias if dias else 0
+        total_camas = camas.get(fila['departamento'], 0)
+        departamentos.append({
+            **fila,
+            'promedio_ocupadas': round(promedio, 1),
+            'camas': total_camas,
+            'ocupacion': round(100 * promedio / total_camas, 1) if total_camas else None,
+            'estancia_promedio': (
+                round(estancia['minutos'] / estancia['egresos'] / MINUTOS_DIA, 1) if estancia.get('egresos') else None
+            ),
+            'distribucion': [estancia.get(campo) or 0 for _, campo in TRAMOS_ESTANCIA],
+        })
+
+    meses = []
+    for fila in censo.annotate(mes=TruncMonth('fecha')).values('mes').annotate(
+        dias_paciente=Sum('ocupadas'), total_ingresos=Sum('ingresos'), total_egresos=Sum('egresos')
+    ).order_by('mes'):
+        primero = max(fila['mes'], desde)
+        siguiente = (fila['mes'] + timedelta(days=32)).replace(day=1)
+        dias_mes = (min(siguiente - timedelta(days=1), hasta) - primero).days + 1
+        meses.append({**fila, 'promedio_ocupadas': round(fila['dias_paciente'] / dias_mes, 1)})
+
+    egresos = sum(e['egresos'] for e in por_estancia.values())
+    minutos = sum(e['minutos'] for e in por_estancia.values())
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'dias': dias,
+        'consolidado_hasta': cerrado,
+        'departamentos': departamentos,
+        'meses': meses,
+        'promedio_ocupadas': round(sum(d['dias_paciente'] for d in departamentos) / dias, 1) if dias else 0,
+        'egresos': egresos,
+        'estancia_promedio': round(minutos / egresos / MINUTOS_DIA, 1) if egresos else None,
+        'distribucion': [
+            (campo, sum(e[campo] for e in por_estancia.values())) for _, campo in TRAMOS_ESTANCIA
+        ],
+    }
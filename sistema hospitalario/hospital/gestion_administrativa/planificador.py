@@ -0,0 +1,252 @@
+# gestion_administrativa/planificador.py
+
+# --------------------------
+# Planificador de descansos y desfases de rotación
+# --------------------------
+import random
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.db import transaction
+
+from .utils import HORARIOS_POR_GRUPO
+
+PASADAS_DESFASE = 3
+ITERACIONES_EQUIDAD_POR_EMPLEADO = 20
+MAX_FALTANTES_REPORTADOS = 50
+
+# Datos mínimos de un empleado para el planificador (serializable para el pool de procesos)
+EmpleadoPlan = namedtuple('EmpleadoPlan', ['id', 'cargo', 'departamento', 'grupo', 'rotacion'])
+
+
+def empleados_para_plan(empleados):
+    """Convierte Empleados a EmpleadoPlan; los que no tienen rotación se omiten."""
+    resultado = []
+    for emp in empleados:
+        turnos = HORARIOS_POR_GRUPO.get(emp.cargo, {}).get(emp.grupo_cargo)
+        if not turnos:
+            continue
+        rotacion = tuple(f"{t['hora_inicio']}-{t['hora_fin']}" for t in turnos)
+        resultado.append(EmpleadoPlan(emp.id, emp.cargo, emp.departamento, emp.grupo_cargo, rotacion))
+    return resultado
+
+
+def _turno(e, semana, desfase):
+    return e.rotacion[(semana + desfase) % len(e.rotacion)]
+
+
+def _minimo(minimos, minimo_defecto, cargo, turno):
+    """Mínimo por (cargo, turno), luego por cargo, luego el valor por defecto."""
+    return minimos.get((cargo, turno), minimos.get(cargo, minimo_defecto))
+
+
+def _deficit_turno(n, minimo):
+    """
+    Déficit total de la semana para un turno con n personas cuando los n
+    descansos se reparten lo más parejo posible entre los 7 días.
+    """
+    if minimo <= 0:
+        return 0
+    bajo, resto = divmod(n, 7)  # 'resto' días con bajo+1 descansos, el resto con 'bajo'
+    return resto * max(0, minimo - (n - bajo - 1)) + (7 - resto) * max(0, minimo - (n - bajo))
+
+
+# --------------------------
+# 1. Desfases: repartir al personal entre los turnos de la rotación
+# --------------------------
+def _asignar_desfases(empleados, semanas, minimo_de, rng):
+    """
+    Descenso por coordenadas: cada empleado toma el desfase que más reduce el
+    déficit de cobertura; si ninguno mejora, conserva el actual (sin desfase).
+    """
+    desfases = {e.id: 0 for e in empleados}
+    conteo = defaultdict(int)  # (semana, departamento, cargo, turno) -> personas
+    for e in empleados:
+        for w in semanas:
+            conteo[(w, e.departamento, e.cargo, _turno(e, w, 0))] += 1
+
+    orden = [e for e in empleados if len(e.rotacion) > 1]
+    for _ in range(PASADAS_DESFASE):
+        rng.shuffle(orden)
+        hubo_cambios = False
+        for e in orden:
+            actual = desfases[e.id]
+            for w in semanas:
+                conteo[(w, e.departamento, e.cargo, _turno(e, w, actual))] -= 1
+
+            mejor, mejor_clave = actual, None
+            for d in range(len(e.rotacion)):
+                ganancia = 0
+                for w in semanas:
+                    turno = _turno(e, w, d)
+                    n = conteo[(w, e.departamento, e.cargo, turno)]
+                    m = minimo_de(e.cargo, turno)
+                    ganancia += _deficit_turno(n + 1, m) - _deficit_turno(n, m)
+                clave = (ganancia, d != actual)
+                if mejor_clave is None or clave < mejor_clave:
+                    mejor, mejor_clave = d, clave
+
+            for w in semanas:
+                conteo[(w, e.departamento, e.cargo, _turno(e, w, mejor))] += 1
+            if mejor != actual:
+                desfases[e.id] = mejor
+                hubo_cambios = True
+        if not hubo_cambios:
+            break
+    return desfases
+
+
+# --------------------------
+# 2. Descansos: repartir parejo dentro de cada turno y semana
+# --------------------------
+def _asignar_descansos(empleados, semanas, desfases, rng):
+    """
+    Cada empleado descansa el día con menos descansos ya asignados en su turno
+    (maximiza la cobertura mínima); a igualdad, el día en que menos ha
+    descansado antes (equidad).
+    """
+    historial = {e.id: [0] * 7 for e in empleados}
+    descansos = {e.id: {} for e in empleados}
+    grupos_semana = []  # [(semana, clave_turno, miembros, descansos_por_dia)]
+
+    for w in semanas:
+        por_turno = defaultdict(list)
+        for e in empleados:
+            por_turno[(e.departamento, e.cargo, _turno(e, w, desfases[e.id]))].append(e)
+
+        for clave, miembros in por_turno.items():
+            rng.shuffle(miembros)
+            por_dia = [0] * 7
+            for e in miembros:
+                h = historial[e.id]
+                dia = min(range(7), key=lambda s: (por_dia[s], h[s], rng.random()))
+                por_dia[dia] += 1
+                h[dia] += 1
+                descansos[e.id][w] = dia
+            grupos_semana.append((w, clave, miembros, por_dia))
+
+    return descansos, historial, grupos_semana
+
+
+def _mejorar_equidad(descansos, historial, grupos_semana, iteraciones, rng):
+    """
+    Intercambia días de descanso entre dos personas del mismo turno y semana:
+    la cobertura no cambia y se reduce la suma de cuadrados del historial.
+    """
+    candidatos = [(w, miembros) for w, _, miembros, _ in grupos_semana if len(miembros) > 1]
+    if not candidatos:
+        return
+    for _ in range(iteraciones):
+        w, miembros = rng.choice(candidatos)
+        a, b = rng.sample(miembros, 2)
+        da, db = descansos[a.id][w], descansos[b.id][w]
+        if da == db:
+            continue
+        ha, hb = historial[a.id], historial[b.id]
+        antes = ha[da] ** 2 + ha[db] ** 2 + hb[db] ** 2 + hb[da] ** 2
+        despues = (ha[da] - 1) ** 2 + (ha[db] + 1) ** 2 + (hb[db] - 1) ** 2 + (hb[da] + 1) ** 2
+        if despues < antes:
+            ha[da] -= 1
+            ha[db] += 1
+            hb[db] -= 1
+            hb[da] += 1
+            descansos[a.id][w], descansos[b.id][w] = db, da
+
+
+# --------------------------
+# Resolución
+# --------------------------
+def resolver_plan(empleados, semanas, minimos=None, minimo_defecto=1, semilla=0):
+    """
+    Calcula desfases y días de descanso para los empleados en las semanas dadas.
+
+    minimos: {cargo: n} o {(cargo, 'HH:MM-HH:MM'): n} con el personal mínimo por
+    turno y día en cada departamento.
+
+    Retorna un dict con 'desfases' {id: d}, 'descansos' {id: {semana: dia}},
+    'deficit' (personas-turno faltantes), 'penalizacion' (equidad, menor es
+    mejor) y 'faltantes' (detalle de los turnos sin cobertura mínima).
+    """
+    minimos = minimos or {}
+    semanas = sorted(semanas)
+    rng = random.Random(semilla)
+    minimo_de = partial(_minimo, minimos, minimo_defecto)
+
+    desfases = _asignar_desfases(empleados, semanas, minimo_de, rng)
+    descansos, historial, grupos_semana = _asignar_descansos(empleados, semanas, desfases, rng)
+    _mejorar_equidad(
+        descansos, historial, grupos_semana,
+        ITERACIONES_EQUIDAD_POR_EMPLEADO * len(empleados), rng
+    )
+
+    deficit = 0
+    faltantes = []
+    for w, (dep, cargo, turno), miembros, por_dia in grupos_semana:
+        m = minimo_de(cargo, turno)
+        for dia in range(7):
+            faltan = m - (len(miembros) - por_dia[dia])
+            if faltan > 0:
+                deficit += faltan
+                if len(faltantes) < MAX_FALTANTES_REPORTADOS:
+                    faltantes.append({
+                        'semana': w, 'dia': dia, 'departamento': dep,
+                        'cargo': cargo, 'turno': turno, 'faltan': faltan,
+                    })
+
+    penalizacion = sum(c * c for h in historial.values() for c in h)
+    return {
+        'semilla': semilla,
+        'deficit': deficit,
+        'penalizacion': penalizacion,
+        'desfases': desfases,
+        'descansos': descansos,
+        'faltantes': faltantes,
+    }
+
+
+def resolver_plan_paralelo(empleados, semanas, minimos=None, minimo_defecto=1, semillas=4, procesos=None):
+    """
+    Prueba varias semillas (en un pool de procesos si procesos > 1) y se queda
+    con el plan de menor déficit y, a igualdad, el más equitativo.
+    """
+    tarea = partial(resolver_plan, empleados, semanas, minimos, minimo_defecto)
+    lista_semillas = list(range(semillas))
+
+    if procesos and procesos > 1 and semillas > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            planes = list(pool.map(tarea, lista_semillas))
+    else:
+        planes = [tarea(s) for s in lista_semillas]
+
+    return min(planes, key=lambda p: (p['deficit'], p['penalizacion']))
+
+
+def guardar_plan(plan, empleados):
+    """Guarda el plan en PlanDescanso (inserción/actualización por lotes) e invalida calendarios."""
+    from .models import PlanDescanso  # importación local para evitar ciclo
+    from .cache_turnos import invalidar_grupo
+
+    filas = [
+        PlanDescanso(
+            empleado_id=e.id,
+            semana=semana,
+            dia_descanso=dia,
+            desfase=plan['desfases'][e.id],
+        )
+        for e in empleados
+        for semana, dia in plan['descansos'][e.id].items()
+    ]
+
+    with transaction.atomic():
+        PlanDescanso.objects.bulk_create(
+            filas,
+            batch_size=1000,
+            update_conflicts=True,
+            update_fields=['dia_descanso', 'desfase'],
+            unique_fields=['empleado', 'semana'],
+        )
+
+    for dep, grupo in {(e.departamento, e.grupo) for e in empleados}:
+        invalidar_grupo(dep, grupo)
+    return len(filas)
@@ -0,0 +1,122 @@
+# gestion_administrativa/propagacion.py
+
+# --------------------------
+# Propagación incremental de cambios de turnos
+# --------------------------
+# En lugar de invalidar las grillas del grupo completo, un cambio de un solo
+# empleado (grupo, estado o un TurnoEmpleado) recalcula su fila en cada mes
+# en caché y ajusta la cobertura del departamento por diferencias:
+#
+#   antes = capturar(empleado)      # antes de guardar
+#   ...guardar...
+#   propagar(empleado, antes)       # después de guardar
+from datetime import timedelta
+
+from .cache_turnos import (
+    marcar_cambio,
+    meses_en_cache,
+    parchar_cobertura,
+    parchar_empleado_calendario,
+)
+from .cobertura import aporte_empleado
+from .eventos import publicar
+from .turnos import fechas_del_mes
+
+CANAL_TURNOS = 'turnos'
+
+
+def meses_de_turno(fecha):
+    """Meses afectados por un turno: el suyo y el siguiente (un turno nocturno del último día cruza de mes)."""
+    siguiente = fecha + timedelta(days=1)
+    return {(fecha.year, fecha.month), (siguiente.year, siguiente.month)}
+
+
+def _filtrar(meses, solo):
+    return meses if solo is None else meses & solo
+
+
+def _aportes(empleado, meses):
+    aportes = {}
+    for year, month in meses:
+        fechas = fechas_del_mes(year, month)
+        aportes[(year, month)] = aporte_empleado(empleado, fechas[0], fechas[-1])
+    return aportes
+
+
+def capturar(empleado, meses=None):
+    """
+    Estado de un empleado antes de un cambio: departamento, grupo, cargo,
+    si está activo y su aporte a cada cobertura mensual en caché.
+    meses limita los meses considerados (None = todos los que están en caché).
+    """
+    activo = empleado.estado == 'Activo'
+    meses_cobertura = _filtrar(meses_en_cache("cobertura", empleado.departamento), meses)
+    return {
+        "departamento": empleado.departamento,
+        "grupo": empleado.grupo_cargo,
+        "cargo": empleado.cargo,
+        "activo": activo,
+        "aportes": _aportes(empleado, meses_cobertura) if activo else {},
+    }
+
+
+def sin_estado(empleado):
+    """Estado 'antes' de un empleado recién creado."""
+    return {
+        "departamento": empleado.departamento,
+        "grupo": empleado.grupo_cargo,
+        "cargo": empleado.cargo,
+        "activo": False,
+        "aportes": {},
+    }
+
+
+def propagar(empleado, antes, meses=None, eliminado=False):
+    """
+    Aplica el cambio de un empleado a las cachés y publica los eventos para
+    los calendarios abiertos. Solo recalcula las celdas (empleado, mes) y la
+    cobertura de los meses que están en caché.
+    """
+    activo = not eliminado and empleado.estado == 'Activo'
+    viejo = (antes["departamento"], antes["grupo"])
+    nuevo = (empleado.departamento, empleado.grupo_cargo)
+    cambia_grupo = viejo != nuevo
+
+    # 1. Calendarios: quitar del grupo anterior, recalcular la fila en el actual
+    if antes["activo"] and (cambia_grupo or not activo):
+        for year, month in _filtrar(meses_en_cache("calendario", *viejo), meses):
+            parchar_empleado_calendario(*viejo, empleado, year, month, quitar=True)
+        publicar(CANAL_TURNOS, "empleado", {
+            "departamento": viejo[0], "grupo": viejo[1], "empleado_id": empleado.id, "accion": "sale",
+        })
+
+    if activo:
+        entra = cambia_grupo or not antes["activo"]
+        for year, month in _filtrar(meses_en_cache("calendario", *nuevo), meses):
+            fila = parchar_empleado_calendario(*nuevo, empleado, year, month)
+            if fila is not None and not entra:
+                publicar(CANAL_TURNOS, "celdas", {
+                    "departamento": nuevo[0], "grupo": nuevo[1], "year": year, "month": month,
+                    "empleado_id": empleado.id,
+                    "celdas": {
+                        fecha.isoformat(): {"horario": celda["horario"], "turno_id": celda["turno_id"]}
+                        for fecha, celda in fila.items()
+                    },
+                })
+        if entra:
+            publicar(CANAL_TURNOS, "empleado", {
+                "departamento": nuevo[0], "grupo": nuevo[1], "empleado_id": empleado.id, "accion": "entra",
+            })
+
+    # 2. Cobertura: restar el aporte anterior y sumar el nuevo
+    for (year, month), serie in antes["aportes"].items():
+        parchar_cobertura(antes["departamento"], antes["cargo"], year, month, [-n for n in serie])
+    if activo:
+        meses_cobertura = _filtrar(meses_en_cache("cobertura", empleado.departamento), meses)
+        for (year, month), serie in _aportes(empleado, meses_cobertura).items():
+            parchar_cobertura(empleado.departamento, empleado.cargo, year, month, serie)
+
+    # 3. Feeds .ics y demás validaciones condicionales
+    marcar_cambio(*viejo)
+    if cambia_grupo:
+        marcar_cambio(*nuevo)
@@ -1,21 +1,15 @@
 # gestion_administrativa/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, pre_save, post_delete, pre_delete
 from django.dispatch import receiver
-from datetime import datetime, timedelta
-from .models import Empleado, TurnoEmpleado
-from .utils import TURNOS_PREDETERMINADOS
-from django.utils import timezone
-
-# Mapeo de días para generar fechas reales
-DIAS_SEMANA = {
-    'Lunes': 0,
-    'Martes': 1,
-    'Miércoles': 2,
-    'Jueves': 3,
-    'Viernes': 4,
-    'Sábado': 5,
-    'Domingo': 6,
-}
+from .models import Cama, CensoHabitacion, Cita, Empleado, Habitacion, TurnoEmpleado
+from .agenda import mover_reserva, reserva_de_cita
+from .censo import datos_cama, mover_cama, mover_habitacion, publicar_baja_cama, publicar_cama
+from .colas import baja_de_cita, cambio_de_cita
+from .estimacion import registrar_consulta
+from .turnos import turnos_iniciales
+from .propagacion import capturar, meses_de_turno, propagar, sin_estado
+
 
 @receiver(post_save, sender=Empleado)
 def asignar_turnos_automaticos(sender, instance, created, **kwargs):
@@ -23,21 +17,159 @@ def asignar_turnos_automaticos(sender, instance, created, **kwargs):
     Cuando se crea un empleado, le asignamos sus turnos automáticamente
     en base a su cargo y el diccionario TURNOS_PREDETERMINADOS.
     """
-    if created and instance.cargo in TURNOS_PREDETERMINADOS:
-        config = TURNOS_PREDETERMINADOS[instance.cargo]
-        hora_inicio = datetime.strptime(config['horario_inicio'], "%H:%M").time()
-        hora_fin = datetime.strptime(config['horario_fin'], "%H:%M").time()
-
-        hoy = timezone.now().date()
-        for dia_nombre in config['dias']:
-            # Calculamos la fecha próxima para ese día
-            weekday_objetivo = DIAS_SEMANA[dia_nombre]
-            dias_a_sumar = (weekday_objetivo - hoy.weekday()) % 7
-            fecha_turno = hoy + timedelta(days=dias_a_sumar)
-
-            TurnoEmpleado.objects.create(
-                empleado=instance,
-                fecha=fecha_turno,
-                hora_inicio=hora_inicio,
-                hora_fin=hora_fin
-            )
+    if created:
+        # Una sola inserción para toda la semana
+        TurnoEmpleado.objects.bulk_create(turnos_iniciales(instance))
+
+
+# --------------------------
+# Propagación de cambios a calendarios y cobertura en caché
+# --------------------------
+@receiver(pre_save, sender=Empleado)
+@receiver(pre_delete, sender=Empleado)
+def capturar_empleado_anterior(sender, instance, **kwargs):
+    """Guarda el estado previo (grupo, cargo, aporte a la cobertura) para propagar solo la diferencia."""
+    instance._captura = None
+    if instance.pk:
+        anterior = Empleado.objects.filter(pk=instance.pk).first()
+        if anterior:
+            instance._captura = capturar(anterior)
+
+
+@receiver(post_save, sender=Empleado)
+def propagar_cambio_empleado(sender, instance, created, **kwargs):
+    captura = getattr(instance, '_captura', None) or sin_estado(instance)
+    transaction.on_commit(lambda: propagar(instance, captura))
+
+
+@receiver(post_delete, sender=Empleado)
+def propagar_baja_empleado(sender, instance, **kwargs):
+    captura = getattr(instance, '_captura', None) or sin_estado(instance)
+    transaction.on_commit(lambda: propagar(instance, captura, eliminado=True))
+
+
+def _capturar_turno(turno, anterior=None):
+    """[(empleado, meses, captura)] de los empleados afectados por el turno."""
+    meses = meses_de_turno(turno.fecha)
+    if anterior is not None:
+        meses |= meses_de_turno(anterior.fecha)
+    empleados = [turno.empleado]
+    if anterior is not None and anterior.empleado_id != turno.empleado_id:
+        empleados.append(anterior.empleado)
+    return [(emp, meses, capturar(emp, meses)) for emp in empleados]
+
+
+@receiver(pre_save, sender=TurnoEmpleado)
+def capturar_turno_anterior(sender, instance, **kwargs):
+    """Guarda el estado previo por si el turno se mueve de mes o de empleado."""
+    anterior = None
+    if instance.pk:
+        anterior = TurnoEmpleado.objects.filter(pk=instance.pk).select_related('empleado').first()
+    instance._capturas = _capturar_turno(instance, anterior)
+
+
+@receiver(pre_delete, sender=TurnoEmpleado)
+def capturar_turno_eliminado(sender, instance, **kwargs):
+    # Al borrar un empleado sus turnos se borran en cascada: ya lo propaga el empleado
+    if isinstance(kwargs.get('origin'), Empleado):
+        instance._capturas = []
+        return
+    instance._capturas = _capturar_turno(instance)
+
+
+@receiver(post_save, sender=TurnoEmpleado)
+@receiver(post_delete, sender=TurnoEmpleado)
+def propagar_cambio_turno(sender, instance, **kwargs):
+    """Recalcula las filas y la cobertura en caché al confirmar la transacción."""
+    capturas = getattr(instance, '_capturas', [])
+
+    def aplicar():
+        for empleado, meses, captura in capturas:
+            propagar(empleado, captura, meses=meses)
+
+    if capturas:
+        transaction.on_commit(aplicar)
+
+
+# --------------------------
+# Colas de espera, tiempos de consulta y horarios libres
+# --------------------------
+@receiver(post_init, sender=Cita)
+def recordar_estado_cita(sender, instance, **kwargs):
+    instance._estado_cargado = instance.estado
+    instance._reserva_cargada = reserva_de_cita(instance)
+
+
+@receiver(post_save, sender=Cita)
+def sincronizar_cola_cita(sender, instance, created, **kwargs):
+    """Actualiza las colas, publica el evento y suma la duración de la consulta al confirmar la transacción."""
+    anterior = None if created else instance._estado_cargado
+    if instance.estado != anterior or instance.estado == "en_espera":
+        transaction.on_commit(lambda: cambio_de_cita(instance, anterior))
+    if instance.estado == "atendida" and anterior != "atendida":
+        transaction.on_commit(lambda: registrar_consulta(instance))
+    instance._estado_cargado = instance.estado
+
+    # Índice de horarios libres: liberar el bloque anterior y ocupar el nuevo
+    antes = None if created else instance._reserva_cargada
+    despues = reserva_de_cita(instance)
+    if antes != despues:
+        transaction.on_commit(lambda: mover_reserva(antes, despues))
+    instance._reserva_cargada = despues
+
+
+@receiver(post_delete, sender=Cita)
+def quitar_cita_de_cola(sender, instance, **kwargs):
+    cita_id, anterior, reserva = instance.id, instance._estado_cargado, instance._reserva_cargada
+    transaction.on_commit(lambda: baja_de_cita(cita_id, anterior))
+    if reserva is not None:
+        transaction.on_commit(lambda: mover_reserva(reserva, None))
+
+
+# --------------------------
+# Censo de camas por habitación y departamento
+# --------------------------
+@receiver(post_init, sender=Cama)
+def recordar_estado_cama(sender, instance, **kwargs):
+    instance._censo_cargado = (instance.habitacion_id, instance.estado) if instance.pk else None
+
+
+@receiver(post_save, sender=Cama)
+def actualizar_censo_cama(sender, instance, created, **kwargs):
+    """Mueve la cama entre contadores dentro de la transacción de Cama.save() y avisa a los tableros."""
+    actual = (instance.habitacion_id, instance.estado)
+    mover_cama(None if created else instance._censo_cargado, actual)
+    instance._censo_cargado = actual
+    datos = datos_cama(instance)
+    transaction.on_commit(lambda: publicar_cama(datos))
+
+
+@receiver(post_delete, sender=Cama)
+def quitar_cama_del_censo(sender, instance, **kwargs):
+    mover_cama(instance._censo_cargado, None)
+    cama_id = instance.id
+    transaction.on_commit(lambda: publicar_baja_cama(cama_id))
+
+
+@receiver(post_init, sender=Habitacion)
+def recordar_departamento_habitacion(sender, instance, **kwargs):
+    instance._departamento_cargado = instance.departamento
+    instance._numero_cargado = instance.numero
+
+
+@receiver(post_save, sender=Habitacion)
+def actualizar_censo_habitacion(sender, instance, created, **kwargs):
+    if created:
+        CensoHabitacion.objects.create(habitacion=instance)
+    else:
+        mover_habitacion(instance.id, instance._departamento_cargado, instance.departamento)
+        if (instance.numero, instance.departamento) != (instance._numero_cargado, instance._departamento_cargado):
+            # Los tableros muestran número y departamento en cada cama de la habitación
+            camas = [datos_cama(cama) for cama in instance.camas.all()]
+
+            def avisar():
+                for datos in camas:
+                    publicar_cama(datos)
+            transaction.on_commit(avisar)
+    instance._departamento_cargado = instance.departamento
+    instance._numero_cargado = instance.numero
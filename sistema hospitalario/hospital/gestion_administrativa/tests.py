@@ -1,3 +1,132 @@
+from datetime import date
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from gestion_pacientes.models import Paciente
+
+from .agenda import proximos_libres
+from .asignacion_camas import LOTE_ESPERA, asignar, devolver_a_servicio, liberar
+from .forms import CitaForm
+from .models import AsignacionCama, Cama, Cita, Empleado, Habitacion, ListaEspera
+from .views import _guardar_cita
+
+
+def crear_paciente(ci):
+    return Paciente.objects.create(
+        nombre=f"Paciente {ci}", apellido_paterno="Prueba", ci=ci,
+        fecha_nacimiento=date(1990, 1, 1), genero='M',
+    )
+
+
+# --------------------------
+# Asignación de camas y lista de espera
+# --------------------------
+class AsignacionCamasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        habitacion = Habitacion.objects.create(numero="101", departamento="Cardiologia", tipo="General", capacidad=2)
+        self.cama = Cama.objects.create(codigo="C-101", habitacion=habitacion)
+        self.otra_cama = Cama.objects.create(codigo="C-102", habitacion=habitacion)
+
+    def test_asignar_cama_disponible(self):
+        paciente = crear_paciente("1")
+        ListaEspera.objects.create(paciente=paciente, departamento="Cardiologia")
+
+        asignacion, error = asignar(self.cama.id, paciente)
+
+        self.assertIsNone(error)
+        self.assertEqual(asignacion.cama_id, self.cama.id)
+        self.cama.refresh_from_db()
+        self.assertEqual(self.cama.estado, 'ocupada')
+        self.assertFalse(ListaEspera.objects.filter(paciente=paciente).exists())
+
+    def test_asignar_rechaza_cama_ocupada_y_paciente_con_cama(self):
+        paciente, otro = crear_paciente("1"), crear_paciente("2")
+        asignar(self.cama.id, paciente)
+
+        self.assertEqual(asignar(self.cama.id, otro), (None, "La cama no está disponible."))
+        asignacion, error = asignar(self.otra_cama.id, paciente)
+        self.assertIsNone(asignacion)
+        self.assertIn("ya tiene una cama asignada", error)
+
+    def test_devolver_a_servicio_asigna_la_entrada_mas_antigua(self):
+        internado, primero, segundo = crear_paciente("1"), crear_paciente("2"), crear_paciente("3")
+        asignacion, _ = asignar(self.cama.id, internado)
+        ListaEspera.objects.create(paciente=primero, departamento="Cardiologia")
+        ListaEspera.objects.create(paciente=segundo, departamento="Cardiologia")
+        liberar(asignacion.id)
+
+        cama, nueva, error = devolver_a_servicio(self.cama.id)
+
+        self.assertIsNone(error)
+        self.assertEqual(nueva.paciente_id, primero.id)
+        self.assertEqual(cama.estado, 'ocupada')
+        self.assertEqual(list(ListaEspera.objects.values_list('paciente_id', flat=True)), [segundo.id])
+
+    def test_devolver_a_servicio_salta_mas_de_un_lote_ya_internado(self):
+        # Las primeras LOTE_ESPERA + 1 entradas ya tienen cama por otra vía
+        internados = [crear_paciente(f"i{i}") for i in range(LOTE_ESPERA + 1)]
+        for paciente in internados:
+            ListaEspera.objects.create(paciente=paciente, departamento="Cardiologia")
+        for paciente in internados:
+            cama = Cama.objects.create(codigo=f"X-{paciente.ci}", habitacion=self.cama.habitacion, estado='ocupada')
+            AsignacionCama.objects.create(paciente=paciente, cama=cama)
+        esperando = crear_paciente("2")
+        ListaEspera.objects.create(paciente=esperando, departamento="Cardiologia")
+        Cama.objects.filter(id=self.cama.id).update(estado='limpieza')
+
+        cama, nueva, error = devolver_a_servicio(self.cama.id)
+
+        self.assertIsNone(error)
+        self.assertEqual(nueva.paciente_id, esperando.id)
+        self.assertFalse(ListaEspera.objects.exists())
+
+    def test_devolver_a_servicio_sin_espera_queda_disponible(self):
+        asignacion, _ = asignar(self.cama.id, crear_paciente("1"))
+        liberar(asignacion.id)
+
+        cama, nueva, error = devolver_a_servicio(self.cama.id)
+
+        self.assertIsNone(nueva)
+        self.assertIsNone(error)
+        self.assertEqual(cama.estado, 'disponible')
+        self.assertEqual(devolver_a_servicio(self.cama.id)[2], "La cama no está en proceso de limpieza.")
+
+
+# --------------------------
+# Citas: horario tomado entre la validación y el guardado
+# --------------------------
+class CitaHorarioOcupadoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = Empleado.objects.create(
+            nombre="Ana", apellido="Rojas", cargo='Medico', departamento="Cardiologia",
+            telefono="70000000", estado='Activo', grupo_cargo="Grupo 1",
+        )
+        self.fecha, self.hora, _ = proximos_libres([self.doctor], n=1)[0]
+
+    def _formulario(self):
+        return CitaForm(data={
+            'paciente': "Juan Pérez", 'doctor': self.doctor.id,
+            'fecha': self.fecha.isoformat(), 'hora': self.hora.strftime("%H:%M"), 'estado': 'pendiente',
+        })
+
+    def test_indice_unico_rechaza_y_sugiere_otro_horario(self):
+        form = self._formulario()
+        self.assertTrue(form.is_valid())
+        # Otra recepcionista guarda el mismo horario después de la validación
+        Cita.objects.create(paciente="Otra", doctor=self.doctor, fecha=self.fecha, hora=self.hora)
+
+        self.assertFalse(_guardar_cita(form))
+
+        self.assertIn("ya tiene una cita", form.errors['hora'][0])
+        self.assertIsNotNone(form.sugerencia)
+        self.assertNotEqual(form.sugerencia, (self.fecha, self.hora))
+        self.assertEqual(Cita.objects.filter(doctor=self.doctor, fecha=self.fecha, hora=self.hora).count(), 1)
+
+    def test_horario_libre_se_guarda(self):
+        form = self._formulario()
+        self.assertTrue(form.is_valid())
+        self.assertTrue(_guardar_cita(form))
+        self.assertEqual(Cita.objects.get().paciente, "Juan Pérez")
@@ -0,0 +1,321 @@
+# gestion_administrativa/turnos.py
+
+# --------------------------
+# Motor de calendario de turnos
+# --------------------------
+from datetime import date, datetime, timedelta
+from calendar import monthrange
+from functools import lru_cache
+
+from django.db import transaction
+from django.utils import timezone
+
+from .utils import calcular_turno_rotado, TURNOS_PREDETERMINADOS
+
+# Punto fijo desde el que se cuentan las semanas de rotación
+FECHA_BASE_ROTACION = date(2025, 1, 1)
+
+# Mapeo de días para generar fechas reales
+DIAS_SEMANA = {
+    'Lunes': 0,
+    'Martes': 1,
+    'Miércoles': 2,
+    'Jueves': 3,
+    'Viernes': 4,
+    'Sábado': 5,
+    'Domingo': 6,
+}
+
+
+def fechas_del_mes(year, month):
+    """Lista de fechas (date) del mes indicado."""
+    primer_dia = date(year, month, 1)
+    dias_en_mes = monthrange(year, month)[1]
+    return [primer_dia + timedelta(days=i) for i in range(dias_en_mes)]
+
+
+def semana_rotacion(empleado, primer_dia, idx):
+    """
+    Semana global de rotación para el día idx del mes.
+    Las semanas se cuentan en bloques de 7 días desde el inicio del mes.
+    """
+    fecha_inicio_rotacion = getattr(empleado, 'fecha_ingreso', FECHA_BASE_ROTACION)
+    semanas_globales = (primer_dia - fecha_inicio_rotacion).days // 7
+    return semanas_globales + idx // 7
+
+
+def semanas_del_rango(desde, hasta):
+    """Semanas de rotación (según semana_rotacion) que tocan el rango de fechas."""
+    semanas = set()
+    fecha = desde
+    while fecha <= hasta:
+        semanas.add((fecha.replace(day=1) - FECHA_BASE_ROTACION).days // 7 + (fecha.day - 1) // 7)
+        fecha += timedelta(days=1)
+    return semanas
+
+
+def cargar_planes(empleado_ids, desde, hasta):
+    """
+    Planes de descanso/desfase (PlanDescanso) del rango en una sola consulta.
+    Retorna {(empleado_id, semana): (dia_descanso, desfase)}.
+    """
+    from .models import PlanDescanso  # importación local para evitar ciclo
+
+    if not empleado_ids:
+        return {}
+    return {
+        (emp_id, semana): (dia, desfase)
+        for emp_id, semana, dia, desfase in PlanDescanso.objects.filter(
+            empleado_id__in=list(empleado_ids),
+            semana__in=semanas_del_rango(desde, hasta)
+        ).values_list('empleado_id', 'semana', 'dia_descanso', 'desfase')
+    }
+
+
+def es_dia_descanso(empleado, semana, idx, planes=None):
+    """
+    Día de descanso de la semana: el del plan (planificador) si existe;
+    si no, regla round-robin según el id del empleado.
+    """
+    plan = planes.get((empleado.id, semana)) if planes else None
+    if plan is not None:
+        return idx % 7 == plan[0]
+    return idx % 7 == (empleado.id + semana) % 7
+
+
+def turno_de_rotacion(empleado, semana, planes=None):
+    """Turno de rotación de la semana, aplicando el desfase del plan si existe."""
+    plan = planes.get((empleado.id, semana)) if planes else None
+    desfase = plan[1] if plan is not None else 0
+    return calcular_turno_rotado(empleado.cargo, empleado.grupo_cargo, semana + desfase)
+
+
+def turno_rotado_del_dia(empleado, fecha, planes=None):
+    """
+    Turno de rotación {hora_inicio, hora_fin} que le toca al empleado en la fecha,
+    o None si es su día de descanso o su cargo/grupo no tiene rotación.
+    """
+    primer_dia = fecha.replace(day=1)
+    idx = fecha.day - 1
+    semana = semana_rotacion(empleado, primer_dia, idx)
+    if es_dia_descanso(empleado, semana, idx, planes):
+        return None
+    return turno_de_rotacion(empleado, semana, planes)
+
+
+def celda_turno(empleado, primer_dia, idx, turno_manual=None, planes=None):
+    """
+    Calcula la celda {horario, turno_id, manual} de un día.
+    El turno manual (TurnoEmpleado) tiene prioridad sobre la rotación.
+    """
+    if turno_manual is not None:
+        t = turno_manual
+        if t.hora_inicio is None and t.hora_fin is None:
+            horario = "Descanso"
+        else:
+            horario = f"{t.hora_inicio} - {t.hora_fin}"
+        return {"horario": horario, "turno_id": t.id, "manual": True}
+
+    semana = semana_rotacion(empleado, primer_dia, idx)
+    if es_dia_descanso(empleado, semana, idx, planes):
+        horario = "Descanso"
+    else:
+        turno = turno_de_rotacion(empleado, semana, planes)
+        horario = f"{turno['hora_inicio']} - {turno['hora_fin']}" if turno else "—"
+    return {"horario": horario, "turno_id": None, "manual": False}
+
+
+def turnos_manuales_del_mes(empleados, year, month):
+    """
+    Carga en UNA sola consulta los TurnoEmpleado del mes para todos los empleados.
+    Retorna {empleado_id: {fecha: turno}}.
+    """
+    from .models import TurnoEmpleado  # importación local para evitar ciclo
+
+    fechas = fechas_del_mes(year, month)
+    ids = [emp.id for emp in empleados]
+
+    manuales = {emp_id: {} for emp_id in ids}
+    if not ids:
+        return manuales
+
+    turnos = TurnoEmpleado.objects.filter(
+        empleado_id__in=ids,
+        fecha__range=(fechas[0], fechas[-1])
+    )
+    for t in turnos:
+        manuales[t.empleado_id][t.fecha] = t
+    return manuales
+
+
+def construir_calendario(empleados, year, month):
+    """
+    Construye la grilla mensual de turnos para uno o varios empleados.
+    Retorna {empleado_id: {fecha: {"horario", "turno_id", "manual"}}}.
+    """
+    empleados = list(empleados)
+    fechas = fechas_del_mes(year, month)
+    primer_dia = fechas[0]
+    manuales = turnos_manuales_del_mes(empleados, year, month)
+    planes = cargar_planes([emp.id for emp in empleados], fechas[0], fechas[-1])
+
+    calendario = {}
+    for emp in empleados:
+        turnos_emp = manuales.get(emp.id, {})
+        calendario[emp.id] = {
+            fecha: celda_turno(emp, primer_dia, idx, turnos_emp.get(fecha), planes)
+            for idx, fecha in enumerate(fechas)
+        }
+    return calendario
+
+
+def intervalo_turno(fecha, hora_inicio, hora_fin):
+    """
+    Normaliza un turno a (inicio, fin) como datetime.
+    Si hora_fin <= hora_inicio el turno cruza la medianoche (ej: 23:00-07:00)
+    y termina al día siguiente.
+    """
+    inicio = datetime.combine(fecha, hora_inicio)
+    fin = datetime.combine(fecha, hora_fin)
+    if fin <= inicio:
+        fin += timedelta(days=1)
+    return inicio, fin
+
+
+def mes_anterior(year, month):
+    if month == 1:
+        return year - 1, 12
+    return year, month - 1
+
+
+def mes_siguiente(year, month):
+    if month == 12:
+        return year + 1, 1
+    return year, month + 1
+
+
+# --------------------------
+# Generación masiva de turnos por rotación
+# --------------------------
+TAMANO_LOTE_TURNOS = 1000
+MAX_EMPLEADOS_PROPAGACION = 10
+
+
+@lru_cache(maxsize=256)
+def a_hora(texto):
+    """'08:00' -> time(8, 0), memorizado porque se repite miles de veces."""
+    return datetime.strptime(texto, "%H:%M").time()
+
+
+def _rango_fechas(desde, hasta):
+    return [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+
+
+def generar_turnos(empleados, desde, hasta, sobrescribir=False, dry_run=False, lote=TAMANO_LOTE_TURNOS):
+    """
+    Materializa en TurnoEmpleado los turnos de rotación de los empleados entre
+    desde y hasta (incluidos), con inserciones/actualizaciones por lotes.
+
+    - Los días de descanso no generan fila (y no se borra lo que ya exista).
+    - Si sobrescribir=False, los turnos existentes (manuales) se respetan.
+    - Con dry_run=True no se escribe nada; solo se retorna el diff.
+
+    Retorna {"nuevos": [...], "cambios": [...], "sin_cambios": int}.
+    """
+    from .models import TurnoEmpleado  # importación local para evitar ciclo
+    from .cache_turnos import invalidar_grupo
+    from .propagacion import capturar, meses_de_turno, propagar
+
+    empleados = [emp for emp in empleados if emp.grupo_cargo]
+    fechas = _rango_fechas(desde, hasta)
+
+    # Pocos empleados: se propaga la diferencia; muchos: se invalida el grupo entero
+    incremental = not dry_run and len(empleados) <= MAX_EMPLEADOS_PROPAGACION
+    if incremental:
+        meses = set().union(*(meses_de_turno(f) for f in fechas))
+        capturas = [(emp, capturar(emp, meses)) for emp in empleados]
+
+    nuevos, cambios, sin_cambios = [], [], 0
+
+    for i in range(0, len(empleados), lote):
+        bloque = empleados[i:i + lote]
+
+        # Turnos existentes del bloque en una sola consulta
+        existentes = {
+            (emp_id, fecha): (hora_inicio, hora_fin)
+            for emp_id, fecha, hora_inicio, hora_fin in TurnoEmpleado.objects.filter(
+                empleado_id__in=[emp.id for emp in bloque],
+                fecha__range=(desde, hasta)
+            ).values_list('empleado_id', 'fecha', 'hora_inicio', 'hora_fin')
+        }
+        planes = cargar_planes([emp.id for emp in bloque], desde, hasta)
+
+        for emp in bloque:
+            for fecha in fechas:
+                turno = turno_rotado_del_dia(emp, fecha, planes)
+                if not turno:
+                    continue
+
+                horario = (a_hora(turno['hora_inicio']), a_hora(turno['hora_fin']))
+                actual = existentes.get((emp.id, fecha))
+                fila = TurnoEmpleado(
+                    empleado_id=emp.id,
+                    fecha=fecha,
+                    hora_inicio=horario[0],
+                    hora_fin=horario[1]
+                )
+
+                if actual is None:
+                    nuevos.append(fila)
+                elif actual != horario and sobrescribir:
+                    cambios.append(fila)
+                else:
+                    sin_cambios += 1
+
+    if not dry_run and (nuevos or cambios):
+        with transaction.atomic():
+            TurnoEmpleado.objects.bulk_create(nuevos, batch_size=lote, ignore_conflicts=True)
+            TurnoEmpleado.objects.bulk_create(
+                cambios,
+                batch_size=lote,
+                update_conflicts=True,
+                update_fields=['hora_inicio', 'hora_fin'],
+                unique_fields=['empleado', 'fecha'],
+            )
+
+        # bulk_create no dispara señales: actualizar calendarios a mano
+        if incremental:
+            for emp, captura in capturas:
+                propagar(emp, captura, meses=meses)
+        else:
+            for dep, grupo in {(emp.departamento, emp.grupo_cargo) for emp in empleados}:
+                invalidar_grupo(dep, grupo)
+
+    return {"nuevos": nuevos, "cambios": cambios, "sin_cambios": sin_cambios}
+
+
+def turnos_iniciales(empleado, hoy=None):
+    """
+    Turnos de la primera semana de un empleado nuevo según su cargo
+    (TURNOS_PREDETERMINADOS), sin guardar: para bulk_create.
+    """
+    from .models import TurnoEmpleado  # importación local para evitar ciclo
+
+    config = TURNOS_PREDETERMINADOS.get(empleado.cargo)
+    if not config:
+        return []
+    hora_inicio = a_hora(config['horario_inicio'])
+    hora_fin = a_hora(config['horario_fin'])
+
+    hoy = hoy or timezone.now().date()
+    turnos = []
+    for dia_nombre in config['dias']:
+        # Calculamos la fecha próxima para ese día
+        dias_a_sumar = (DIAS_SEMANA[dia_nombre] - hoy.weekday()) % 7
+        turnos.append(TurnoEmpleado(
+            empleado=empleado,
+            fecha=hoy + timedelta(days=dias_a_sumar),
+            hora_inicio=hora_inicio,
+            hora_fin=hora_fin
+        ))
+    return turnos
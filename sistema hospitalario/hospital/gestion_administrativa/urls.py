@@ -19,6 +19,7 @@ urlpatterns = [
     # --- CRUD Empleados ---
     path('empleados/', views.lista_empleados, name='lista_empleados'),
     path('empleados/registrar/', views.registrar_empleado, name='registrar_empleado'),
+    path('empleados/importar/', views.importar_empleados_archivo, name='importar_empleados'),
     path('empleados/editar/<int:empleado_id>/', views.editar_empleado, name='editar_empleado'),
     path('empleados/eliminar/<int:empleado_id>/', views.eliminar_empleado, name='eliminar_empleado'),
 
@@ -40,6 +41,18 @@ urlpatterns = [
     path('calendario-turnos/', views.calendario_turnos_mensual, name='calendario_turnos_actual'),
     path('calendario-turnos/<int:year>/<int:month>/', views.calendario_turnos_mensual, name='calendario_turnos'),
     path('departamentos/<str:departamento>/<str:grupo>/calendario/', views.calendario_turnos_por_grupo, name='calendario_turnos_por_grupo'),
+    path('turnos/eventos/', views.eventos_turnos, name='eventos_turnos'),
+
+    # --- Feeds iCalendar (.ics) ---
+    path('turnos/ical/empleado/<int:empleado_id>.ics', views.ical_empleado, name='ical_empleado'),
+    path('departamentos/<str:departamento>/<str:grupo>/calendario.ics', views.ical_grupo, name='ical_grupo'),
+
+    # --- Cobertura de personal por hora ---
+    path('turnos/cobertura/', views.cobertura_turnos, name='cobertura_turnos'),
+    path('turnos/cobertura/json/', views.cobertura_json, name='cobertura_json'),
+
+    # --- Matriz anual de turnos (JSON / CSV) ---
+    path('turnos/anual/', views.turnos_anual, name='turnos_anual'),
 
 #citas y colas 
 
@@ -50,16 +63,21 @@ urlpatterns = [
     
 # check-in y cola
     path("citas/checkin/<int:cita_id>/", views.checkin_cita, name="checkin_cita"),
+    path("citas/checkin/lote/", views.checkin_lote, name="checkin_lote"),
+    path("citas/disponibles/", views.horarios_libres, name="horarios_libres"),
     path("citas/cola/<int:doctor_id>/", views.cola_espera, name="cola_espera"),
     path("citas/en_proceso/<int:doctor_id>/", views.citas_en_proceso, name="citas_en_proceso"),
     path("citas/atender/<int:doctor_id>/", views.atender_siguiente, name="atender_siguiente"),
     path('citas/atendidos/<int:usuario_id>/', views.pacientes_atendidos, name='pacientes_atendidos'),
+    path('citas/revision-pacientes/', views.revision_pacientes, name='revision_pacientes'),
     path("citas/colas/", views.colas_de_espera, name="colas_de_espera"),
+    path("citas/colas/snapshot/", views.colas_snapshot, name="colas_snapshot"),
 
     path("citas/comenzar/<int:cita_id>/", views.comenzar_cita, name="comenzar_cita"),
 #tablero de citas en espera
 
     path("citas/tablero/", views.tablero_en_espera, name="tablero_en_espera"),
+    path("citas/tablero/eventos/", views.tablero_eventos, name="tablero_eventos"),
 
 #------camas 
 
@@ -91,6 +109,9 @@ urlpatterns = [
     # Liberar cama
     path("camas/liberar/<int:asignacion_id>/", views.liberar_cama, name="liberar_cama"),
     path("camas/confirmar/<int:cama_id>/", views.confirmar_limpieza, name="confirmar_limpieza"),
+    # Tablero en vivo
+    path("camas/tablero/", views.tablero_camas, name="tablero_camas"),
+    path("camas/tablero/eventos/", views.tablero_camas_eventos, name="tablero_camas_eventos"),
     #---alerta
     
     path("alerta_camas/", views.verificar_camas_disponibles, name="verificar_camas_disponibles"),
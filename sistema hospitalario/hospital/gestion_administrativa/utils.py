@@ -113,18 +113,68 @@ def calcular_turno_rotado(cargo, grupo, semana_index):
 # --------------------------
 # Generar número de atención (importación local para evitar ciclo)
 # --------------------------
-def generar_numero_atencion(departamento_nombre):
+def reservar_numeros_atencion(departamento_nombre, cantidad=1, fecha=None):
     """
-    Genera un numero como: CARD-001
+    Reserva <cantidad> consecutivos del departamento para el día (se reinicia
+    cada día) y retorna el último. Un UPDATE ultimo = ultimo + cantidad bloquea
+    solo la fila (departamento, fecha) hasta el fin de la transacción: dos
+    check-in simultáneos nunca reciben el mismo número.
     """
-    cod = departamento_nombre[:4].upper()
-    from .models import Cita  # importación local
+    from django.db import transaction
+    from django.db.models import F
+    from django.utils import timezone
+    from .models import SecuenciaAtencion  # importación local
+
+    fecha = fecha or timezone.localdate()
+    with transaction.atomic():
+        # INSERT IGNORE: la primera reserva del día crea la fila sin carreras
+        SecuenciaAtencion.objects.bulk_create(
+            [SecuenciaAtencion(departamento=departamento_nombre, fecha=fecha)],
+            ignore_conflicts=True
+        )
+        secuencia = SecuenciaAtencion.objects.filter(departamento=departamento_nombre, fecha=fecha)
+        secuencia.update(ultimo=F('ultimo') + cantidad)
+        return secuencia.values_list('ultimo', flat=True).get()
+
+
+def avanzar_secuencia(nombre, cantidad=1):
+    """
+    Suma <cantidad> a la secuencia compartida y retorna el nuevo valor. Como
+    en reservar_numeros_atencion, el UPDATE bloquea solo su fila: dos procesos
+    nunca reciben el mismo valor.
+    """
+    from django.db import transaction
+    from django.db.models import F
+    from .models import Secuencia  # importación local
+
+    with transaction.atomic():
+        Secuencia.objects.bulk_create([Secuencia(nombre=nombre)], ignore_conflicts=True)
+        secuencia = Secuencia.objects.filter(nombre=nombre)
+        secuencia.update(ultimo=F('ultimo') + cantidad)
+        return secuencia.values_list('ultimo', flat=True).get()
+
 
-    existentes = Cita.objects.filter(numero_atencion__startswith=cod).count()
-    consecutivo = existentes + 1
+def leer_secuencia(nombre):
+    """Valor actual de la secuencia (0 si nunca avanzó): una consulta por clave primaria única."""
+    from .models import Secuencia  # importación local
 
+    return Secuencia.objects.filter(nombre=nombre).values_list('ultimo', flat=True).first() or 0
+
+
+def formatear_numero_atencion(departamento_nombre, consecutivo):
+    """('Cardiología', 1) -> CARD-001"""
+    cod = departamento_nombre[:4].upper()
     return f"{cod}-{consecutivo:03d}"
 
+
+def generar_numero_atencion(departamento_nombre, fecha=None):
+    """
+    Genera un numero como: CARD-001
+    """
+    departamento_nombre = departamento_nombre or "General"
+    consecutivo = reservar_numeros_atencion(departamento_nombre, 1, fecha)
+    return formatear_numero_atencion(departamento_nombre, consecutivo)
+
 # --------------------------
 # Lista de departamentos
 # --------------------------
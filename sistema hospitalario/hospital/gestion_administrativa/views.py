@@ -1,14 +1,22 @@
 # ==========================================
 # IMPORTS
 # ==========================================
+import asyncio
+import csv
 import datetime
+import json
 from datetime import date, timedelta
 from calendar import monthrange
 from collections import defaultdict
 
-from MySQLdb import IntegrityError
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, HttpResponseForbidden
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
@@ -23,7 +31,28 @@ from .forms import (
     EmpleadoFormEditar,
     AsignarGrupoForm
 )
-from .utils import calcular_turno_rotado
+from .utils import calcular_turno_rotado, DEPARTAMENTOS
+from .turnos import construir_calendario, fechas_del_mes, generar_turnos, mes_anterior, mes_siguiente
+from .cache_turnos import calendario_grupo, cobertura_rango
+from .eventos import eventos_desde, ultimo_evento
+from .propagacion import CANAL_TURNOS
+from .importacion import COLUMNAS_EMPLEADOS, importar_empleados, leer_filas
+from .matriz_anual import CODIGO_DESCANSO, CODIGO_SIN_TURNO, matriz_anual
+from .colas import CANAL_COLAS, MAX_CHECKIN_LOTE, checkin_en_lote, colas, instantanea
+from .difusion import eventos_en_vivo, formato_sse
+from .estimacion import esperas_cola
+from .agenda import proximos_libres
+from .historial import leer_cursor, pagina_citas
+from .ical import (
+    etag_ical,
+    generar_ical,
+    rango_ical,
+    token_ical_empleado,
+    token_ical_empleado_valido,
+    token_ical_grupo,
+    token_ical_grupo_valido,
+    ultima_modificacion_ical
+)
 
 # ==========================================
 # LOGIN / LOGOUT / HOME
@@ -99,11 +128,10 @@ def medico_home(request):
     # Obtener el calendario del empleado
     horario_context = obtener_calendario_empleado(empleado, year=year, month=month)
 
-    # 🔹 Obtener citas en espera del doctor
-    citas_en_espera = Cita.objects.filter(
-        doctor=empleado,
-        estado="en_espera"
-    ).order_by("prioridad", "hora")
+    # 🔹 Obtener citas en espera del doctor (cola en memoria)
+    citas_en_espera = colas.cola(empleado.id)
+    # Espera estimada para un paciente que llega ahora (al final de la cola)
+    espera_nuevo, _ = esperas_cola(empleado.id, len(citas_en_espera))[-1]
 
     # Datos del panel de médico (puedes dejar igual)
     panel_medico = {
@@ -119,7 +147,7 @@ def medico_home(request):
         "tareas_rapidas": ["Solicitar Interconsulta", "Generar Receta", "Alta Médica"],
         "estadisticas_clave": {
             "ocupacion_camas": "75%",
-            "tiempo_promedio_espera": "20 min"
+            "tiempo_promedio_espera": f"{espera_nuevo} min"
         }
     }
 
@@ -386,6 +414,42 @@ def registrar_empleado(request):
     )
 
 
+@login_required
+def importar_empleados_archivo(request):
+    if not request.user.is_superuser:
+        messages.error(request, "No tienes permiso para registrar empleados.")
+        return redirect('home')
+
+    resultado = None
+    if request.method == 'POST':
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            messages.error(request, "Selecciona un archivo CSV o XLSX.")
+        else:
+            try:
+                # Sin pool de procesos dentro del worker web (el comando sí lo usa)
+                resultado = importar_empleados(
+                    leer_filas(archivo, archivo.name),
+                    procesos=1,
+                    dry_run=bool(request.POST.get('solo_validar')),
+                )
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                if resultado['creados']:
+                    messages.success(request, f"{resultado['creados']} empleados registrados correctamente.")
+                elif not resultado['errores']:
+                    messages.success(request, f"{resultado['validas']} filas válidas, sin errores.")
+                if resultado['errores']:
+                    messages.error(request, f"{len(resultado['errores'])} filas con errores (no se importaron).")
+
+    return render(
+        request,
+        'gestion_administrativa/empleados/importar_empleados.html',
+        {'resultado': resultado, 'columnas': COLUMNAS_EMPLEADOS}
+    )
+
+
 @login_required
 def editar_empleado(request, empleado_id):
     if not request.user.is_superuser:
@@ -442,27 +506,15 @@ def asignar_grupo_empleado(request, empleado_id):
             hoy = datetime.date.today()
             primer_dia_mes = hoy.replace(day=1)
             semana_actual = (hoy.day - 1) // 7
-
-            # Round-robin: calcular día de descanso
-            dia_descanso = (empleado.id + semana_actual) % 7
-
-            for i in range(7):
-                fecha_turno = primer_dia_mes + datetime.timedelta(days=i + semana_actual * 7)
-
-                # Si es el día de descanso → no crear turno
-                if i == dia_descanso:
-                    continue  # simplemente saltar este día
-
-                turno = calcular_turno_rotado(empleado.cargo, empleado.grupo_cargo, semana_actual)
-                if turno:
-                    TurnoEmpleado.objects.update_or_create(
-                        empleado=empleado,
-                        fecha=fecha_turno,
-                        defaults={
-                            'hora_inicio': turno['hora_inicio'],
-                            'hora_fin': turno['hora_fin']
-                        }
-                    )
+            inicio_semana = primer_dia_mes + datetime.timedelta(days=semana_actual * 7)
+
+            # Rotación + día de descanso round-robin, en una sola inserción por lotes
+            generar_turnos(
+                [empleado],
+                inicio_semana,
+                inicio_semana + datetime.timedelta(days=6),
+                sobrescribir=True
+            )
 
             messages.success(
                 request,
@@ -553,7 +605,7 @@ def registrar_turno(request):
                 grupo=grupo_nombre
             )
         else:
-            messages.error(request, "La hora de fin no puede ser menor o igual a la hora de inicio.")
+            messages.error(request, " ".join(form.non_field_errors()) or "Revisa los datos del turno.")
     else:
         # Inicializar formulario con valores GET
         initial = {}
@@ -596,7 +648,7 @@ def editar_turno(request, turno_id):
                 grupo=turno.empleado.grupo_cargo
             )
         else:
-            messages.error(request, "Error al actualizar el turno.")
+            messages.error(request, " ".join(form.non_field_errors()) or "Error al actualizar el turno.")
     else:
         form = TurnoEmpleadoForm(instance=turno)
 
@@ -704,31 +756,24 @@ def calendario_turnos_mensual(request, year=None, month=None):
     year = int(year) if year else hoy.year
     month = int(month) if month else hoy.month
 
-    primer_dia = date(year, month, 1)
-    dias_en_mes = monthrange(year, month)[1]
-    fechas_mes = [primer_dia + timedelta(days=i) for i in range(dias_en_mes)]
+    fechas_mes = fechas_del_mes(year, month)
 
     semanas = [fechas_mes[i:i+7] for i in range(0, len(fechas_mes), 7)]
 
-    empleados = Empleado.objects.filter(estado='Activo').order_by('departamento', 'grupo_cargo', 'nombre')
+    # Un calendario en caché por cada (departamento, grupo) con empleados activos
+    grupos_activos = (
+        Empleado.objects.filter(estado='Activo')
+        .values_list('departamento', 'grupo_cargo')
+        .distinct()
+        .order_by('departamento', 'grupo_cargo')
+    )
 
     departamentos = {}
-    for emp in empleados:
-        dep = emp.departamento
-        grupo = emp.grupo_cargo or "Sin Grupo"
-        departamentos.setdefault(dep, {}).setdefault(grupo, []).append(emp)
-
     turnos_empleados = {}
-    for emp in empleados:
-        turnos_empleados[emp.id] = {}
-        if not emp.grupo_cargo:
-            continue
-        semanas_globales = (primer_dia - date(2025, 1, 1)).days // 7
-        for idx, fecha in enumerate(fechas_mes):
-            semana_mes = idx // 7
-            semana_rotacion = semanas_globales + semana_mes
-            turno = calcular_turno_rotado(emp.cargo, emp.grupo_cargo, semana_rotacion)
-            turnos_empleados[emp.id][fecha] = f"{turno['hora_inicio']} - {turno['hora_fin']}" if turno else "—"
+    for dep, grupo in grupos_activos:
+        empleados, turnos_grupo = calendario_grupo(dep, grupo, year, month)
+        departamentos.setdefault(dep, {})[grupo or "Sin Grupo"] = empleados
+        turnos_empleados.update(turnos_grupo)
 
     context = {
         'departamentos': departamentos,
@@ -753,71 +798,17 @@ def calendario_turnos_por_grupo(request, departamento, grupo):
     month = int(request.GET.get('month', hoy.month))
 
     # Calcular fechas del mes
-    primer_dia = date(year, month, 1)
-    dias_en_mes = monthrange(year, month)[1]
-    fechas_mes = [primer_dia + timedelta(days=i) for i in range(dias_en_mes)]
+    fechas_mes = fechas_del_mes(year, month)
 
     # Marcar el día actual si está en este mes
     dia_actual = hoy if hoy.month == month and hoy.year == year else None
 
     # Calcular mes anterior y siguiente para navegación
-    prev_month = month - 1
-    prev_year = year
-    if prev_month < 1:
-        prev_month = 12
-        prev_year -= 1
-
-    next_month = month + 1
-    next_year = year
-    if next_month > 12:
-        next_month = 1
-        next_year += 1
-
-    # Empleados activos del grupo
-    empleados = Empleado.objects.filter(
-        departamento=departamento,
-        grupo_cargo=grupo,
-        estado='Activo'
-    ).order_by('nombre')
-
-    turnos_empleados = {}
-
-    for emp in empleados:
-        turnos_empleados[emp.id] = {}
-
-        # Turnos manuales existentes
-        turnos_manual = {
-            t.fecha: t for t in TurnoEmpleado.objects.filter(
-                empleado=emp,
-                fecha__month=month,
-                fecha__year=year
-            )
-        }
-
-        # Semana global basada en fecha de ingreso
-        fecha_inicio_rotacion = getattr(emp, 'fecha_ingreso', date(2025, 1, 1))
-        semanas_globales = (primer_dia - fecha_inicio_rotacion).days // 7
-
-        for idx, fecha in enumerate(fechas_mes):
-            semana_mes = idx // 7
-            semana_rotacion = semanas_globales + semana_mes
-            dia_semana = idx % 7
-            dia_descanso = (emp.id + semana_rotacion) % 7  # round-robin
-
-            # Turnos manuales primero
-            if fecha in turnos_manual:
-                t = turnos_manual[fecha]
-                horario = "Descanso" if not t.hora_inicio and not t.hora_fin else f"{t.hora_inicio} - {t.hora_fin}"
-                turnos_empleados[emp.id][fecha] = {"horario": horario, "turno_id": t.id, "manual": True}
-            else:
-                # Turno automático
-                if dia_semana == dia_descanso:
-                    horario = "Descanso"
-                else:
-                    turno = calcular_turno_rotado(emp.cargo, emp.grupo_cargo, semana_rotacion)
-                    horario = f"{turno['hora_inicio']} - {turno['hora_fin']}" if turno else "—"
+    prev_year, prev_month = mes_anterior(year, month)
+    next_year, next_month = mes_siguiente(year, month)
 
-                turnos_empleados[emp.id][fecha] = {"horario": horario, "turno_id": None, "manual": False}
+    # Empleados activos del grupo y grilla del mes (desde caché si ya se calculó)
+    empleados, turnos_empleados = calendario_grupo(departamento, grupo, year, month)
 
     context = {
         'departamento': departamento,
@@ -832,11 +823,254 @@ def calendario_turnos_por_grupo(request, departamento, grupo):
         'prev_year': prev_year,
         'next_month': next_month,
         'next_year': next_year,
+        'ical_url': reverse('ical_grupo', args=[departamento, grupo]) + '?token=' + token_ical_grupo(departamento, grupo),
+        'ultimo_evento': ultimo_evento(CANAL_TURNOS),
     }
 
     return render(request, 'gestion_administrativa/turnos/calendario_por_grupo.html', context)
 
 
+@login_required
+def eventos_turnos(request):
+    """Cambios de turnos publicados después del evento ?desde=N (para calendarios abiertos)."""
+    if not request.user.is_superuser:
+        return JsonResponse({"error": "No tienes permiso para ver esta sección."}, status=403)
+
+    try:
+        desde = int(request.GET.get('desde', 0))
+    except ValueError:
+        return JsonResponse({"error": "Parámetro 'desde' inválido."}, status=400)
+
+    ultimo, eventos, recargar = eventos_desde(CANAL_TURNOS, desde)
+    return JsonResponse({"ultimo": ultimo, "eventos": eventos, "recargar": recargar})
+
+
+
+# ==========================================
+# FEEDS ICALENDAR (.ics)
+# ==========================================
+def _respuesta_ical(request, empleados, grupos, nombre, archivo):
+    """Responde 304 si el cliente ya tiene la última versión; si no, el .ics en streaming."""
+    desde, hasta = rango_ical()
+    etag = quote_etag(etag_ical(grupos, desde, hasta))
+    modificado = ultima_modificacion_ical(grupos)
+
+    respuesta = get_conditional_response(request, etag=etag, last_modified=int(modificado.timestamp()))
+    if respuesta is not None:
+        return respuesta
+
+    respuesta = StreamingHttpResponse(
+        generar_ical(empleados, desde, hasta, nombre, modificado),
+        content_type='text/calendar; charset=utf-8'
+    )
+    respuesta['ETag'] = etag
+    respuesta['Last-Modified'] = http_date(modificado.timestamp())
+    respuesta['Content-Disposition'] = f'inline; filename="{archivo}"'
+    patch_cache_control(respuesta, private=True, max_age=0, must_revalidate=True)
+    return respuesta
+
+
+def ical_empleado(request, empleado_id):
+    empleado = get_object_or_404(Empleado, id=empleado_id)
+
+    autorizado = (
+        token_ical_empleado_valido(request.GET.get('token', ''), empleado)
+        or request.user.is_superuser
+        or (request.user.is_authenticated and empleado.usuario_id == request.user.id)
+    )
+    if not autorizado:
+        return HttpResponseForbidden("No tienes permiso para ver este calendario.")
+
+    return _respuesta_ical(
+        request,
+        [empleado],
+        [(empleado.departamento, empleado.grupo_cargo)],
+        f"Turnos - {empleado.nombre} {empleado.apellido}",
+        f"turnos_{empleado.id}.ics"
+    )
+
+
+def ical_grupo(request, departamento, grupo):
+    autorizado = (
+        token_ical_grupo_valido(request.GET.get('token', ''), departamento, grupo)
+        or request.user.is_superuser
+    )
+    if not autorizado:
+        return HttpResponseForbidden("No tienes permiso para ver este calendario.")
+
+    empleados = Empleado.objects.filter(
+        departamento=departamento,
+        grupo_cargo=grupo,
+        estado='Activo'
+    ).order_by('nombre')
+
+    return _respuesta_ical(
+        request,
+        empleados,
+        [(departamento, grupo)],
+        f"Turnos - {departamento} - {grupo}",
+        "turnos_grupo.ics"
+    )
+
+
+# ==========================================
+# COBERTURA DE PERSONAL POR HORA
+# ==========================================
+def _rango_cobertura(request, dias_defecto=7):
+    """Lee ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD (por defecto: una semana desde hoy)."""
+    hoy = date.today()
+    desde = date.fromisoformat(request.GET['desde']) if request.GET.get('desde') else hoy
+    hasta = date.fromisoformat(request.GET['hasta']) if request.GET.get('hasta') else desde + timedelta(days=dias_defecto - 1)
+    if hasta < desde or (hasta - desde).days > 366:
+        raise ValueError("Rango de fechas inválido (máximo un año).")
+    return desde, hasta
+
+
+@login_required
+def cobertura_json(request):
+    if not request.user.is_superuser:
+        return JsonResponse({"error": "No tienes permiso para ver esta sección."}, status=403)
+
+    try:
+        desde, hasta = _rango_cobertura(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    departamento = request.GET.get('departamento') or None
+    cargo = request.GET.get('cargo') or None
+    cobertura = cobertura_rango(desde, hasta, departamento=departamento, cargo=cargo)
+
+    return JsonResponse({
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "horas": ((hasta - desde).days + 1) * 24,
+        "cobertura": cobertura,
+    })
+
+
+@login_required
+def cobertura_turnos(request):
+    if not request.user.is_superuser:
+        messages.error(request, "No tienes permiso para ver esta sección.")
+        return redirect('home')
+
+    try:
+        desde, hasta = _rango_cobertura(request)
+    except ValueError as e:
+        messages.error(request, str(e))
+        desde, hasta = date.today(), date.today() + timedelta(days=6)
+
+    departamento = request.GET.get('departamento') or None
+    cargo = request.GET.get('cargo') or None
+    cobertura = cobertura_rango(desde, hasta, departamento=departamento, cargo=cargo)
+
+    # Sumar los cargos/departamentos seleccionados en una sola serie por hora
+    total_horas = ((hasta - desde).days + 1) * 24
+    serie = [0] * total_horas
+    for cargos in cobertura.values():
+        for valores in cargos.values():
+            serie = [a + b for a, b in zip(serie, valores)]
+
+    maximo = max(serie) if serie else 0
+    filas = []
+    for d in range(total_horas // 24):
+        horas = serie[d * 24:(d + 1) * 24]
+        filas.append({
+            'fecha': desde + timedelta(days=d),
+            'horas': [(n, round(n / maximo, 2) if maximo else 0) for n in horas],
+        })
+
+    context = {
+        'filas': filas,
+        'horas': range(24),
+        'maximo': maximo,
+        'desde': desde,
+        'hasta': hasta,
+        'departamento': departamento or '',
+        'cargo': cargo or '',
+        'departamentos': DEPARTAMENTOS,
+        'cargos': Empleado.CARGOS,
+    }
+    return render(request, 'gestion_administrativa/turnos/cobertura.html', context)
+
+
+# ==========================================
+# MATRIZ ANUAL DE TURNOS (JSON / CSV)
+# ==========================================
+class _Eco:
+    """Buffer mínimo para que csv.writer devuelva cada fila (StreamingHttpResponse)."""
+    def write(self, valor):
+        return valor
+
+
+@login_required
+def turnos_anual(request):
+    if not request.user.is_superuser:
+        return JsonResponse({"error": "No tienes permiso para ver esta sección."}, status=403)
+
+    try:
+        year = int(request.GET.get('year') or date.today().year)
+        date(year, 1, 1)
+    except ValueError:
+        return JsonResponse({"error": "Año inválido."}, status=400)
+
+    empleados = Empleado.objects.filter(estado='Activo').order_by('departamento', 'grupo_cargo', 'apellido', 'nombre')
+    departamento = request.GET.get('departamento') or None
+    cargo = request.GET.get('cargo') or None
+    if departamento:
+        empleados = empleados.filter(departamento=departamento)
+    if cargo:
+        empleados = empleados.filter(cargo=cargo)
+    empleados = list(empleados)
+
+    try:
+        matriz, horarios, fechas = matriz_anual(empleados, year)
+    except ImportError:
+        return JsonResponse({"error": "La matriz anual requiere numpy (pip install numpy)."}, status=503)
+
+    if request.GET.get('formato') == 'csv':
+        textos = {CODIGO_DESCANSO: "Descanso", CODIGO_SIN_TURNO: ""}
+        textos.update(horarios)
+        escritor = csv.writer(_Eco())
+
+        def filas():
+            yield escritor.writerow(
+                ['id', 'nombre', 'apellido', 'cargo', 'departamento', 'grupo'] + [f.isoformat() for f in fechas]
+            )
+            for emp, codigos in zip(empleados, matriz.tolist()):
+                yield escritor.writerow(
+                    [emp.id, emp.nombre, emp.apellido, emp.cargo, emp.departamento or '', emp.grupo_cargo or '']
+                    + [textos[c] for c in codigos]
+                )
+
+        response = StreamingHttpResponse(filas(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="turnos_{year}.csv"'
+        return response
+
+    # JSON compacto: una fila de códigos enteros por empleado + leyenda de códigos
+    return JsonResponse({
+        "year": year,
+        "desde": fechas[0].isoformat(),
+        "dias": len(fechas),
+        "codigos": {
+            str(CODIGO_DESCANSO): "Descanso",
+            str(CODIGO_SIN_TURNO): "Sin turno",
+            **{str(c): h for c, h in horarios.items()},
+        },
+        "empleados": [
+            {
+                "id": emp.id,
+                "nombre": f"{emp.nombre} {emp.apellido}",
+                "cargo": emp.cargo,
+                "departamento": emp.departamento,
+                "grupo": emp.grupo_cargo,
+            }
+            for emp in empleados
+        ],
+        "matriz": matriz.tolist(),
+    }, json_dumps_params={"separators": (",", ":")})
+
+
 
 #citas y colas
 
@@ -850,22 +1084,81 @@ from .forms import CitaForm
 
 # LISTAR
 def lista_citas(request):
-    citas = Cita.objects.all().order_by('-fecha', '-hora')
-    return render(request, 'gestion_administrativa/citas/lista_citas.html', {'citas': citas})
+    cursor = leer_cursor(request.GET.get('despues'))
+    citas, siguiente = pagina_citas({}, cursor)
+    return render(request, 'gestion_administrativa/citas/lista_citas.html', {
+        'citas': citas,
+        'siguiente': siguiente,
+        'es_primera': cursor is None,
+    })
 
 
 # CREAR
+def _guardar_cita(form):
+    """
+    Guarda la cita; si otra recepcionista tomó el mismo horario entre la
+    validación y el guardado, el índice único lo rechaza y se sugiere otro.
+    """
+    try:
+        with transaction.atomic():
+            form.save()
+    except IntegrityError:
+        form.horario_ocupado(refrescar=True)
+        return False
+    return True
+
+
 def crear_cita(request):
     if request.method == 'POST':
         form = CitaForm(request.POST)
         if form.is_valid():
-            form.save()
-            return redirect('lista_citas')
+            if _guardar_cita(form):
+                return redirect('lista_citas')
     else:
         form = CitaForm()
     return render(request, 'gestion_administrativa/citas/registrar_cita.html', {'form': form})
 
 
+# HORARIOS LIBRES
+MAX_HORARIOS_LIBRES = 100
+
+
+@login_required
+def horarios_libres(request):
+    """
+    Próximos bloques libres de 15 minutos para agendar.
+    ?departamento=X (todos sus médicos activos) y/o ?doctor=ID (uno o varios),
+    ?n=10, ?desde=AAAA-MM-DD[THH:MM] (por defecto ahora).
+    """
+    doctores = Empleado.objects.filter(cargo='Medico', estado='Activo')
+    departamento = request.GET.get('departamento')
+    ids = request.GET.getlist('doctor')
+    if not departamento and not ids:
+        return JsonResponse({"error": "Indica 'departamento' o 'doctor'."}, status=400)
+    try:
+        if departamento:
+            doctores = doctores.filter(departamento=departamento)
+        if ids:
+            doctores = doctores.filter(id__in=[int(i) for i in ids])
+        n = min(int(request.GET.get('n', 10)), MAX_HORARIOS_LIBRES)
+        desde = request.GET.get('desde')
+        if desde:
+            desde = datetime.datetime.fromisoformat(desde)
+            desde = timezone.make_aware(desde) if timezone.is_naive(desde) else desde
+    except ValueError:
+        return JsonResponse({"error": "Parámetros inválidos."}, status=400)
+
+    return JsonResponse({"horarios": [
+        {
+            "fecha": fecha.isoformat(),
+            "hora": hora.strftime("%H:%M"),
+            "doctor_id": doctor.id,
+            "doctor": f"{doctor.nombre} {doctor.apellido or ''}".strip(),
+        }
+        for fecha, hora, doctor in proximos_libres(doctores, n=n, desde=desde or None)
+    ]})
+
+
 # EDITAR
 def editar_cita(request, cita_id):
     cita = get_object_or_404(Cita, id=cita_id)
@@ -873,8 +1166,8 @@ def editar_cita(request, cita_id):
     if request.method == 'POST':
         form = CitaForm(request.POST, instance=cita)
         if form.is_valid():
-            form.save()
-            return redirect('lista_citas')
+            if _guardar_cita(form):
+                return redirect('lista_citas')
     else:
         form = CitaForm(instance=cita)
 
@@ -897,36 +1190,73 @@ from .models import Cita
 from .utils import generar_numero_atencion
 
 def checkin_cita(request, cita_id):
-    cita = get_object_or_404(Cita, id=cita_id)
+    with transaction.atomic():
+        # Bloquear la cita: un doble clic no hace dos check-in
+        cita = get_object_or_404(Cita.objects.select_for_update().select_related('doctor'), id=cita_id)
+
+        if cita.estado != "pendiente":
+            messages.error(request, "La cita ya no puede hacer check-in.")
+            return redirect("lista_citas")
+
+        # Obtener departamento del doctor
+        departamento = cita.doctor.departamento
+
+        # Generar número de atención (secuencia atómica por departamento y día)
+        numero = generar_numero_atencion(departamento)
+
+        # Actualizar
+        cita.numero_atencion = numero
+        cita.estado = "en_espera"
+        cita.save(update_fields=["numero_atencion", "estado"])
+
+    # Posición en la cola (ya actualizada al confirmar la transacción) y espera estimada
+    cola = colas.cola(cita.doctor_id)
+    posicion = next((i for i, c in enumerate(cola) if c.id == cita.id), len(cola))
+    espera, espera_p90 = esperas_cola(cita.doctor_id, posicion)[posicion]
+    messages.success(
+        request,
+        f"Check-in correcto. Número de atención: {numero}. Espera estimada: {espera} min (hasta {espera_p90} min)."
+    )
 
-    if cita.estado != "pendiente":
-        messages.error(request, "La cita ya no puede hacer check-in.")
-        return redirect("lista_citas")
+    return redirect("cola_espera", doctor_id=cita.doctor.id)
 
-    # Obtener departamento del doctor
-    departamento = cita.doctor.departamento
 
-    # Generar número de atención
-    numero = generar_numero_atencion(departamento)
+@login_required
+def checkin_lote(request):
+    """
+    Check-in de varias citas en una sola petición (kioscos, recepción a primera hora).
+    POST JSON {"citas": [id, ...]} o formulario con varios 'citas'.
+    Responde {"asignados": [{id, numero_atencion, doctor_id}], "errores": [{id, error}]}.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Método no permitido."}, status=405)
 
-    # Actualizar
-    cita.numero_atencion = numero
-    cita.estado = "en_espera"
-    cita.save()
+    try:
+        if request.content_type == "application/json":
+            ids = json.loads(request.body or b"{}").get("citas", [])
+        else:
+            ids = request.POST.getlist("citas")
+        ids = [int(i) for i in ids]
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({"error": "Lista de citas inválida."}, status=400)
 
-    messages.success(request, f"Check-in correcto. Número de atención: {numero}")
+    if not ids:
+        return JsonResponse({"error": "No se enviaron citas."}, status=400)
+    if len(ids) > MAX_CHECKIN_LOTE:
+        return JsonResponse({"error": f"Máximo {MAX_CHECKIN_LOTE} citas por petición."}, status=400)
 
-    return redirect("cola_espera", doctor_id=cita.doctor.id)
+    asignados, errores = checkin_en_lote(ids)
+    return JsonResponse({"asignados": asignados, "errores": errores})
 
 
 def cola_espera(request, doctor_id):
-    citas = Cita.objects.filter(
-        doctor_id=doctor_id,
-        estado="en_espera"
-    ).order_by("prioridad", "hora")
+    # Ordenada por prioridad y hora, sin consultar la base de datos
+    citas = colas.cola(doctor_id)
+    esperas = esperas_cola(doctor_id, len(citas))
 
     return render(request, "gestion_administrativa/citas/cola_espera.html", {
-        "citas": citas
+        "citas": citas,
+        "filas": zip(citas, esperas),
     })
 
 @login_required
@@ -966,7 +1296,8 @@ def atender_siguiente(request, doctor_id):
 
 # views.py
 from django.shortcuts import render, get_object_or_404
-from .models import Cita, Empleado
+from .models import Cita, Empleado, RevisionPaciente
+from gestion_pacientes.models import Paciente
 from django.contrib.auth.decorators import login_required
 
 @login_required
@@ -974,15 +1305,48 @@ def pacientes_atendidos(request, usuario_id):
     # Obtener el empleado correspondiente al usuario
     doctor = get_object_or_404(Empleado, usuario_id=usuario_id, cargo='Medico')
     
-    # Obtener las citas atendidas de ese doctor
-    citas = Cita.objects.filter(
-        doctor=doctor,
-        estado='atendida'
-    ).order_by('-fecha', 'hora_inicio')
-    
+    # Citas atendidas de ese doctor (incluidas las archivadas), por páginas
+    cursor = leer_cursor(request.GET.get('despues'))
+    citas, siguiente = pagina_citas({'doctor': doctor, 'estado': 'atendida'}, cursor)
+
     return render(request, 'gestion_administrativa/citas/pacientes_atendidos.html', {
         'doctor': doctor,
-        'citas': citas
+        'citas': citas,
+        'siguiente': siguiente,
+        'es_primera': cursor is None,
+    })
+
+
+# --------------------------
+# Revisión manual de pacientes (vincular_pacientes)
+# --------------------------
+REVISIONES_POR_PAGINA = 50
+
+
+@login_required
+def revision_pacientes(request):
+    """Nombres de citas con varios pacientes posibles: elegir uno o descartar."""
+    if not request.user.is_superuser:
+        messages.error(request, "No tienes permiso para ver esta página.")
+        return redirect('home')
+
+    if request.method == 'POST':
+        revision = get_object_or_404(RevisionPaciente, id=request.POST.get('revision_id'), estado='pendiente')
+        elegido = request.POST.get('paciente_id')
+        if elegido:
+            revision.paciente = get_object_or_404(Paciente, id=elegido)
+            revision.estado = 'resuelta'
+            messages.success(request, f"'{revision.ejemplo}' se vinculará con {revision.paciente}.")
+        else:
+            revision.estado = 'descartada'
+            messages.info(request, f"'{revision.ejemplo}' queda sin paciente.")
+        revision.save(update_fields=['paciente', 'estado'])
+        return redirect('revision_pacientes')
+
+    pendientes = RevisionPaciente.objects.filter(estado='pendiente').order_by('-citas', 'id')
+    return render(request, 'gestion_administrativa/citas/revision_pacientes.html', {
+        'revisiones': pendientes[:REVISIONES_POR_PAGINA],
+        'total': pendientes.count(),
     })
 
 
@@ -992,21 +1356,30 @@ from django.contrib.auth.decorators import login_required
 
 @login_required
 def colas_de_espera(request):
-    # Obtener todas las citas en espera, ordenadas por prioridad y hora
-    citas = Cita.objects.filter(
-        estado="en_espera"
-    ).order_by("prioridad", "hora")
-
-    # Agrupamos por doctor para la plantilla
-    colas = defaultdict(list)
-    for c in citas:
-        colas[c.doctor].append(c)
-
+    # Colas por doctor, ya ordenadas por prioridad y hora
     return render(request, "gestion_administrativa/citas/colas_de_espera.html", {
-        "colas": dict(colas)
+        "colas": colas.colas_por_doctor()
     })
 
 
+@login_required
+def colas_snapshot(request):
+    """
+    Todas las colas en JSON. Se sirve la instantánea de la versión actual de
+    las colas (cambia con cada check-in, llamado o cancelación); con
+    If-None-Match y la misma versión responde 304 sin cuerpo.
+    """
+    version, contenido = instantanea()
+    etag = quote_etag(f"colas-{version}")
+
+    respuesta = get_conditional_response(request, etag=etag)
+    if respuesta is None:
+        respuesta = HttpResponse(contenido, content_type="application/json")
+    respuesta['ETag'] = etag
+    patch_cache_control(respuesta, private=True, max_age=0, must_revalidate=True)
+    return respuesta
+
+
 
 
 from django.utils import timezone
@@ -1036,14 +1409,119 @@ from django.contrib.auth.decorators import login_required
 
 @login_required
 def tablero_en_espera(request):
+    # El último evento se lee antes que las colas: lo que cambie entre medio
+    # llega por el flujo de eventos (a lo sumo repetido, nunca perdido)
+    ultimo = ultimo_evento(CANAL_COLAS)
     # Obtener solo citas en estado "en_espera"
-    en_espera = Cita.objects.filter(estado="en_espera").order_by("numero_atencion")
+    en_espera = colas.todas_por_numero()
     
     return render(request, "gestion_administrativa/citas/tablero_en_espera.html", {
-        "en_espera": en_espera
+        "en_espera": en_espera,
+        "ultimo_evento": ultimo,
     })
 
 
+ESPERA_LONG_POLL = 25  # segundos
+
+
+@login_required
+async def tablero_eventos(request):
+    """
+    Eventos de las colas (checkin, llamado, fin, salida, actualizada) en vivo.
+    Con Accept: text/event-stream responde un flujo SSE que se reanuda desde
+    Last-Event-ID; si no, long-poll: espera el primer evento posterior a
+    ?desde=N y responde como eventos_turnos.
+    """
+    try:
+        desde = int(request.headers.get('Last-Event-ID') or request.GET.get('desde', 0))
+    except ValueError:
+        return JsonResponse({"error": "Parámetro 'desde' inválido."}, status=400)
+
+    if 'text/event-stream' not in request.headers.get('Accept', ''):
+        flujo = eventos_en_vivo(CANAL_COLAS, desde)
+
+        async def primero():
+            async for evento in flujo:
+                if evento is not None:
+                    return evento
+
+        try:
+            evento = await asyncio.wait_for(primero(), ESPERA_LONG_POLL)
+        except asyncio.TimeoutError:
+            evento = None
+        finally:
+            await flujo.aclose()
+
+        if evento is None:
+            return JsonResponse({"ultimo": desde, "eventos": [], "recargar": False})
+        if evento["id"] is None:
+            return JsonResponse({"ultimo": desde, "eventos": [], "recargar": True})
+        return JsonResponse({"ultimo": evento["id"], "eventos": [evento], "recargar": False})
+
+    return respuesta_sse(CANAL_COLAS, desde, continuo=es_asgi(request))
+
+
+ESPERA_RAFAGA = 0.2  # segundos: tras el primer evento, se juntan los que llegan enseguida
+
+
+def es_asgi(request):
+    return isinstance(request, ASGIRequest)
+
+
+async def _eventos_acotados(canal, desde, espera=None):
+    """
+    Como eventos_en_vivo, pero termina: espera hasta `espera` segundos
+    (ESPERA_LONG_POLL) el primer evento, agrega los que llegan enseguida y corta.
+    """
+    flujo = eventos_en_vivo(canal, desde)
+    reloj = asyncio.get_running_loop()
+    limite = reloj.time() + (ESPERA_LONG_POLL if espera is None else espera)
+    try:
+        while True:
+            restante = limite - reloj.time()
+            if restante <= 0:
+                return
+            try:
+                evento = await asyncio.wait_for(anext(flujo), restante)
+            except (asyncio.TimeoutError, StopAsyncIteration):
+                return
+            if evento is None:
+                continue  # latido: en un flujo acotado no hace falta
+            yield evento
+            if evento["id"] is None:
+                return  # recargar
+            limite = min(limite, reloj.time() + ESPERA_RAFAGA)
+    finally:
+        await flujo.aclose()
+
+
+def respuesta_sse(canal, desde, primero=None, continuo=True):
+    """
+    Flujo SSE del canal desde el evento `desde`, precedido opcionalmente por el
+    evento `primero`. Bajo ASGI (continuo=True) el flujo no termina. Bajo WSGI
+    Django junta todo el iterador antes de enviarlo y un flujo infinito
+    dejaría el hilo tomado para siempre: ahí se acota como un long-poll y
+    EventSource se reconecta solo con Last-Event-ID.
+    """
+    async def sse():
+        yield f"retry: {3000 if continuo else 500}\n\n"
+        if primero is not None:
+            yield formato_sse(primero)
+        if continuo:
+            async for evento in eventos_en_vivo(canal, desde):
+                yield ": latido\n\n" if evento is None else formato_sse(evento)
+        else:
+            # Tras una foto no se la retiene: lo que falte llega en la reconexión
+            espera = ESPERA_RAFAGA if primero is not None else None
+            async for evento in _eventos_acotados(canal, desde, espera):
+                yield formato_sse(evento)
+
+    respuesta = StreamingHttpResponse(sse(), content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    respuesta['X-Accel-Buffering'] = 'no'  # nginx: no acumular el flujo
+    return respuesta
+
+
 from datetime import date, timedelta
 from calendar import monthrange
 from django.contrib import messages
@@ -1056,50 +1534,14 @@ def obtener_calendario_empleado(empleado, year=None, month=None):
     year = int(year) if year else hoy.year
     month = int(month) if month else hoy.month
 
-    primer_dia = date(year, month, 1)
-    dias_en_mes = monthrange(year, month)[1]
-    fechas_mes = [primer_dia + timedelta(days=i) for i in range(dias_en_mes)]
-
-    turnos_mes = {}
-    semanas_globales = (primer_dia - date(2025, 1, 1)).days // 7
+    fechas_mes = fechas_del_mes(year, month)
 
-    for idx, fecha in enumerate(fechas_mes):
-        semana_mes = idx // 7
-        semana_rotacion = semanas_globales + semana_mes
-        dia_semana = idx % 7
-        dia_descanso = (empleado.id + semana_rotacion) % 7
+    # Grilla del mes: una sola consulta de turnos manuales
+    turnos_mes = construir_calendario([empleado], year, month)[empleado.id]
 
-        # Turno manual
-        try:
-            t = TurnoEmpleado.objects.get(empleado=empleado, fecha=fecha)
-            if t.hora_inicio is None and t.hora_fin is None:
-                horario = "Descanso"
-            else:
-                horario = f"{t.hora_inicio} - {t.hora_fin}"
-            manual = True
-        except TurnoEmpleado.DoesNotExist:
-            if dia_semana == dia_descanso:
-                horario = "Descanso"
-            else:
-                turno = calcular_turno_rotado(empleado.cargo, empleado.grupo_cargo, semana_rotacion)
-                horario = f"{turno['hora_inicio']} - {turno['hora_fin']}" if turno else "—"
-            manual = False
-
-        turnos_mes[fecha] = {"horario": horario, "manual": manual}
-
-    # Mes anterior
-    prev_month = month - 1
-    prev_year = year
-    if prev_month == 0:
-        prev_month = 12
-        prev_year -= 1
-
-    # Mes siguiente
-    next_month = month + 1
-    next_year = year
-    if next_month == 13:
-        next_month = 1
-        next_year += 1
+    # Mes anterior y siguiente
+    prev_year, prev_month = mes_anterior(year, month)
+    next_year, next_month = mes_siguiente(year, month)
 
     return {
         'empleado': empleado,
@@ -1112,6 +1554,7 @@ def obtener_calendario_empleado(empleado, year=None, month=None):
         'next_month': next_month,
         'next_year': next_year,
         'dia_actual': hoy,
+        'ical_url': reverse('ical_empleado', args=[empleado.id]) + '?token=' + token_ical_empleado(empleado),
     }
 
 
@@ -1296,6 +1739,8 @@ from gestion_pacientes.models import Paciente  # <- USO CORRECTO DEL MODELO PACI
 
 from .models import Habitacion, Cama, AsignacionCama, ListaEspera
 from .forms import AsignarCamaForm
+from .censo import CANAL_CAMAS, censo_departamento, foto_camas, habitaciones_con_camas_libres
+from . import asignacion_camas
 
 
 # ==========================================
@@ -1303,20 +1748,15 @@ from .forms import AsignarCamaForm
 # ==========================================
 def get_habitaciones_por_departamento(request):
     departamento = request.GET.get("departamento")
-    habitaciones = Habitacion.objects.filter(
-        departamento=departamento,
-        estado="disponible"
-    )
-
+    # Una consulta: los contadores del censo ya dicen cuántas camas libres tiene cada habitación
     data = [
         {
-            "id": h.id,
-            "numero": h.numero,
-            "capacidad": h.capacidad,
-            "camas_disponibles": h.camas.filter(estado="disponible").count()
+            "id": censo.habitacion.id,
+            "numero": censo.habitacion.numero,
+            "capacidad": censo.habitacion.capacidad,
+            "camas_disponibles": censo.disponible
         }
-        for h in habitaciones
-        if h.camas.filter(estado="disponible").count() > 0
+        for censo in habitaciones_con_camas_libres(departamento)
     ]
 
     return JsonResponse({"habitaciones": data})
@@ -1361,29 +1801,13 @@ def asignar_cama(request):
             messages.error(request, "Paciente no encontrado.")
             return redirect(f"{request.path}?departamento={departamento_post}")
 
-        # Buscar cama disponible
-        try:
-            cama = Cama.objects.get(id=cama_id, estado="disponible")
-        except Cama.DoesNotExist:
-            messages.error(request, "La cama no está disponible.")
+        # Asignar cama (bloquea la cama: dos admisiones no pueden tomar la misma)
+        asignacion, error = asignacion_camas.asignar(cama_id, paciente)
+        if error:
+            messages.error(request, error)
             return redirect(f"{request.path}?departamento={departamento_post}")
 
-        # Asignar cama
-        cama.estado = "ocupada"
-        cama.save()
-
-        AsignacionCama.objects.create(
-            paciente=paciente,
-            cama=cama
-        )
-
-        # Eliminar de lista de espera
-        ListaEspera.objects.filter(
-            paciente=paciente,
-            departamento=departamento_post
-        ).delete()
-
-        messages.success(request, f"Cama {cama.codigo} asignada a {paciente.nombre}.")
+        messages.success(request, f"Cama {asignacion.cama.codigo} asignada a {paciente.nombre}.")
         return redirect(f"{request.path}?departamento={departamento_post}")
 
     return render(request, "gestion_administrativa/habitaciones/asignar_cama.html", {
@@ -1410,19 +1834,13 @@ def listado_camas_asignadas(request):
 # Liberar cama (pasar a limpieza)
 # ==========================================
 def liberar_cama(request, asignacion_id):
-    asignacion = get_object_or_404(AsignacionCama, id=asignacion_id)
-    cama = asignacion.cama
+    get_object_or_404(AsignacionCama, id=asignacion_id)
+    cama, error = asignacion_camas.liberar(asignacion_id)
 
-    if cama.estado != "ocupada":
-        messages.error(request, "La cama no está ocupada.")
+    if error:
+        messages.error(request, error)
         return redirect("listado_camas_asignadas")
 
-    cama.estado = "limpieza"
-    cama.save()
-
-    asignacion.fecha_salida = timezone.now()
-    asignacion.save()
-
     messages.success(request, f"Cama {cama.codigo} ahora está en limpieza.")
     return redirect("listado_camas_asignadas")
 
@@ -1431,19 +1849,50 @@ def liberar_cama(request, asignacion_id):
 # Confirmar limpieza y volver a disponible
 # ==========================================
 def confirmar_limpieza(request, cama_id):
-    cama = get_object_or_404(Cama, id=cama_id)
+    get_object_or_404(Cama, id=cama_id)
+    cama, asignacion, error = asignacion_camas.devolver_a_servicio(cama_id)
 
-    if cama.estado != "limpieza":
-        messages.error(request, "La cama no está en proceso de limpieza.")
+    if error:
+        messages.error(request, error)
         return redirect("listar_camas")
 
-    cama.estado = "disponible"
-    cama.save()
-
-    messages.success(request, f"Cama {cama.codigo} está disponible.")
+    if asignacion:
+        messages.success(request, f"Cama {cama.codigo} asignada a {asignacion.paciente.nombre} (lista de espera).")
+    else:
+        messages.success(request, f"Cama {cama.codigo} está disponible.")
     return redirect("listar_camas")
 
 
+# ==========================================
+# Tablero de camas en vivo (puestos de enfermería, admisión)
+# ==========================================
+@login_required
+def tablero_camas(request):
+    return render(request, "gestion_administrativa/habitaciones/tablero_camas.html", {
+        "estados": Cama.ESTADOS,
+    })
+
+
+@login_required
+async def tablero_camas_eventos(request):
+    """
+    SSE del canal de camas. Sin Last-Event-ID ni ?desde empieza con un evento
+    "foto" (todas las camas, una consulta) y sigue con los cambios; al
+    reconectarse retoma desde el último id recibido sin pedir otra foto.
+    """
+    desde = request.headers.get('Last-Event-ID') or request.GET.get('desde')
+    if desde is not None:
+        try:
+            desde = int(desde)
+        except ValueError:
+            return JsonResponse({"error": "Parámetro 'desde' inválido."}, status=400)
+        return respuesta_sse(CANAL_CAMAS, desde, continuo=es_asgi(request))
+
+    foto = await sync_to_async(foto_camas)()
+    primero = {"id": foto["ultimo"], "tipo": "foto", "datos": foto["camas"]}
+    return respuesta_sse(CANAL_CAMAS, foto["ultimo"], primero, continuo=es_asgi(request))
+
+
 # ==========================================
 # Verificar disponibilidad de camas y lista de espera
 # ==========================================
@@ -1459,7 +1908,8 @@ def verificar_camas_disponibles(request):
             messages.error(request, "Paciente no encontrado.")
             return redirect(f"{reverse('verificar_camas_disponibles')}?departamento={departamento}")
 
-        ListaEspera.objects.create(
+        # Una sola entrada por paciente y departamento (restricción única): conserva su lugar en la cola
+        ListaEspera.objects.get_or_create(
             paciente=paciente,
             departamento=departamento
         )
@@ -1469,21 +1919,24 @@ def verificar_camas_disponibles(request):
 
     # GET
     departamento = request.GET.get("departamento")
-    camas_disponibles = Cama.objects.filter(
-        habitacion__departamento=departamento,
-        estado="disponible"
-    )
-
-    disponible = camas_disponibles.exists()
+    total_disponibles = censo_departamento(departamento)["disponible"]
+    disponible = total_disponibles > 0
 
+    # El detalle de camas solo se consulta si el censo dice que hay alguna
+    camas_disponibles = Cama.objects.none()
     if disponible:
-        messages.success(request, f"Hay {camas_disponibles.count()} cama(s) disponible(s) en {departamento}.")
+        camas_disponibles = Cama.objects.filter(
+            habitacion__departamento=departamento,
+            estado="disponible"
+        ).select_related("habitacion")
+        messages.success(request, f"Hay {total_disponibles} cama(s) disponible(s) en {departamento}.")
     else:
         messages.warning(request, f"No hay camas disponibles en {departamento}.")
 
     return render(request, "gestion_administrativa/habitaciones/alerta_camas.html", {
         "departamento": departamento,
         "camas_disponibles": camas_disponibles,
+        "total_disponibles": total_disponibles,
         "disponible": disponible,
-        "lista_espera": ListaEspera.objects.filter(departamento=departamento)
+        "lista_espera": ListaEspera.objects.filter(departamento=departamento).select_related("paciente")
     })
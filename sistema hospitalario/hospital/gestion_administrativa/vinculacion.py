@@ -0,0 +1,126 @@
+# gestion_administrativa/vinculacion.py
+
+# --------------------------
+# Vinculación de Cita.paciente (texto libre) con gestion_pacientes.Paciente
+# --------------------------
+# 1. Normalizar: minúsculas, sin acentos ni signos, espacios simples.
+# 2. Bloquear: solo se comparan pacientes que comparten con el texto de la
+#    cita al menos dos claves (las 4 primeras letras de cada palabra, así
+#    "peres" y "perez" coinciden), o la clave más rara si no hay ninguno así.
+# 3. Puntuar: similitud (difflib) entre las palabras ordenadas, contra el
+#    nombre completo y contra nombre + apellido paterno (sin el materno).
+# Un candidato claro se vincula solo; los dudosos van a RevisionPaciente.
+import difflib
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import chain
+
+UMBRAL_AUTOMATICO = 0.92  # puntaje mínimo para vincular sin revisión
+UMBRAL_REVISION = 0.75  # por debajo se considera que no hay coincidencia
+MARGEN_MINIMO = 0.05  # ventaja mínima del mejor candidato sobre el segundo
+MAX_BLOQUE = 2000  # claves más comunes que esto ("mari") no sirven para bloquear
+MAX_CANDIDATOS = 5  # candidatos guardados para la revisión manual
+LARGO_MINIMO_PALABRA = 3
+LARGO_CLAVE = 4
+
+VINCULADO = 'vinculado'
+REVISION = 'revision'
+SIN_COINCIDENCIA = 'sin_coincidencia'
+
+
+def normalizar(texto):
+    sin_acentos = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode()
+    return ' '.join(re.findall(r'[a-z0-9]+', sin_acentos.lower()))
+
+
+def _ordenado(normalizado):
+    return ' '.join(sorted(normalizado.split()))
+
+
+def _claves(normalizado):
+    return {p[:LARGO_CLAVE] for p in normalizado.split() if len(p) >= LARGO_MINIMO_PALABRA}
+
+
+class IndicePacientes:
+    """Pacientes en memoria, listos para buscar por nombre aproximado."""
+
+    def __init__(self):
+        self.variantes = {}  # id -> [nombre ordenado completo, sin apellido materno]
+        self.nombres = {}  # id -> nombre para mostrar
+        self.exactos = defaultdict(set)  # variante ordenada -> ids
+        self.bloques = defaultdict(set)  # clave -> ids
+
+    @classmethod
+    def cargar(cls):
+        from gestion_pacientes.models import Paciente  # importación local para evitar ciclo
+
+        indice = cls()
+        filas = Paciente.objects.values_list('id', 'nombre', 'apellido_paterno', 'apellido_materno')
+        for paciente_id, nombre, paterno, materno in filas.iterator(chunk_size=5000):
+            indice.agregar(paciente_id, nombre, paterno, materno)
+        return indice
+
+    def agregar(self, paciente_id, nombre, paterno, materno):
+        corto = normalizar(f"{nombre} {paterno}")
+        completo = normalizar(f"{nombre} {paterno} {materno or ''}")
+        variantes = list(dict.fromkeys([_ordenado(completo), _ordenado(corto)]))
+        self.variantes[paciente_id] = variantes
+        self.nombres[paciente_id] = f"{nombre} {paterno} {materno or ''}".strip()
+        for variante in variantes:
+            self.exactos[variante].add(paciente_id)
+        for clave in _claves(completo):
+            self.bloques[clave].add(paciente_id)
+
+    def _candidatos(self, normalizado):
+        bloques = sorted((self.bloques[c] for c in _claves(normalizado) if c in self.bloques), key=len)
+        if not bloques:
+            return set()
+        utiles = [b for b in bloques if len(b) <= MAX_BLOQUE]
+        if len(utiles) >= 2:
+            veces = Counter(chain.from_iterable(utiles))
+            comparten = {paciente_id for paciente_id, n in veces.items() if n >= 2}
+            if comparten:
+                return comparten
+        return set(bloques[0])  # la clave más rara
+
+    def resolver(self, normalizado):
+        """
+        (resultado, paciente_id, candidatos) para un nombre ya normalizado.
+        resultado: VINCULADO, REVISION o SIN_COINCIDENCIA.
+        candidatos: [{"id", "nombre", "puntaje"}] de mejor a peor.
+        """
+        if not normalizado:
+            return SIN_COINCIDENCIA, None, []
+        ordenado = _ordenado(normalizado)
+
+        exactos = self.exactos.get(ordenado, set())
+        if len(exactos) == 1:
+            return VINCULADO, next(iter(exactos)), []
+
+        puntajes = []
+        comparador = difflib.SequenceMatcher(autojunk=False)
+        comparador.set_seq2(ordenado)
+        for paciente_id in self._candidatos(normalizado):
+            mejor = 0
+            for variante in self.variantes[paciente_id]:
+                comparador.set_seq1(variante)
+                # Cotas baratas primero: ratio() solo si todavía puede mejorar
+                piso = max(mejor, UMBRAL_REVISION)
+                if comparador.real_quick_ratio() >= piso and comparador.quick_ratio() >= piso:
+                    mejor = max(mejor, comparador.ratio())
+            if mejor >= UMBRAL_REVISION:
+                puntajes.append((mejor, paciente_id))
+        if not puntajes:
+            return SIN_COINCIDENCIA, None, []
+
+        puntajes.sort(key=lambda par: (-par[0], par[1]))
+        candidatos = [
+            {"id": paciente_id, "nombre": self.nombres[paciente_id], "puntaje": round(puntaje, 3)}
+            for puntaje, paciente_id in puntajes[:MAX_CANDIDATOS]
+        ]
+        mejor = puntajes[0][0]
+        segundo = puntajes[1][0] if len(puntajes) > 1 else 0
+        if mejor >= UMBRAL_AUTOMATICO and mejor - segundo >= MARGEN_MINIMO:
+            return VINCULADO, puntajes[0][1], candidatos
+        return REVISION, None, candidatos
@@ -97,6 +97,21 @@ DATABASES = {
 }
 
 
+# Caché (calendarios de turnos, agenda de citas, estadísticas de consultas)
+# En producción con varios procesos usar un backend compartido (Redis/Memcached)
+# para que la invalidación por señales llegue a todos los workers.
+# Las colas de espera y los eventos de los tableros no dependen de esto: su
+# versión y su registro viven en la base (Secuencia, EventoTablero), así cada
+# worker ve los cambios de los demás aun con LocMemCache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hospital-cache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
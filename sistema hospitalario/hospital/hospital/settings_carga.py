@@ -0,0 +1,43 @@
+"""
+Settings para pruebas de carga locales (SQLite, sin tocar la base real).
+
+    python manage.py migrate --run-syncdb --settings=hospital.settings_carga
+    python manage.py carga_consultas --settings=hospital.settings_carga
+
+La base de SQLite se crea en el directorio temporal del sistema, fuera del
+repositorio.
+
+Para probar contra un MySQL local, usar settings.py con una base de pruebas
+(por ejemplo 'hospital_carga') en lugar de este archivo.
+"""
+
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost', 'testserver']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': Path(tempfile.gettempdir()) / 'hospital_carga.sqlite3',
+        # Varios hilos escriben a la vez: esperar el bloqueo en vez de fallar.
+        # IMMEDIATE toma el bloqueo de escritura al abrir la transacción (si no,
+        # SQLite falla al pasar de lectura a escritura dentro de un atomic()).
+        'OPTIONS': {'timeout': 30, 'transaction_mode': 'IMMEDIATE'},
+    }
+}
+
+# Las tablas se crean directamente desde los modelos (migrate --run-syncdb):
+# la base de pruebas es desechable y no necesita el historial de migraciones.
+MIGRATION_MODULES = {
+    'gestion_administrativa': None,
+    'gestion_financiera': None,
+    'gestion_pacientes': None,
+    'gestion_STD': None,
+}
+
+# Hash rápido: los usuarios de carga se crean por cientos
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']